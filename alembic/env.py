@@ -11,6 +11,7 @@ from app.core.database import Base
 from app.models.bot import Bot
 from app.models.group import GroupConfig, Operator, LedgerRecord, LicenseCode
 from app.models.audit import AuditLog
+from app.models.cluster import WorkerNode, LeaderLock, ScheduledRun
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
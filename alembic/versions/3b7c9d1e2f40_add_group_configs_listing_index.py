@@ -0,0 +1,22 @@
+"""add group_configs listing index
+
+Revision ID: 3b7c9d1e2f40
+Revises: 8e4f3b2d6a7c
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '3b7c9d1e2f40'
+down_revision = '8e4f3b2d6a7c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_group_configs_bot_updated', 'group_configs', ['bot_id', 'updated_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_configs_bot_updated', table_name='group_configs')
@@ -0,0 +1,26 @@
+"""add cached bot info
+
+Revision ID: 5c2e8a4f1d63
+Revises: 3b7c9d1e2f40
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '5c2e8a4f1d63'
+down_revision = '3b7c9d1e2f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('bots', sa.Column('tg_user_id', sa.BigInteger(), nullable=True))
+    op.add_column('bots', sa.Column('tg_username', sa.String(), nullable=True))
+    op.add_column('bots', sa.Column('tg_first_name', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('bots', 'tg_first_name')
+    op.drop_column('bots', 'tg_username')
+    op.drop_column('bots', 'tg_user_id')
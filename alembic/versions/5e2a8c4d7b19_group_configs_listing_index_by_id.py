@@ -0,0 +1,24 @@
+"""group_configs listing index on (bot_id, id)
+
+Revision ID: 5e2a8c4d7b19
+Revises: 9a4c7e2b1f58
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '5e2a8c4d7b19'
+down_revision = '9a4c7e2b1f58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_group_configs_bot_updated', table_name='group_configs')
+    op.create_index('ix_group_configs_bot_id_id', 'group_configs', ['bot_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_group_configs_bot_id_id', table_name='group_configs')
+    op.create_index('ix_group_configs_bot_updated', 'group_configs', ['bot_id', 'updated_at', 'id'], unique=False)
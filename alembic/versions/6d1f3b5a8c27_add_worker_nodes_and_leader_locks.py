@@ -0,0 +1,37 @@
+"""add worker_nodes and leader_locks tables
+
+Revision ID: 6d1f3b5a8c27
+Revises: 5c2e8a4f1d63
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '6d1f3b5a8c27'
+down_revision = '5c2e8a4f1d63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('worker_nodes',
+        sa.Column('worker_id', sa.String(), nullable=False),
+        sa.Column('url', sa.String(), nullable=False),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('worker_id')
+    )
+    op.create_index('ix_worker_nodes_heartbeat_at', 'worker_nodes', ['heartbeat_at'], unique=False)
+    op.create_table('leader_locks',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('holder', sa.String(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('leader_locks')
+    op.drop_index('ix_worker_nodes_heartbeat_at', table_name='worker_nodes')
+    op.drop_table('worker_nodes')
@@ -0,0 +1,26 @@
+"""add scheduled_runs table
+
+Revision ID: 7b3e9f1a2c64
+Revises: 5e2a8c4d7b19
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '7b3e9f1a2c64'
+down_revision = '5e2a8c4d7b19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('scheduled_runs',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('last_run_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('scheduled_runs')
@@ -0,0 +1,22 @@
+"""add group_configs.reply_debounce
+
+Revision ID: 9a4c7e2b1f58
+Revises: 6d1f3b5a8c27
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '9a4c7e2b1f58'
+down_revision = '6d1f3b5a8c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('group_configs', sa.Column('reply_debounce', sa.Boolean(), nullable=True, server_default=sa.false()))
+
+
+def downgrade() -> None:
+    op.drop_column('group_configs', 'reply_debounce')
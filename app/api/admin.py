@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form
-from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse, JSONResponse
+from fastapi.responses import StreamingResponse, HTMLResponse, RedirectResponse, JSONResponse, FileResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, delete
+from sqlalchemy import select, func, and_, or_, delete
 from pydantic import BaseModel
 from datetime import date, datetime, timedelta
 import json
@@ -15,7 +15,17 @@ from app.core.config import settings
 from app.models.bot import Bot, BotAdminUser, BotFeeTemplate, BotExchangeTemplate
 from app.models.group import GroupConfig, GroupCategory, Operator, LedgerRecord, LicenseCode, TrialRequest, group_category_association
 from app.core.bot_manager import bot_manager
+from app.core.polling import polling_supervisor
+from app.core.sharding import shard_coordinator
+from app.core.metrics import metrics
+from app.core.rate_limit import OutboundPriority
+from app.core.tracing import tracing
+from app.core.profiling import request_profiler
 from app.services.license_service import LicenseService
+from app.services.stats_service import stats_service
+from app.services.config_service import parse_button_config, invalidate_bot_config
+from app.services.group_query_service import GroupQueryService
+from app.services.category_service import CategoryService
 from loguru import logger
 from app.core.utils import to_timezone, get_now
 
@@ -63,34 +73,8 @@ async def logout(request: Request):
 
 @router.get("/ui/dashboard", response_class=HTMLResponse)
 async def dashboard_ui(request: Request, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
-    # Stats
-    bot_count = await db.scalar(select(func.count(Bot.id)))
-    group_count = await db.scalar(select(func.count(GroupConfig.id)).where(GroupConfig.is_active == True))
-    pending_trials = await db.scalar(select(func.count(TrialRequest.id)).where(TrialRequest.status == "pending"))
-    
-    # Today Volume
-    now = get_now()
-    if now.hour < 4:
-        start_date = now.date() - timedelta(days=1)
-    else:
-        start_date = now.date()
-    start_time = datetime.combine(start_date, datetime.min.time()).replace(hour=4)
-    if now.tzinfo: start_time = now.tzinfo.localize(start_time) # Assuming naive handling in DB, but let's be safe
-    # Actually LedgerRecord stores naive usually? Or we standardized.
-    # Let's just do a simple query.
-    
-    # Simplified today sum
-    stmt = select(func.sum(LedgerRecord.amount)).where(
-        and_(LedgerRecord.type == 'deposit', LedgerRecord.created_at >= start_time)
-    )
-    today_volume = await db.scalar(stmt) or 0
-    
-    stats = {
-        "bot_count": bot_count,
-        "group_count": group_count,
-        "pending_trials": pending_trials,
-        "today_volume": today_volume
-    }
+    # Stats are maintained incrementally by stats_service (see app/services/stats_service.py)
+    stats = await stats_service.get_snapshot(db)
     return templates.TemplateResponse("admin/dashboard.html", {"request": request, "stats": stats, "page": "dashboard"})
 
 @router.get("/ui/trials", response_class=HTMLResponse)
@@ -99,63 +83,125 @@ async def trials_ui(request: Request, db: AsyncSession = Depends(get_db), admin=
     requests = result.scalars().all()
     return templates.TemplateResponse("admin/trials.html", {"request": request, "requests": requests, "page": "trials"})
 
+BOTS_PAGE_SIZE = 24
+AUTHORIZED_ACCOUNTS_PER_BOT = 50
+
 @router.get("/ui/bots", response_class=HTMLResponse)
-async def bots_ui(request: Request, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
-    result = await db.execute(select(Bot))
+async def bots_ui(
+    request: Request,
+    page: int = 1,
+    q: str = None,
+    db: AsyncSession = Depends(get_db),
+    admin=Depends(get_current_admin)
+):
+    page = max(page, 1)
+    q = (q or "").strip()
+
+    stmt = select(Bot)
+    if q:
+        pattern = f"%{q}%"
+        conditions = [Bot.name.ilike(pattern), Bot.web_username.ilike(pattern)]
+        if q.isdigit():
+            conditions.append(Bot.id == int(q))
+        stmt = stmt.where(or_(*conditions))
+
+    total = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+    result = await db.execute(
+        stmt.order_by(Bot.id.asc()).offset((page - 1) * BOTS_PAGE_SIZE).limit(BOTS_PAGE_SIZE)
+    )
     bots = result.scalars().all()
-    
+
     now = get_now()
-    
-    # Parse button config for UI & Load Authorized Accounts
-    for bot in bots:
-        if bot.button_config:
-            try:
-                # Store in a temporary attribute to avoid triggering SQLAlchemy autoflush on the 'button_config' column
-                bot.parsed_config = json.loads(bot.button_config)
-            except:
-                bot.parsed_config = {}
-        else:
-            bot.parsed_config = {}
-            
-        # Fetch Authorized Accounts (Active License)
-        stmt = select(GroupConfig).where(
-            GroupConfig.bot_id == bot.id,
+
+    # Authorized accounts (active license) for the whole page in one windowed query,
+    # capped per bot, instead of one query per bot.
+    accounts_by_bot = {}
+    totals_by_bot = {}
+    if bots:
+        ranked = select(
+            GroupConfig.id,
+            GroupConfig.bot_id,
+            GroupConfig.group_id,
+            GroupConfig.group_name,
+            GroupConfig.expire_at,
+            func.row_number().over(
+                partition_by=GroupConfig.bot_id,
+                order_by=GroupConfig.expire_at.asc() # Soonest to expire first
+            ).label("rn"),
+            func.count().over(partition_by=GroupConfig.bot_id).label("total")
+        ).where(
+            GroupConfig.bot_id.in_([bot.id for bot in bots]),
             GroupConfig.expire_at > now
-        ).order_by(GroupConfig.expire_at.desc())
-        
-        res = await db.execute(stmt)
-        bot.authorized_accounts = res.scalars().all()
-            
-    return templates.TemplateResponse("admin/bots.html", {"request": request, "bots": bots, "page": "bots"})
+        ).subquery()
 
-@router.get("/ui/groups", response_class=HTMLResponse)
-async def groups_ui(request: Request, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
-    bot_result = await db.execute(select(Bot).order_by(Bot.id.asc()))
-    bots = bot_result.scalars().all()
+        res = await db.execute(
+            select(ranked)
+            .where(ranked.c.rn <= AUTHORIZED_ACCOUNTS_PER_BOT)
+            .order_by(ranked.c.bot_id, ranked.c.rn)
+        )
+        for row in res.all():
+            accounts_by_bot.setdefault(row.bot_id, []).append(row)
+            totals_by_bot[row.bot_id] = row.total
 
-    group_result = await db.execute(select(GroupConfig).order_by(GroupConfig.bot_id.asc(), GroupConfig.updated_at.desc()))
-    groups = group_result.scalars().all()
+    for bot in bots:
+        # Store in a temporary attribute to avoid triggering SQLAlchemy autoflush on the 'button_config' column
+        bot.parsed_config = dict(parse_button_config(bot))
+        bot.authorized_accounts = accounts_by_bot.get(bot.id, [])
+        bot.authorized_total = totals_by_bot.get(bot.id, 0)
+
+    pages = max((total + BOTS_PAGE_SIZE - 1) // BOTS_PAGE_SIZE, 1)
+    return templates.TemplateResponse("admin/bots.html", {
+        "request": request,
+        "bots": bots,
+        "page": "bots",
+        "q": q,
+        "pagination": {"page": page, "pages": pages, "total": total}
+    })
+
+GROUP_STATUS_FILTERS = {"active": True, "inactive": False}
 
-    groups_by_bot = {}
-    for group in groups:
-        groups_by_bot.setdefault(group.bot_id, []).append(group)
+@router.get("/ui/groups", response_class=HTMLResponse)
+async def groups_ui(
+    request: Request,
+    bot_id: str = "",
+    status: str = "",
+    license_status: str = "",
+    category_id: str = "",
+    q: str = "",
+    cursor: str = None,
+    db: AsyncSession = Depends(get_db),
+    admin=Depends(get_current_admin)
+):
+    bot_result = await db.execute(select(Bot.id, Bot.name).order_by(Bot.id.asc()))
+    bots = bot_result.all()
+    bot_names = {bot.id: bot.name or f"Bot #{bot.id}" for bot in bots}
+
+    filters = {
+        "bot_id": int(bot_id) if bot_id.isdigit() else None,
+        "active": GROUP_STATUS_FILTERS.get(status),
+        "license_status": license_status or None,
+        "category_id": int(category_id) if category_id.isdigit() else None,
+        "q": q,
+    }
+    service = GroupQueryService(db)
+    page = await service.list_groups(cursor=cursor, **filters)
+    total = await service.count_groups(**filters)
+    groups = page["items"]
 
+    # Sections follow the page order (newest first), grouped per bot
     group_sections = []
-    for bot in bots:
-        group_sections.append({
-            "bot_id": bot.id,
-            "bot_name": bot.name or f"Bot #{bot.id}",
-            "groups": groups_by_bot.get(bot.id, [])
-        })
-
-    for bot_id, bot_groups in groups_by_bot.items():
-        if any(section["bot_id"] == bot_id for section in group_sections):
-            continue
-        group_sections.append({
-            "bot_id": bot_id,
-            "bot_name": f"未命名 Bot #{bot_id}" if bot_id is not None else "未关联 Bot",
-            "groups": bot_groups
-        })
+    sections_by_bot = {}
+    for group in groups:
+        section = sections_by_bot.get(group.bot_id)
+        if section is None:
+            if group.bot_id in bot_names:
+                bot_name = bot_names[group.bot_id]
+            else:
+                bot_name = f"未命名 Bot #{group.bot_id}" if group.bot_id is not None else "未关联 Bot"
+            section = {"bot_id": group.bot_id, "bot_name": bot_name, "groups": []}
+            sections_by_bot[group.bot_id] = section
+            group_sections.append(section)
+        section["groups"].append(group)
 
     return templates.TemplateResponse(
         "admin/groups.html",
@@ -163,6 +209,17 @@ async def groups_ui(request: Request, db: AsyncSession = Depends(get_db), admin=
             "request": request,
             "groups": groups,
             "group_sections": group_sections,
+            "bots": bots,
+            "filters": {
+                "bot_id": bot_id,
+                "status": status,
+                "license_status": license_status,
+                "category_id": category_id,
+                "q": q,
+            },
+            "total": total,
+            "cursor": cursor,
+            "next_cursor": page["next_cursor"],
             "page": "groups",
         },
     )
@@ -196,6 +253,7 @@ async def update_bot_buttons(bot_id: int, config: BotButtonConfig, db: AsyncSess
     
     bot.button_config = json.dumps(config.model_dump(), ensure_ascii=False)
     await db.commit()
+    await shard_coordinator.invalidate_bot_config(bot_id)
     return {"status": "success"}
 
 @router.post("/bot/{bot_id}/customer_auth")
@@ -263,12 +321,12 @@ class GroupMessage(BaseModel):
 @router.post("/bot/{bot_id}/group/{group_id}/message")
 async def send_group_message(bot_id: int, group_id: int, msg: GroupMessage, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
     # 1. Get Bot Instance
-    app = bot_manager.apps.get(bot_id)
+    app = await bot_manager.ensure_app(bot_id)
     if not app:
         raise HTTPException(status_code=404, detail="Bot not running")
     
     try:
-        await app.bot.send_message(chat_id=group_id, text=msg.text)
+        await app.bot.send_message(chat_id=group_id, text=msg.text, rate_limit_args=OutboundPriority.NOTIFICATION)
         return {"status": "success"}
     except Exception as e:
         logger.error(f"Failed to send message: {e}")
@@ -286,16 +344,18 @@ async def broadcast_message(msg: GroupMessage, db: AsyncSession = Depends(get_db
     errors = 0
     
     for group in groups:
-        app = bot_manager.apps.get(group.bot_id)
+        app = await bot_manager.ensure_app(group.bot_id)
         if not app:
             continue
             
         try:
-            await app.bot.send_message(chat_id=group.group_id, text=msg.text)
+            await app.bot.send_message(chat_id=group.group_id, text=msg.text, rate_limit_args=OutboundPriority.BROADCAST)
             count += 1
+            metrics.record_broadcast(group.bot_id, True)
         except Exception as e:
             logger.error(f"Broadcast failed for group {group.group_id}: {e}")
             errors += 1
+            metrics.record_broadcast(group.bot_id, False)
             
     return {"status": "success", "count": count, "errors": errors}
 
@@ -313,18 +373,20 @@ async def broadcast_selected(req: BroadcastSelectedRequest, db: AsyncSession = D
     error_count = 0
     
     for target in req.targets:
-        app = bot_manager.apps.get(target.bot_id)
+        app = await bot_manager.ensure_app(target.bot_id)
         if not app:
             logger.warning(f"Bot {target.bot_id} not found for group {target.group_id}")
             error_count += 1
             continue
             
         try:
-            await app.bot.send_message(chat_id=target.group_id, text=req.text)
+            await app.bot.send_message(chat_id=target.group_id, text=req.text, rate_limit_args=OutboundPriority.BROADCAST)
             success_count += 1
+            metrics.record_broadcast(target.bot_id, True)
         except Exception as e:
             logger.error(f"Failed to send to group {target.group_id}: {e}")
             error_count += 1
+            metrics.record_broadcast(target.bot_id, False)
             
     return {"status": "success", "success_count": success_count, "error_count": error_count}
 
@@ -367,57 +429,49 @@ async def create_category(cat: CategoryCreate, db: AsyncSession = Depends(get_db
 
 @router.get("/category")
 async def list_categories(db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
-    # Fetch categories with group count
-    # This requires a bit complex query or separate counting.
-    # Simple list first.
-    stmt = select(GroupCategory)
-    result = await db.execute(stmt)
-    cats = result.scalars().all()
-    
-    # Manually count for now or optimize later
-    # Loading relationship eagerly might be better
-    from sqlalchemy.orm import selectinload
-    stmt = select(GroupCategory).options(selectinload(GroupCategory.groups))
-    result = await db.execute(stmt)
-    cats = result.scalars().all()
-    
-    data = []
-    for c in cats:
-        data.append({
-            "id": c.id,
-            "name": c.name,
-            "count": len(c.groups)
-        })
-    return data
+    # Categories with group counts in one grouped query
+    return await GroupQueryService(db).category_counts()
 
 class AddGroupsToCategory(BaseModel):
-    group_ids: list[int] # ID of GroupConfig, NOT group_id (chat_id)
+    group_ids: list[int] # Chat IDs (GroupConfig.group_id)
 
-@router.post("/category/{cat_id}/add_groups")
-async def add_groups_to_category(cat_id: int, req: AddGroupsToCategory, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
-    # Load category with groups to check existence
-    from sqlalchemy.orm import selectinload
-    stmt = select(GroupCategory).options(selectinload(GroupCategory.groups)).where(GroupCategory.id == cat_id)
-    result = await db.execute(stmt)
-    cat = result.scalars().first()
+class MoveGroupsToCategory(BaseModel):
+    group_ids: list[int] # Chat IDs
+    target_id: int
 
+async def _require_category(db: AsyncSession, cat_id: int) -> GroupCategory:
+    cat = await db.get(GroupCategory, cat_id)
     if not cat:
         raise HTTPException(status_code=404, detail="分类不存在")
-        
-    # Get Groups
-    stmt = select(GroupConfig).where(GroupConfig.group_id.in_(req.group_ids))
-    result = await db.execute(stmt)
-    groups = result.scalars().all()
-    
-    count = 0
-    for g in groups:
-        if g not in cat.groups:
-            cat.groups.append(g)
-            count += 1
-            
-    await db.commit()
+    return cat
+
+@router.post("/category/{cat_id}/add_groups")
+async def add_groups_to_category(cat_id: int, req: AddGroupsToCategory, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
+    await _require_category(db, cat_id)
+    count = await CategoryService(db).add_groups(cat_id, req.group_ids)
     return {"status": "success", "added": count}
 
+@router.post("/category/{cat_id}/remove_groups")
+async def remove_groups_from_category(cat_id: int, req: AddGroupsToCategory, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
+    await _require_category(db, cat_id)
+    count = await CategoryService(db).remove_groups(cat_id, req.group_ids)
+    return {"status": "success", "removed": count}
+
+@router.post("/category/{cat_id}/move_groups")
+async def move_groups_to_category(cat_id: int, req: MoveGroupsToCategory, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
+    await _require_category(db, cat_id)
+    await _require_category(db, req.target_id)
+    if req.target_id == cat_id:
+        raise HTTPException(status_code=400, detail="目标分类与当前分类相同")
+    result = await CategoryService(db).move_groups(cat_id, req.target_id, req.group_ids)
+    return {"status": "success", **result}
+
+@router.post("/category/{cat_id}/replace_groups")
+async def replace_category_groups(cat_id: int, req: AddGroupsToCategory, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
+    await _require_category(db, cat_id)
+    result = await CategoryService(db).replace_groups(cat_id, req.group_ids)
+    return {"status": "success", **result}
+
 @router.post("/category/{cat_id}/broadcast")
 async def broadcast_category(cat_id: int, msg: GroupMessage, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
     cat = await db.get(GroupCategory, cat_id)
@@ -431,17 +485,19 @@ async def broadcast_category(cat_id: int, msg: GroupMessage, db: AsyncSession =
     error_count = 0
     
     for group in cat.groups:
-        app = bot_manager.apps.get(group.bot_id)
+        app = await bot_manager.ensure_app(group.bot_id)
         if not app:
             error_count += 1
             continue
             
         try:
-            await app.bot.send_message(chat_id=group.group_id, text=msg.text)
+            await app.bot.send_message(chat_id=group.group_id, text=msg.text, rate_limit_args=OutboundPriority.BROADCAST)
             success_count += 1
+            metrics.record_broadcast(group.bot_id, True)
         except Exception as e:
             logger.error(f"Failed to broadcast to {group.group_id}: {e}")
             error_count += 1
+            metrics.record_broadcast(group.bot_id, False)
             
     return {"status": "success", "success_count": success_count, "error_count": error_count}
 
@@ -480,9 +536,10 @@ async def create_bot(bot_in: BotCreate, db: AsyncSession = Depends(get_db), admi
     db.add(new_bot)
     await db.commit()
     await db.refresh(new_bot)
+    stats_service.bot_added(new_bot.id, new_bot.name)
 
-    # 4. Start Bot dynamically
-    success = await bot_manager.start_bot(new_bot.token, new_bot.id)
+    # 4. Start Bot dynamically (on whichever worker owns it)
+    success = await shard_coordinator.start_bot(new_bot.id)
     if not success:
         # Rollback if failed to start? Or keep as 'error' status?
         # For now, we keep it but log error. User can retry or delete.
@@ -491,6 +548,35 @@ async def create_bot(bot_in: BotCreate, db: AsyncSession = Depends(get_db), admi
 
     return {"status": "success", "bot_id": new_bot.id, "name": new_bot.name}
 
+class BotReload(BaseModel):
+    token: str = None
+
+@router.post("/bot/{bot_id}/reload")
+async def reload_bot(bot_id: int, body: BotReload = None, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
+    """
+    Hot-reload a bot, optionally with a new token. Updates keep being processed
+    by the old instance until the new one is running.
+    """
+    bot = await db.get(Bot, bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    old_token = bot.token
+    if body and body.token and body.token != bot.token:
+        result = await db.execute(select(Bot.id).where(Bot.token == body.token))
+        if result.first():
+            raise HTTPException(status_code=400, detail="Bot already exists")
+        bot.token = body.token
+        await db.commit()
+    invalidate_bot_config(bot_id)
+
+    if not await shard_coordinator.reload_bot(bot_id):
+        if bot.token != old_token:
+            # The old instance is still serving: keep the token it runs with
+            bot.token = old_token
+            await db.commit()
+        return {"status": "reload_failed", "bot_id": bot_id}
+    return {"status": "success", "bot_id": bot_id}
+
 @router.delete("/bot/{bot_id}")
 async def delete_bot(bot_id: int, db: AsyncSession = Depends(get_db), admin=Depends(get_current_admin)):
     bot = await db.get(Bot, bot_id)
@@ -499,7 +585,7 @@ async def delete_bot(bot_id: int, db: AsyncSession = Depends(get_db), admin=Depe
 
     # Stop the running bot first so polling/webhook is cleaned up before DB removal.
     try:
-        await bot_manager.stop_bot(bot_id)
+        await shard_coordinator.stop_bot(bot_id)
     except Exception as e:
         logger.error(f"Failed to stop bot {bot_id} before deletion: {e}")
 
@@ -520,6 +606,10 @@ async def delete_bot(bot_id: int, db: AsyncSession = Depends(get_db), admin=Depe
     await db.execute(delete(BotExchangeTemplate).where(BotExchangeTemplate.bot_id == bot_id))
     await db.delete(bot)
     await db.commit()
+    invalidate_bot_config(bot_id)
+
+    # Removing a bot drops its groups and trials too; recount rather than track every delta.
+    await stats_service.reconcile(db)
 
     return {"status": "success", "bot_id": bot_id}
 
@@ -530,8 +620,6 @@ async def generate_license(days: int, db: AsyncSession = Depends(get_db), admin=
     code = await service.generate_code(days)
     return {"status": "success", "code": code, "days": days}
 
-from app.services.export_service import generate_group_ledger
-
 @router.get("/group/{chat_id}/export")
 async def export_group_ledger(
     chat_id: str, 
@@ -541,6 +629,8 @@ async def export_group_ledger(
     """
     Export Group Ledger to Excel
     """
+    # openpyxl is slow to import and only needed here
+    from app.services.export_service import generate_group_ledger
     output = await generate_group_ledger(db, chat_id, date)
     
     filename = f"账单_{chat_id}_{date}.xlsx"
@@ -590,6 +680,7 @@ async def approve_trial(request_id: int, days: int = None, db: AsyncSession = De
     result_group = await db.execute(stmt_group)
     config = result_group.scalars().first()
     
+    created_active = False
     if not config:
         config = GroupConfig(
             group_id=req.user_id,
@@ -597,6 +688,7 @@ async def approve_trial(request_id: int, days: int = None, db: AsyncSession = De
             is_active=True 
         )
         db.add(config)
+        created_active = True
         
     # Set Expiration
     duration = days if days is not None else req.duration_days
@@ -615,14 +707,21 @@ async def approve_trial(request_id: int, days: int = None, db: AsyncSession = De
     req.updated_at = now
     
     await db.commit()
+    stats_service.adjust_pending_trials(-1)
+    if created_active:
+        stats_service.adjust_active_groups(1)
+    # Drop the cached (possibly "no such group") entry so the license applies now
+    from app.core.cache import cache_service
+    await cache_service.invalidate_group_config(req.user_id, req.bot_id)
     
     # 4. Notify User
     try:
-        app = bot_manager.apps.get(req.bot_id)
+        app = await bot_manager.ensure_app(req.bot_id)
         if app:
             await app.bot.send_message(
                 chat_id=req.user_id,
-                text=f"🎉 您的试用申请已通过！\n授权天数：{duration}天\n有效期至：{new_expire.strftime('%Y-%m-%d %H:%M')}"
+                text=f"🎉 您的试用申请已通过！\n授权天数：{duration}天\n有效期至：{new_expire.strftime('%Y-%m-%d %H:%M')}",
+                rate_limit_args=OutboundPriority.NOTIFICATION,
             )
     except Exception as e:
         logger.error(f"Failed to notify user {req.user_id}: {e}")
@@ -639,8 +738,86 @@ async def reject_trial(request_id: int, db: AsyncSession = Depends(get_db)):
     if not req:
         raise HTTPException(status_code=404, detail="Request not found")
         
+    was_pending = req.status == "pending"
     req.status = "rejected"
     req.updated_at = datetime.now()
     await db.commit()
+    if was_pending:
+        stats_service.adjust_pending_trials(-1)
     
     return {"status": "rejected"}
+
+# Polling Supervisor
+
+@router.get("/polling")
+async def polling_stats(admin=Depends(get_current_admin)):
+    """Per-bot poll latency, timeouts and dispatch backlog (POLLING_SUPERVISOR mode)"""
+    return {"enabled": bot_manager.supervised_polling, **polling_supervisor.stats()}
+
+# Sharding
+
+@router.get("/shards")
+async def shard_status(admin=Depends(get_current_admin)):
+    """Live workers, this worker's bots and scheduler leadership (SHARDING_ENABLED mode)"""
+    return {
+        "enabled": shard_coordinator.enabled,
+        "worker_id": shard_coordinator.worker_id,
+        "leader": shard_coordinator.is_leader,
+        "workers": shard_coordinator.members,
+        "running_bots": sorted(set(bot_manager.apps) - bot_manager.send_only),
+        "send_only_bots": sorted(bot_manager.send_only),
+    }
+
+# Tracing & profiling
+
+class SamplingUpdate(BaseModel):
+    record_rate: float = None
+    keep_rate: float = None
+    slow_ms: int = None
+    profiles_rate: float = None
+
+@router.get("/sentry/sampling")
+async def get_sentry_sampling(admin=Depends(get_current_admin)):
+    """Current Sentry sampling policy and how many transactions it sent, by reason"""
+    return tracing.policy.snapshot()
+
+@router.post("/sentry/sampling")
+async def update_sentry_sampling(body: SamplingUpdate, admin=Depends(get_current_admin)):
+    """Change the sampling policy of this worker at runtime (fields left out are unchanged)"""
+    try:
+        tracing.policy.update(**body.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return tracing.policy.snapshot()
+
+class ProfileRequest(BaseModel):
+    bot_id: int = None
+    group_id: int = None
+    count: int = 5
+    minutes: float = 30
+
+@router.get("/profiling")
+async def profiling_status(admin=Depends(get_current_admin)):
+    """Armed per-update profiling targets and the dumps written so far"""
+    return request_profiler.snapshot()
+
+@router.post("/profiling")
+async def arm_profiling(body: ProfileRequest, admin=Depends(get_current_admin)):
+    """Profile the next `count` updates of a bot and/or group (within `minutes`)"""
+    if body.bot_id is None and body.group_id is None:
+        raise HTTPException(status_code=400, detail="bot_id or group_id is required")
+    if not 1 <= body.count <= 100:
+        raise HTTPException(status_code=400, detail="count must be between 1 and 100")
+    return request_profiler.arm(body.bot_id, body.group_id, body.count, body.minutes)
+
+@router.delete("/profiling")
+async def disarm_profiling(admin=Depends(get_current_admin)):
+    request_profiler.disarm()
+    return {"status": "success"}
+
+@router.get("/profiling/{name}")
+async def download_profile(name: str, admin=Depends(get_current_admin)):
+    path = request_profiler.dump_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=name)
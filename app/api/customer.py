@@ -2,15 +2,22 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Up
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, insert, delete
+from sqlalchemy import select, func, delete
 from pydantic import BaseModel
 import json
 
-from app.core.database import get_db
+from app.core.database import get_db, AsyncSessionLocal
+from app.core.jobs import job_registry
+from app.core.sharding import shard_coordinator
 from app.core.config import settings
 from app.models.bot import Bot
 from app.models.group import GroupConfig, GroupCategory, group_category_association
 from app.core.bot_manager import bot_manager
+from app.core.metrics import metrics
+from app.core.rate_limit import OutboundPriority
+from app.services.group_query_service import GroupQueryService
+from app.services.category_service import CategoryService
+from app.services.group_exit_service import GroupExitService
 
 router = APIRouter()
 templates = Jinja2Templates(directory="app/templates")
@@ -24,6 +31,10 @@ class CreateCategoryRequest(BaseModel):
 class AddToCategoryRequest(BaseModel):
     group_ids: list[int]
 
+class MoveCategoryRequest(BaseModel):
+    group_ids: list[int]
+    target_id: int
+
 class ExitGroupsRequest(BaseModel):
     group_ids: list[int]
 
@@ -97,37 +108,19 @@ async def logout(request: Request):
 
 @router.get("/broadcast", response_class=HTMLResponse)
 async def broadcast_page(request: Request, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
-    # Fetch groups for THIS bot only
-    stmt = select(GroupConfig).where(GroupConfig.bot_id == bot.id).order_by(GroupConfig.updated_at.desc())
-    result = await db.execute(stmt)
-    groups = result.scalars().all()
-    
-    # Fetch Categories (scoped to bot or global)
-    stmt_cat = select(GroupCategory).where((GroupCategory.bot_id == bot.id) | (GroupCategory.bot_id == None))
-    result_cat = await db.execute(stmt_cat)
-    categories = result_cat.scalars().all()
-    
-    categories_data = []
-    for cat in categories:
-        # Count groups for this bot in this category
-        stmt_c = (
-            select(func.count(GroupConfig.id))
-            .join(group_category_association, GroupConfig.id == group_category_association.c.group_config_id)
-            .where(
-                GroupConfig.bot_id == bot.id,
-                group_category_association.c.category_id == cat.id
-            )
-        )
-        count = await db.scalar(stmt_c)
-        categories_data.append({
-            "id": cat.id,
-            "name": cat.name,
-            "count": count or 0
-        })
+    # First page of THIS bot's groups; the rest is loaded via /api/groups
+    service = GroupQueryService(db)
+    page = await service.list_groups(bot_id=bot.id)
+    total = await service.count_groups(bot_id=bot.id)
+
+    # Categories (scoped to bot or global) with per-bot counts in one query
+    categories_data = await service.category_counts(bot_id=bot.id)
         
     return templates.TemplateResponse("customer/broadcast.html", {
         "request": request, 
-        "groups": groups, 
+        "groups": page["items"], 
+        "next_cursor": page["next_cursor"],
+        "total": total,
         "bot": bot,
         "categories": categories_data
     })
@@ -154,68 +147,103 @@ async def create_category(req: CreateCategoryRequest, db: AsyncSession = Depends
         await db.rollback()
         return {"success": False, "error": str(e)}
 
-@router.post("/api/category/{cat_id}/add")
-async def add_groups_to_category(cat_id: int, req: AddToCategoryRequest, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
-    # Verify category belongs to bot (or is global, but we only allow adding to bot's own categories ideally? 
-    # For now allow global too if we show them)
+async def _get_owned_category(db: AsyncSession, cat_id: int, bot: Bot):
     cat = await db.get(GroupCategory, cat_id)
     if not cat:
-        return {"success": False, "error": "分组不存在"}
-    
+        return None, "分组不存在"
     if cat.bot_id is not None and cat.bot_id != bot.id:
-        return {"success": False, "error": "无权操作此分组"}
-        
-    # Verify groups belong to bot
-    stmt = select(GroupConfig).where(GroupConfig.bot_id == bot.id, GroupConfig.group_id.in_(req.group_ids))
-    result = await db.execute(stmt)
-    groups = result.scalars().all()
-    
-    if not groups:
-         return {"success": False, "error": "无有效群组"}
-         
-    count = 0
-    for group in groups:
-        # Check if already in category
-        stmt_check = select(group_category_association).where(
-            group_category_association.c.group_config_id == group.id,
-            group_category_association.c.category_id == cat.id
+        return None, "无权操作此分组"
+    return cat, None
+
+@router.post("/api/category/{cat_id}/add")
+async def add_groups_to_category(cat_id: int, req: AddToCategoryRequest, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
+    # Global categories are shown to every bot, so adding to them is allowed too
+    cat, error = await _get_owned_category(db, cat_id, bot)
+    if error:
+        return {"success": False, "error": error}
+
+    # Single INSERT ... SELECT restricted to the bot's own groups
+    count = await CategoryService(db).add_groups(cat.id, req.group_ids, bot_id=bot.id)
+    if count == 0:
+        valid = await db.scalar(
+            select(func.count(GroupConfig.id)).where(GroupConfig.bot_id == bot.id, GroupConfig.group_id.in_(req.group_ids))
         )
-        res_check = await db.execute(stmt_check)
-        if not res_check.first():
-            stmt_ins = insert(group_category_association).values(group_config_id=group.id, category_id=cat.id)
-            await db.execute(stmt_ins)
-            count += 1
-            
-    await db.commit()
+        if not valid:
+            return {"success": False, "error": "无有效群组"}
     return {"success": True, "data": {"added": count}}
 
+@router.post("/api/category/{cat_id}/remove")
+async def remove_groups_from_category(cat_id: int, req: AddToCategoryRequest, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
+    cat, error = await _get_owned_category(db, cat_id, bot)
+    if error:
+        return {"success": False, "error": error}
+
+    count = await CategoryService(db).remove_groups(cat.id, req.group_ids, bot_id=bot.id)
+    return {"success": True, "data": {"removed": count}}
+
+@router.post("/api/category/{cat_id}/move")
+async def move_groups_to_category(cat_id: int, req: MoveCategoryRequest, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
+    cat, error = await _get_owned_category(db, cat_id, bot)
+    if error:
+        return {"success": False, "error": error}
+    target, error = await _get_owned_category(db, req.target_id, bot)
+    if error:
+        return {"success": False, "error": error}
+    if target.id == cat.id:
+        return {"success": False, "error": "目标分组与当前分组相同"}
+
+    data = await CategoryService(db).move_groups(cat.id, target.id, req.group_ids, bot_id=bot.id)
+    return {"success": True, "data": data}
+
+@router.post("/api/category/{cat_id}/replace")
+async def replace_category_groups(cat_id: int, req: AddToCategoryRequest, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
+    # Only this bot's memberships are replaced; other bots' groups in a global category stay
+    cat, error = await _get_owned_category(db, cat_id, bot)
+    if error:
+        return {"success": False, "error": error}
+
+    data = await CategoryService(db).replace_groups(cat.id, req.group_ids, bot_id=bot.id)
+    return {"success": True, "data": data}
+
 @router.post("/api/groups/exit")
 async def exit_groups(req: ExitGroupsRequest, db: AsyncSession = Depends(get_db), bot: Bot = Depends(get_current_customer_bot)):
-    # Verify groups
-    stmt = select(GroupConfig).where(GroupConfig.bot_id == bot.id, GroupConfig.group_id.in_(req.group_ids))
-    result = await db.execute(stmt)
-    groups = result.scalars().all()
-    
+    service = GroupExitService(db)
+    groups = await service.load_groups(bot.id, req.group_ids)
+
     if not groups:
         return {"success": False, "error": "No valid groups"}
-        
-    app = bot_manager.apps.get(bot.id)
-    
-    count = 0
-    for group in groups:
-        # 1. Leave Chat
-        if app:
-            try:
-                await app.bot.leave_chat(chat_id=group.group_id)
-            except Exception:
-                pass # Maybe already left
-                
-        # 2. Delete Config
-        await db.delete(group)
-        count += 1
-        
-    await db.commit()
-    return {"success": True, "data": {"removed": count}}
+
+    if len(groups) > settings.GROUP_EXIT_BACKGROUND_THRESHOLD:
+        # Large selections run in the background with their own session; poll /api/jobs/{id}
+        bot_id = bot.id
+
+        async def run(job):
+            async with AsyncSessionLocal() as session:
+                results = await GroupExitService(session).exit_groups(bot_id, groups, job=job)
+            return {"removed": len(results), "results": results}
+
+        job = job_registry.submit("group_exit", bot.id, len(groups), run)
+        return {"success": True, "data": {"job_id": job["id"], "status": job["status"], "total": len(groups)}}
+
+    results = await service.exit_groups(bot.id, groups)
+    return {"success": True, "data": {"removed": len(results), "results": results}}
+
+@router.get("/api/jobs/{job_id}")
+async def get_job_status(job_id: str, bot: Bot = Depends(get_current_customer_bot)):
+    # Sharded: the poll may reach a worker other than the one running the job
+    job = job_registry.get(job_id) or await shard_coordinator.fetch_job(job_id)
+    if not job or job["owner"] != bot.id:
+        return {"success": False, "error": "任务不存在"}
+    return {
+        "success": True,
+        "data": {
+            "status": job["status"],
+            "total": job["total"],
+            "done": job["done"],
+            "result": job["result"],
+            "error": job["error"],
+        }
+    }
 
 @router.post("/api/broadcast")
 async def customer_broadcast_api(
@@ -243,7 +271,7 @@ async def customer_broadcast_api(
     if not valid_groups:
         return {"success": False, "error": "No valid groups selected"}
 
-    app = bot_manager.apps.get(bot.id)
+    app = await bot_manager.ensure_app(bot.id)
     if not app:
         return {"success": False, "error": "Bot is not running"}
 
@@ -261,44 +289,56 @@ async def customer_broadcast_api(
         try:
             if media_bytes:
                 if content_type and content_type.startswith("video/"):
-                    await app.bot.send_video(chat_id=group.group_id, video=media_bytes, caption=text)
+                    await app.bot.send_video(chat_id=group.group_id, video=media_bytes, caption=text, rate_limit_args=OutboundPriority.BROADCAST)
                 else:
-                    await app.bot.send_photo(chat_id=group.group_id, photo=media_bytes, caption=text)
+                    await app.bot.send_photo(chat_id=group.group_id, photo=media_bytes, caption=text, rate_limit_args=OutboundPriority.BROADCAST)
             else:
-                await app.bot.send_message(chat_id=group.group_id, text=text)
+                await app.bot.send_message(chat_id=group.group_id, text=text, rate_limit_args=OutboundPriority.BROADCAST)
             success_count += 1
+            metrics.record_broadcast(bot.id, True)
         except Exception as e:
             error_count += 1
+            metrics.record_broadcast(bot.id, False)
             
     return {"success": True, "data": {"success_count": success_count, "error_count": error_count}}
 
 @router.get("/api/groups")
 async def get_customer_groups(
     category_id: int = None, 
+    q: str = None,
+    status: str = None,
+    license_status: str = None,
+    cursor: str = None,
+    limit: int = None,
     db: AsyncSession = Depends(get_db), 
     bot: Bot = Depends(get_current_customer_bot)
 ):
     """
-    Get groups filtered by category (optional) for the current bot.
+    Get one page of the current bot's groups, optionally filtered by category,
+    name/ID search, recording status and license status.
     """
-    stmt = select(GroupConfig).where(GroupConfig.bot_id == bot.id)
+    filters = {
+        "bot_id": bot.id,
+        "category_id": category_id,
+        "q": q,
+        "active": {"active": True, "inactive": False}.get(status),
+        "license_status": license_status,
+    }
+    service = GroupQueryService(db)
+    page = await service.list_groups(cursor=cursor, limit=limit, **filters)
+    # Total only on the first page; later pages keep the badge from the first response
+    total = await service.count_groups(**filters) if not cursor else None
     
-    if category_id:
-        from app.models.group import group_category_association
-        stmt = stmt.join(group_category_association).where(
-            group_category_association.c.category_id == category_id
-        )
-        
-    stmt = stmt.order_by(GroupConfig.updated_at.desc())
-    
-    result = await db.execute(stmt)
-    groups = result.scalars().all()
-    
-    return [
-        {
-            "group_id": str(g.group_id), # Ensure string for JS
-            "group_name": g.group_name or "未命名群组",
-            "is_active": g.is_active
-        }
-        for g in groups
-    ]
+    return {
+        "items": [
+            {
+                "group_id": str(g.group_id), # Ensure string for JS
+                "group_name": g.group_name or "未命名群组",
+                "is_active": g.is_active,
+                "active_start_time": g.active_start_time.strftime('%Y-%m-%d %H:%M') if g.active_start_time else None,
+            }
+            for g in page["items"]
+        ],
+        "next_cursor": page["next_cursor"],
+        "total": total,
+    }
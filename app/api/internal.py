@@ -0,0 +1,54 @@
+import secrets
+from fastapi import APIRouter, Header, HTTPException, status
+from app.core.bot_manager import bot_manager
+from app.core.jobs import job_registry
+from app.core.sharding import shard_coordinator
+from app.models.bot import Bot
+from app.core.database import AsyncSessionLocal
+from app.services.config_service import invalidate_bot_config
+
+router = APIRouter()
+
+# Worker-to-worker calls forwarded by ShardCoordinator; never exposed to users
+
+def _check_secret(secret: str | None):
+    if not secrets.compare_digest(secret or "", shard_coordinator.internal_secret):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal secret")
+
+@router.post("/bots/{bot_id}/start")
+async def start_bot(bot_id: int, x_internal_secret: str = Header(None)):
+    _check_secret(x_internal_secret)
+    async with AsyncSessionLocal() as session:
+        bot = await session.get(Bot, bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return {"success": await bot_manager.start_bot(bot.token, bot.id)}
+
+@router.post("/bots/{bot_id}/stop")
+async def stop_bot(bot_id: int, x_internal_secret: str = Header(None)):
+    _check_secret(x_internal_secret)
+    await bot_manager.stop_bot(bot_id)
+    return {"success": True}
+
+@router.post("/bots/{bot_id}/reload")
+async def reload_bot(bot_id: int, x_internal_secret: str = Header(None)):
+    _check_secret(x_internal_secret)
+    async with AsyncSessionLocal() as session:
+        bot = await session.get(Bot, bot_id)
+    if not bot:
+        raise HTTPException(status_code=404, detail="Bot not found")
+    return {"success": await bot_manager.reload_bot(bot.token, bot.id)}
+
+@router.post("/jobs/{job_id}")
+async def job_status(job_id: str, x_internal_secret: str = Header(None)):
+    _check_secret(x_internal_secret)
+    job = job_registry.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job": job}
+
+@router.post("/bots/{bot_id}/invalidate_config")
+async def invalidate_config(bot_id: int, x_internal_secret: str = Header(None)):
+    _check_secret(x_internal_secret)
+    invalidate_bot_config(bot_id)
+    return {"success": True}
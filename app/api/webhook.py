@@ -1,6 +1,9 @@
+import secrets
+import httpx
 from fastapi import APIRouter, Request, Header, HTTPException, status, BackgroundTasks
 from app.core.bot_manager import bot_manager
 from app.core.config import settings
+from app.core.sharding import shard_coordinator, FORWARDED_HEADER, INTERNAL_SECRET_HEADER
 from telegram import Update
 from loguru import logger
 
@@ -22,13 +25,38 @@ async def telegram_webhook(
         logger.warning(f"Invalid secret token for Bot {bot_id}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid Token")
 
-    # 2. Get Application
-    app = bot_manager.get_app(bot_id)
+    # 2. Hand the update to the worker that owns this bot. The forwarded marker
+    # (which makes us process locally) only counts from another worker
+    forwarded = FORWARDED_HEADER in request.headers
+    if forwarded and not secrets.compare_digest(request.headers.get(INTERNAL_SECRET_HEADER, ""), shard_coordinator.internal_secret):
+        logger.warning(f"Forwarded update for Bot {bot_id} without a valid internal secret")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid internal secret")
+    if shard_coordinator.enabled and not shard_coordinator.owns(bot_id) and not forwarded:
+        try:
+            response = await shard_coordinator.forward(
+                bot_id, request.url.path, await request.body(),
+                {"content-type": "application/json", "x-telegram-bot-api-secret-token": x_telegram_bot_api_secret_token},
+            )
+        except httpx.HTTPError as e:
+            # Owner down or restarting: a non-2xx makes Telegram redeliver the update
+            logger.warning(f"Could not forward update for Bot {bot_id} to its owner: {e!r}")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Owner worker unavailable")
+        if not response.is_success:
+            logger.warning(f"Owner of Bot {bot_id} answered a forwarded update with {response.status_code}")
+            code = response.status_code if response.status_code < 500 else status.HTTP_502_BAD_GATEWAY
+            raise HTTPException(status_code=code, detail="Forwarded update failed")
+        try:
+            return response.json()
+        except ValueError:
+            return {"status": "ok"}
+
+    # 3. Get Application (activated on demand in lazy mode)
+    app = await bot_manager.ensure_app(bot_id)
     if not app:
         logger.warning(f"Received update for unknown or stopped Bot {bot_id}")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bot not found")
 
-    # 3. Process Update
+    # 4. Process Update
     try:
         data = await request.json()
         update = Update.de_json(data, app.bot)
@@ -43,7 +71,7 @@ async def telegram_webhook(
         # but manual `process_update` usually executes handlers directly.
         
         # Standard way for webhook handler in FastAPI + PTB:
-        await app.process_update(update)
+        await bot_manager.process_update(app, update)
         
     except Exception as e:
         logger.error(f"Error processing update for Bot {bot_id}: {e}")
@@ -9,6 +9,7 @@ from .system import (
 from app.bot.handlers.transaction import (
     start_cmd, stop_cmd, handle_transaction, show_bill_cmd, clear_data_cmd, group_broadcast_menu_cmd
 )
+from app.core.log import sampled_logger
 from app.bot.handlers.otc import otc_query_cmd
 from app.bot.handlers.calculator import calculator_cmd
 from .admin import (
@@ -54,7 +55,7 @@ def setup_handlers(application: Application):
     # New Handlers
     application.add_handler(MessageHandler(filters.Regex(r"^显示账单$"), show_bill_cmd))
     application.add_handler(MessageHandler(filters.Regex(r"^清理今天数据$"), clear_data_cmd))
-    application.add_handler(MessageHandler(filters.Regex(r"^设置为(无小数|计数模式|原始模式)$"), mode_setting_cmd))
+    application.add_handler(MessageHandler(filters.Regex(r"^设置为(无小数|计数模式|原始模式|合并回复|即时回复)$"), mode_setting_cmd))
     
     # USDT Commands
     # Moving usdt_price_cmd down below
@@ -106,8 +107,7 @@ def setup_handlers(application: Application):
         if update.message:
             text = update.message.text or update.message.caption
             if text:
-                from loguru import logger
-                logger.info(f"Missed message: {text}")
+                sampled_logger.debug("Missed message: {}", text)
             
     application.add_handler(MessageHandler((filters.TEXT | filters.CAPTION) & ~filters.COMMAND, log_missed_message), group=99)
 
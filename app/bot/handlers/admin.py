@@ -1,6 +1,8 @@
 from telegram import Update
 from telegram.ext import ContextTypes
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
+from app.core.rate_limit import OutboundPriority
 from app.services.ledger_service import LedgerService
 from app.services.config_service import get_bot_button_config
 from app.services.okx_service import okx_service
@@ -252,7 +254,7 @@ async def delete_operator_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def mode_setting_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
-    设置为无小数 / 设置为计数模式 / 设置为原始模式
+    设置为无小数 / 设置为计数模式 / 设置为原始模式 / 设置为合并回复 / 设置为即时回复
     """
     text = update.message.text or update.message.caption
     bot_id = context.bot_data.get("db_id")
@@ -272,6 +274,12 @@ async def mode_setting_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         elif "原始模式" in text:
             await service.update_group_config(chat_id, bot_id, decimal_mode=True, simple_mode=False)
             await update.message.reply_text("✅ 已恢复原始模式")
+        elif "合并回复" in text:
+            await service.update_group_config(chat_id, bot_id, reply_debounce=True)
+            await update.message.reply_text(f"✅ 已开启合并回复：连续记账时，停止 {settings.REPLY_DEBOUNCE_SECONDS:g} 秒后只回复一次账单")
+        elif "即时回复" in text:
+            await service.update_group_config(chat_id, bot_id, reply_debounce=False)
+            await update.message.reply_text("✅ 已恢复即时回复：每笔记账都回复账单")
     finally:
         await session.close()
 
@@ -457,7 +465,11 @@ async def new_member_welcome(update: Update, context: ContextTypes.DEFAULT_TYPE)
         else:
             msg = build_default_group_welcome(name)
 
+        # Queued behind transaction replies when the bot is busy
+        chat_id, reply_to = update.effective_chat.id, update.message.message_id
         try:
-            await update.message.reply_text(msg, parse_mode='HTML')
+            await context.bot.send_message(chat_id, msg, parse_mode='HTML', reply_to_message_id=reply_to,
+                                           rate_limit_args=OutboundPriority.NOTIFICATION)
         except Exception:
-            await update.message.reply_text(msg)
+            await context.bot.send_message(chat_id, msg, reply_to_message_id=reply_to,
+                                           rate_limit_args=OutboundPriority.NOTIFICATION)
@@ -3,6 +3,7 @@ from telegram.ext import ContextTypes
 from loguru import logger
 from datetime import datetime
 from app.services.okx_service import okx_service
+from app.core.log import sampled_logger
 import time
 
 def format_otc_prices(prices: list, pay_method_name: str) -> str:
@@ -21,13 +22,8 @@ async def otc_query_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle: z0, z1, z2
     """
-    logger.info("otc_query_cmd triggered")
-    
-    # Debug info
-    chat_type = update.effective_chat.type
-    user_id = update.effective_user.id
-    logger.info(f"OTC query context - Chat Type: {chat_type}, User ID: {user_id}")
-    
+    sampled_logger.debug("otc_query_cmd triggered in {} chat by user {}", update.effective_chat.type, update.effective_user.id)
+
     raw_text = update.message.text or update.message.caption
     if not raw_text: return
     text = raw_text.strip().lower()
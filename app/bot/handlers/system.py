@@ -6,6 +6,7 @@ from app.core.database import AsyncSessionLocal
 from app.services.license_service import LicenseService
 from app.services.broadcast_service import BroadcastService
 from app.services.ledger_service import LedgerService
+from app.services.stats_service import stats_service
 from app.models.group import GroupConfig, TrialRequest
 from app.core.utils import to_timezone
 from app.core.config import settings
@@ -188,6 +189,7 @@ async def trial_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         session.add(new_req)
         await session.commit()
+        stats_service.adjust_pending_trials(1)
         
         await update.message.reply_text("📝 试用申请已提交！\n请等待管理员审核，审核通过后您将获得试用权限。")
         
@@ -2,13 +2,13 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKe
 from telegram.ext import ContextTypes
 from app.core.database import AsyncSessionLocal
 from app.services.ledger_service import LedgerService
-from app.services.config_service import get_bot_button_config
+from app.services.config_service import get_bot_button_config, get_bot_settings
 from app.core.config import settings
-from app.models.bot import Bot
+from app.core.log import sampled_logger
+from app.core.reply_coalescer import reply_coalescer
 from app.core.utils import to_timezone, format_number
 from app.bot.handlers.permissions import check_operator_permission
 import re
-import json
 from decimal import Decimal
 
 MANUAL_USD_RATE_PATTERN = re.compile(
@@ -25,6 +25,21 @@ def extract_manual_usd_rate(text: str | None) -> Decimal | None:
     return Decimal(match.group(1))
 
 
+def parse_transaction_line(line: str) -> tuple[str, Decimal, bool, Decimal | None] | None:
+    """
+    (type_, amount, is_usdt_amount, manual_usd_rate) for one command line such
+    as +1000, 入款1000/7.2 or 下发100u; None if the line is not a transaction.
+    """
+    line = line.strip()
+    payout_match = re.match(r"^(下发)\s*(-?\d+(\.\d+)?)(u|U)?", line)
+    if payout_match:
+        return "payout", Decimal(payout_match.group(2)), bool(payout_match.group(4)), None
+    deposit_match = re.match(r"^(\+|入款)\s*(-?\d+(\.\d+)?)", line)
+    if deposit_match:
+        return "deposit", Decimal(deposit_match.group(2)), False, extract_manual_usd_rate(line)
+    return None
+
+
 def get_record_usd_rate(record, fallback_rate: Decimal) -> Decimal:
     snapshot = getattr(record, "usd_rate_snapshot", None)
     if snapshot is None:
@@ -49,6 +64,108 @@ def get_payout_usdt_amount(record, fallback_rate: Decimal) -> Decimal:
 
     return Decimal(0)
 
+def build_transaction_reply(config, summary: dict, recent_deposits, recent_payouts, daily_records) -> str:
+    """
+    Text of the bill summary sent after each transaction. Pure: takes the group
+    config, today's summary and records, does no I/O.
+    """
+    default_usd_rate = Decimal(str(config.usd_rate or 0))
+
+    # Calculate Logic (All Decimal)
+    total_in = summary['total_deposit']
+    fee = total_in * (config.fee_percent / Decimal(100))
+    net_in = total_in - fee
+    should_pay = net_in
+    pending_pay = should_pay - summary['total_payout']
+    
+    # Construct Message
+    reply = f"入款 ({summary['count_deposit']}笔)：\n"
+    for r in recent_deposits:
+        time_str = to_timezone(r.created_at).strftime("%H:%M:%S")
+        # Format number with commas
+        val_fmt = f"{int(r.amount):,}" if not config.decimal_mode else format_number(r.amount)
+        val_str = f"<b>{val_fmt}</b>"
+
+        record_usd_rate = get_record_usd_rate(r, default_usd_rate)
+        if record_usd_rate > 0:
+            fee_multiplier = (Decimal(100) - Decimal(config.fee_percent)) / Decimal(100)
+            if fee_multiplier == Decimal(1):
+                usdt_val = r.amount / record_usd_rate
+                val_str += f"/{format_number(record_usd_rate)}={format_number(usdt_val)}"
+            else:
+                usdt_val = r.amount * fee_multiplier / record_usd_rate
+                val_str += f"*{format_number(fee_multiplier)}/{format_number(record_usd_rate)}={format_number(usdt_val)}"
+        reply += f"  {time_str} {val_str}\n"
+    reply += "\n"
+    
+    reply += f"下发 ({summary['count_payout']}笔)：\n"
+    for r in recent_payouts:
+         time_str = to_timezone(r.created_at).strftime("%H:%M:%S")
+         
+         # Check if original input was in U
+         is_u_payout = False
+         original_u_amount = None
+         if hasattr(r, 'original_text') and r.original_text:
+             pm = re.match(r"^(下发)\s*(-?\d+(\.\d+)?)(u|U)?", r.original_text)
+             if pm and pm.group(4):
+                 is_u_payout = True
+                 original_u_amount = Decimal(pm.group(2))
+         
+         if is_u_payout and original_u_amount is not None:
+             val_fmt = f"{int(original_u_amount):,}U" if not config.decimal_mode else f"{format_number(original_u_amount)}U"
+         else:
+             val_fmt = f"{int(r.amount):,}" if not config.decimal_mode else format_number(r.amount)
+             
+         reply += f"  {time_str}  <b>{val_fmt}</b>\n"
+    reply += "\n"
+
+    total_in_fmt = f"{int(total_in):,}" if not config.decimal_mode else format_number(total_in)
+    reply += f"总入款: {total_in_fmt}\n"
+    
+    # Display fee percent nicely (e.g. 7% or 5.5%)
+    fee_str = f"{int(config.fee_percent)}%" if config.fee_percent == int(config.fee_percent) else f"{config.fee_percent}%"
+    reply += f"费率: {fee_str}\n"
+    
+    usd_rates_used = {
+        get_record_usd_rate(r, default_usd_rate)
+        for r in daily_records
+        if get_record_usd_rate(r, default_usd_rate) > 0
+    }
+
+    should_pay_usdt = Decimal(0)
+    payout_usdt_total = Decimal(0)
+    fee_multiplier = (Decimal(100) - Decimal(config.fee_percent)) / Decimal(100)
+
+    for r in daily_records:
+        record_usd_rate = get_record_usd_rate(r, default_usd_rate)
+        if r.type == "deposit" and record_usd_rate > 0:
+            should_pay_usdt += Decimal(str(r.amount)) * fee_multiplier / record_usd_rate
+        elif r.type == "payout":
+            payout_usdt_total += get_payout_usdt_amount(r, default_usd_rate)
+
+    pending_pay_usdt = should_pay_usdt - payout_usdt_total
+
+    if default_usd_rate > 0:
+        reply += f"汇率: {format_number(default_usd_rate)}\n"
+    elif usd_rates_used:
+        only_rate = next(iter(usd_rates_used))
+        reply += f"汇率: {format_number(only_rate)}\n"
+
+    if usd_rates_used:
+        
+        should_pay_fmt = f"{int(should_pay):,}" if not config.decimal_mode else format_number(should_pay)
+        pending_pay_fmt = f"{int(pending_pay):,}" if not config.decimal_mode else format_number(pending_pay)
+        
+        reply += f"\n应下发: {should_pay_fmt} | {format_number(should_pay_usdt)} U\n"
+        reply += f"未下发: {pending_pay_fmt} | {format_number(pending_pay_usdt)} U\n"
+    else:
+         should_pay_fmt = f"{int(should_pay):,}" if not config.decimal_mode else format_number(should_pay)
+         pending_pay_fmt = f"{int(pending_pay):,}" if not config.decimal_mode else format_number(pending_pay)
+         reply += f"\n应下发: {should_pay_fmt}\n"
+         reply += f"未下发: {pending_pay_fmt}\n"
+
+    return reply
+
 def build_default_start_welcome() -> str:
     return """<b>╔══════✦══════╗</b>
 <b>欢迎使用本机器人</b>
@@ -59,15 +176,16 @@ async def get_service():
     session = AsyncSessionLocal()
     return LedgerService(session), session
 
+MAIN_MENU_KEYBOARD = ReplyKeyboardMarkup([
+    ["试用", "开始"],
+    ["到期时间", "详细说明书"],
+    ["自助续费", "如何设置权限人"],
+    ["如何设置群内操作人", "开启/关闭计算功能"],
+    ["群发管理"]
+], resize_keyboard=True)
+
 async def get_main_menu_keyboard():
-    keyboard = [
-        ["试用", "开始"],
-        ["到期时间", "详细说明书"],
-        ["自助续费", "如何设置权限人"],
-        ["如何设置群内操作人", "开启/关闭计算功能"],
-        ["群发管理"]
-    ]
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+    return MAIN_MENU_KEYBOARD
 
 async def group_broadcast_menu_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
@@ -156,6 +274,28 @@ async def stop_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     finally:
         await session.close()
 
+async def build_transaction_message(service: LedgerService, session, chat_id: int, bot_id: int, config) -> tuple[str, InlineKeyboardMarkup]:
+    """Bill reply text and buttons for a group after a transaction."""
+    summary = await service.get_daily_summary(chat_id, bot_id)
+    daily_records = await service.get_daily_records(chat_id, bot_id)
+    
+    recent_deposits = await service.get_recent_records(chat_id, bot_id, limit=5, record_type="deposit")
+    recent_payouts = await service.get_recent_records(chat_id, bot_id, limit=5, record_type="payout")
+    reply = build_transaction_reply(config, summary, recent_deposits, recent_payouts, daily_records)
+
+    # --- Dynamic Buttons Logic (per-bot, cached) ---
+    bot_settings = await get_bot_settings(bot_id, session)
+    return reply, bot_settings.bill_keyboard(chat_id)
+
+async def render_transaction_summary(chat_id: int, bot_id: int) -> tuple[str, InlineKeyboardMarkup]:
+    """Debounced replies are rendered after the handler's session is gone."""
+    service, session = await get_service()
+    try:
+        config = await service.get_group_config(chat_id, bot_id)
+        return await build_transaction_message(service, session, chat_id, bot_id, config)
+    finally:
+        await session.close()
+
 async def handle_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """
     Handle: +1000, 下发1000, 下发100u, 入款-100 (Correction)
@@ -163,33 +303,18 @@ async def handle_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
     text = update.message.text or update.message.caption
     if not text: return
     
-    # Debug log
-    from loguru import logger
-    logger.info(f"Transaction handler received: {text}")
+    sampled_logger.debug("Transaction handler received: {}", text)
     
     # 1. Parse Command
-    # Support "+1000", "+ 1000", "入款1000", "入款 1000"
-    # Also support implicit positive numbers if configured, but let's stick to explicit for now
-    # We need to be careful about regex. 
-    # ^\+? -> Optional plus at start? No, explicit plus is safer to avoid chatting interference.
-    
-    deposit_match = re.match(r"^(\+|入款)\s*(-?\d+(\.\d+)?)", text)
-    payout_match = re.match(r"^(下发)\s*(-?\d+(\.\d+)?)(u|U)?", text)
-    
-    # Fallback for just "+10000" without space if re.match is strict
-    if not deposit_match:
-         # Try matching just the number with + prefix
-         # This handles: "+10000", "+ 10000"
-         simple_plus_match = re.match(r"^\+\s*(\d+(\.\d+)?)", text)
-         if simple_plus_match:
-             deposit_match = simple_plus_match
-             # Adjust group index mapping if needed. 
-             # For simple_plus_match: group(1) is the amount.
-             # We need to normalize how we extract amount below.
-    
-    if not (deposit_match or payout_match or (text.strip().startswith('+') and text.strip()[1:].replace('.', '', 1).isdigit())):
-        logger.info(f"Ignored message: {text}")
+    # Support "+1000", "+ 1000", "入款1000", "入款 1000", "+1000/7.2", "下发100u".
+    # Only explicit prefixes count, to avoid chatting interference. A message
+    # whose lines are all commands is a batch: one INSERT, one commit, one reply.
+    lines = [line for line in text.splitlines() if line.strip()]
+    parsed = [parse_transaction_line(line) for line in lines]
+    if not parsed or parsed[0] is None:
+        sampled_logger.debug("Ignored message: {}", text)
         return
+    is_batch = sum(p is not None for p in parsed) > 1
 
     bot_id = context.bot_data.get("db_id")
     chat_id = update.effective_chat.id
@@ -205,182 +330,40 @@ async def handle_transaction(update: Update, context: ContextTypes.DEFAULT_TYPE)
         if not await service.is_group_active(chat_id, bot_id):
             return # Silent return for inactive group
 
-        type_ = "deposit"
-        amount = Decimal(0)
-        is_usdt_amount = False
-        
-        if payout_match:
-            type_ = "payout"
-            amount = Decimal(payout_match.group(2))
-            if payout_match.group(4): # 'u' suffix
-                is_usdt_amount = True
-        elif deposit_match:
-            type_ = "deposit"
-            # If matched by main regex: group(2) is amount
-            # If matched by simple_plus_match: group(1) is amount
-            # Let's unify extraction.
-            if len(deposit_match.groups()) >= 2 and deposit_match.group(2):
-                 amount = Decimal(deposit_match.group(2))
-            else:
-                 # Fallback extraction
-                 amount_str = re.search(r"(-?\d+(\.\d+)?)", text).group(0)
-                 amount = Decimal(amount_str)
+        if is_batch:
+            invalid = [f"第{i}行: {line.strip()}" for i, (line, p) in enumerate(zip(lines, parsed), start=1) if p is None]
+            if invalid:
+                await update.message.reply_text("⚠️ 以下行无法识别，本次未记账：\n" + "\n".join(invalid))
+                return
+            commands = list(zip((line.strip() for line in lines), parsed))
         else:
-             # Fallback simple + case
-             amount_str = text.strip().replace('+', '').strip()
-             amount = Decimal(amount_str)
-             type_ = "deposit"
+            # Single command: anything after the first line is a note, kept in original_text
+            commands = [(text, parsed[0])]
             
         # Get Config (and update group name)
         group_title = update.effective_chat.title
         config = await service.get_group_config(chat_id, bot_id, group_name=group_title)
         default_usd_rate = Decimal(str(config.usd_rate or 0))
-        manual_usd_rate = extract_manual_usd_rate(text) if type_ == "deposit" else None
-        effective_usd_rate = manual_usd_rate or default_usd_rate
-        
-        if is_usdt_amount:
-            if effective_usd_rate <= 0:
-                await update.message.reply_text("⚠️ 未设置美元汇率，无法使用 U 结算")
-                return
-            amount = amount * effective_usd_rate
+
+        entries = []
+        for original_text, (type_, amount, is_usdt_amount, manual_usd_rate) in commands:
+            effective_usd_rate = manual_usd_rate or default_usd_rate
+            if is_usdt_amount:
+                if effective_usd_rate <= 0:
+                    await update.message.reply_text("⚠️ 未设置美元汇率，无法使用 U 结算")
+                    return
+                amount = amount * effective_usd_rate
+            entries.append((type_, amount, original_text, effective_usd_rate))
             
         # Record
-        await service.record_transaction(
-            bot_id,
-            chat_id,
-            type_,
-            amount,
-            user.id,
-            user.full_name,
-            text,
-            usd_rate_snapshot=effective_usd_rate,
-        )
+        await service.record_transactions(bot_id, chat_id, entries, user.id, user.full_name)
         
-        # Reply with summary
-        summary = await service.get_daily_summary(chat_id, bot_id)
-        daily_records = await service.get_daily_records(chat_id, bot_id)
-        
-        # Calculate Logic (All Decimal)
-        total_in = summary['total_deposit']
-        fee = total_in * (config.fee_percent / Decimal(100))
-        net_in = total_in - fee
-        should_pay = net_in
-        pending_pay = should_pay - summary['total_payout']
-        
-        # Construct Message
-        reply = f"入款 ({summary['count_deposit']}笔)：\n"
-        recent_deposits = await service.get_recent_records(chat_id, bot_id, limit=5, record_type="deposit")
-        for r in recent_deposits:
-            time_str = to_timezone(r.created_at).strftime("%H:%M:%S")
-            # Format number with commas
-            val_fmt = f"{int(r.amount):,}" if not config.decimal_mode else format_number(r.amount)
-            val_str = f"<b>{val_fmt}</b>"
-
-            record_usd_rate = get_record_usd_rate(r, default_usd_rate)
-            if record_usd_rate > 0:
-                fee_multiplier = (Decimal(100) - Decimal(config.fee_percent)) / Decimal(100)
-                if fee_multiplier == Decimal(1):
-                    usdt_val = r.amount / record_usd_rate
-                    val_str += f"/{format_number(record_usd_rate)}={format_number(usdt_val)}"
-                else:
-                    usdt_val = r.amount * fee_multiplier / record_usd_rate
-                    val_str += f"*{format_number(fee_multiplier)}/{format_number(record_usd_rate)}={format_number(usdt_val)}"
-            reply += f"  {time_str} {val_str}\n"
-        reply += "\n"
-        
-        reply += f"下发 ({summary['count_payout']}笔)：\n"
-        recent_payouts = await service.get_recent_records(chat_id, bot_id, limit=5, record_type="payout")
-        for r in recent_payouts:
-             time_str = to_timezone(r.created_at).strftime("%H:%M:%S")
-             
-             # Check if original input was in U
-             is_u_payout = False
-             original_u_amount = None
-             if hasattr(r, 'original_text') and r.original_text:
-                 pm = re.match(r"^(下发)\s*(-?\d+(\.\d+)?)(u|U)?", r.original_text)
-                 if pm and pm.group(4):
-                     is_u_payout = True
-                     original_u_amount = Decimal(pm.group(2))
-             
-             if is_u_payout and original_u_amount is not None:
-                 val_fmt = f"{int(original_u_amount):,}U" if not config.decimal_mode else f"{format_number(original_u_amount)}U"
-             else:
-                 val_fmt = f"{int(r.amount):,}" if not config.decimal_mode else format_number(r.amount)
-                 
-             reply += f"  {time_str}  <b>{val_fmt}</b>\n"
-        reply += "\n"
-
-        total_in_fmt = f"{int(total_in):,}" if not config.decimal_mode else format_number(total_in)
-        reply += f"总入款: {total_in_fmt}\n"
-        
-        # Display fee percent nicely (e.g. 7% or 5.5%)
-        fee_str = f"{int(config.fee_percent)}%" if config.fee_percent == int(config.fee_percent) else f"{config.fee_percent}%"
-        reply += f"费率: {fee_str}\n"
-        
-        usd_rates_used = {
-            get_record_usd_rate(r, default_usd_rate)
-            for r in daily_records
-            if get_record_usd_rate(r, default_usd_rate) > 0
-        }
-
-        should_pay_usdt = Decimal(0)
-        payout_usdt_total = Decimal(0)
-        fee_multiplier = (Decimal(100) - Decimal(config.fee_percent)) / Decimal(100)
-
-        for r in daily_records:
-            record_usd_rate = get_record_usd_rate(r, default_usd_rate)
-            if r.type == "deposit" and record_usd_rate > 0:
-                should_pay_usdt += Decimal(str(r.amount)) * fee_multiplier / record_usd_rate
-            elif r.type == "payout":
-                payout_usdt_total += get_payout_usdt_amount(r, default_usd_rate)
-
-        pending_pay_usdt = should_pay_usdt - payout_usdt_total
-
-        if default_usd_rate > 0:
-            reply += f"汇率: {format_number(default_usd_rate)}\n"
-        elif usd_rates_used:
-            only_rate = next(iter(usd_rates_used))
-            reply += f"汇率: {format_number(only_rate)}\n"
-
-        if usd_rates_used:
-            
-            should_pay_fmt = f"{int(should_pay):,}" if not config.decimal_mode else format_number(should_pay)
-            pending_pay_fmt = f"{int(pending_pay):,}" if not config.decimal_mode else format_number(pending_pay)
-            
-            reply += f"\n应下发: {should_pay_fmt} | {format_number(should_pay_usdt)} U\n"
-            reply += f"未下发: {pending_pay_fmt} | {format_number(pending_pay_usdt)} U\n"
-        else:
-             should_pay_fmt = f"{int(should_pay):,}" if not config.decimal_mode else format_number(should_pay)
-             pending_pay_fmt = f"{int(pending_pay):,}" if not config.decimal_mode else format_number(pending_pay)
-             reply += f"\n应下发: {should_pay_fmt}\n"
-             reply += f"未下发: {pending_pay_fmt}\n"
-
-        # --- Dynamic Buttons Logic ---
-        # Fetch Bot Config
-        bot = await session.get(Bot, bot_id)
-        btn_config = {}
-        if bot and bot.button_config:
-            try:
-                btn_config = json.loads(bot.button_config)
-            except:
-                pass
-        
-        # Defaults
-        bill_text = btn_config.get("bill_text") or "点击跳转完整账单"
-        biz_text = btn_config.get("biz_text") or "业务对接"
-        biz_url = btn_config.get("biz_url") or "https://t.me/"
-        complaint_text = btn_config.get("complaint_text") or "投诉建议"
-        complaint_url = btn_config.get("complaint_url") or "https://t.me/"
-        support_text = btn_config.get("support_text") or "24小时客服"
-        support_url = btn_config.get("support_url") or "https://t.me/"
-        
-        kb = [
-            [InlineKeyboardButton(bill_text, url=f"http://{settings.DOMAIN}/bill/{chat_id}")],
-            [InlineKeyboardButton(biz_text, url=biz_url), InlineKeyboardButton(complaint_text, url=complaint_url)],
-            [InlineKeyboardButton(support_text, url=support_url)]
-        ]
-        
-        await update.message.reply_text(reply, parse_mode='HTML', reply_markup=InlineKeyboardMarkup(kb))
+        # Reply with summary (合并回复 groups: one debounced reply per burst)
+        if config.reply_debounce:
+            reply_coalescer.schedule(context.bot, bot_id, chat_id, lambda: render_transaction_summary(chat_id, bot_id))
+            return
+        reply, markup = await build_transaction_message(service, session, chat_id, bot_id, config)
+        await update.message.reply_text(reply, parse_mode='HTML', reply_markup=markup)
         
     finally:
         await session.close()
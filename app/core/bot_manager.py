@@ -1,12 +1,63 @@
 import asyncio
+import time
 from typing import Dict
-from telegram import Update
-from telegram.ext import Application
-from telegram.error import InvalidToken
+from sqlalchemy import select, update
+from telegram import Update, User
+from telegram.ext import Application, ExtBot, TypeHandler
+from telegram.error import InvalidToken, TelegramError
 from loguru import logger
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.bot import Bot
+from app.core.rate_limit import OutboundGovernor
+from app.core.telegram_http import telegram_http
+from app.core.polling import polling_supervisor
+from app.core.sharding import shard_coordinator
+from app.core.health import bot_health
+from app.core.metrics import metrics
+from app.core.tracing import tracing
+from app.core.profiling import request_profiler
 from app.bot.handlers import setup_handlers
 
+class CachedInfoBot(ExtBot):
+    """
+    ExtBot whose first get_me() (issued by initialize()) is answered from the
+    bot info stored in the DB, so a lazily activated bot needs no network round
+    trip before handling its first update.
+    """
+
+    def __init__(self, *args, bot_info: User = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_bot_info = bot_info
+
+    async def get_me(self, *args, **kwargs) -> User:
+        if self._cached_bot_info is not None:
+            self._bot_user, self._cached_bot_info = self._cached_bot_info, None
+            return self._bot_user
+        return await super().get_me(*args, **kwargs)
+
+
+class BotApplication(Application):
+    """
+    Application that binds bot_id/chat_id/update_id to every log line of an
+    update (app/core/log.py) and wraps it in a Sentry transaction and, when
+    armed, a cProfile dump (see app/core/tracing.py and app/core/profiling.py).
+    """
+
+    async def process_update(self, update: object) -> None:
+        bot_db_id = self.bot_data.get("db_id")
+        if isinstance(update, Update):
+            chat = update.effective_chat
+            chat_id, update_id = (chat.id if chat else None), update.update_id
+        else:
+            chat_id = update_id = None
+        with logger.contextualize(bot_id=bot_db_id, chat_id=chat_id, update_id=update_id):
+            if not tracing.enabled and not request_profiler.targets:
+                return await super().process_update(update)
+            with tracing.update_transaction(bot_db_id, chat_id), request_profiler.profile(bot_db_id, chat_id):
+                return await super().process_update(update)
+
+
 class BotManager:
     _instance = None
     
@@ -14,6 +65,12 @@ class BotManager:
         if cls._instance is None:
             cls._instance = super(BotManager, cls).__new__(cls)
             cls._instance.apps: Dict[int, Application] = {}
+            cls._instance.last_activity: Dict[int, float] = {}
+            cls._instance._activation_locks: Dict[int, asyncio.Lock] = {}
+            # Apps built only to send on behalf of bots owned by another shard worker
+            cls._instance.send_only: set = set()
+            # Webhook updates being processed, per Application (id), so reloads can drain
+            cls._instance._inflight: Dict[int, int] = {}
         return cls._instance
 
     async def start_bot(self, token: str, bot_db_id: int) -> bool:
@@ -21,41 +78,39 @@ class BotManager:
         Dynamically start a bot.
         """
         try:
+            if bot_db_id in self.send_only:
+                # Ownership moved to this worker: replace the send-only copy
+                await self.stop_bot(bot_db_id, release_webhook=False)
             if bot_db_id in self.apps:
                 logger.warning(f"Bot {bot_db_id} already running.")
                 return True
 
-            app = Application.builder().token(token).build()
-            setup_handlers(app)
+            app = self._build_app(token, bot_db_id)
             
             await app.initialize()
-            app.bot_data["db_id"] = bot_db_id
             await app.start()
             
             # Verify Token & Get Info
             bot_info = await app.bot.get_me()
             logger.info(f"Started Bot: {bot_info.username} (ID: {bot_info.id})")
+            await self._save_bot_info(bot_db_id, bot_info)
 
             # Setup Webhook or Polling
             if settings.TG_MODE == "webhook":
-                webhook_url = f"https://{settings.DOMAIN}/telegram/webhook/{bot_db_id}"
-                secret_token = f"secret_{bot_db_id}_{settings.SECRET_KEY}"[:32].replace("-", "") 
-                
-                await app.bot.set_webhook(
-                    url=webhook_url,
-                    secret_token=secret_token,
-                    allowed_updates=Update.ALL_TYPES
-                )
-                logger.info(f"Webhook set to {webhook_url}")
+                await self._set_webhook(app, bot_db_id)
+            elif self.supervised_polling:
+                await polling_supervisor.register(bot_db_id, app)
+                logger.info("Polling started (supervised)")
             else:
                 # Polling mode: Run updater.start_polling() in a task to avoid blocking
                 # Important: In multi-bot setup, we can't block here.
                 # 'app.updater.start_polling()' is usually non-blocking if we don't await 'idle()'
                 # But let's be explicit.
-                await app.updater.start_polling() 
+                await app.updater.start_polling(error_callback=self._polling_error_callback(bot_db_id))
                 logger.info("Polling started")
 
             self.apps[bot_db_id] = app
+            self.last_activity[bot_db_id] = time.monotonic()
             return True
 
         except Exception as e:
@@ -78,23 +133,296 @@ class BotManager:
         
         logger.info(f"Parallel startup finished. Success: {success_count}/{len(bots)}")
 
-    async def stop_bot(self, bot_db_id: int):
-        # ... (Same as before)
+    async def _set_webhook(self, app: Application, bot_db_id: int):
+        webhook_url = f"https://{settings.DOMAIN}/telegram/webhook/{bot_db_id}"
+        secret_token = f"secret_{bot_db_id}_{settings.SECRET_KEY}"[:32].replace("-", "")
+
+        await app.bot.set_webhook(
+            url=webhook_url,
+            secret_token=secret_token,
+            allowed_updates=Update.ALL_TYPES
+        )
+        logger.info(f"Webhook set to {webhook_url}")
+
+    def _build_app(self, token: str, bot_db_id: int, bot_info: User = None) -> Application:
+        request_kwargs = telegram_http.bot_request_kwargs(bot_db_id)
+        rate_limiter = OutboundGovernor(bot_db_id)
+        if bot_info is not None:
+            builder = Application.builder().bot(
+                CachedInfoBot(token=token, bot_info=bot_info, rate_limiter=rate_limiter, **request_kwargs)
+            )
+        else:
+            builder = Application.builder().token(token).rate_limiter(rate_limiter)
+            for name, value in request_kwargs.items():
+                builder = getattr(builder, name)(value)
+        if self.supervised_polling:
+            # Updates are fed by the polling supervisor
+            builder = builder.updater(None)
+        app = builder.application_class(BotApplication).build()
+        setup_handlers(app)
+        metrics.instrument_handlers(app)
+        # Ahead of the license middleware (group -1) so every update is counted
+        app.add_handler(TypeHandler(Update, self._track_update), group=-2)
+        app.add_error_handler(self._on_error)
+        app.bot_data["db_id"] = bot_db_id
+        return app
+
+    @staticmethod
+    async def _track_update(update: Update, context):
+        bot_health.record_update(context.bot_data["db_id"])
+        metrics.record_update(context.bot_data["db_id"])
+
+    @staticmethod
+    async def _on_error(update, context):
+        bot_db_id = context.bot_data.get("db_id")
+        bot_health.record_error(bot_db_id, context.error)
+        tracing.mark_error()
+        logger.opt(exception=context.error).error(f"Error handling update for bot {bot_db_id}: {context.error}")
+
+    @staticmethod
+    def _polling_error_callback(bot_db_id: int):
+        def callback(error):
+            bot_health.record_error(bot_db_id, error, polling=True)
+            logger.warning(f"getUpdates failed for bot {bot_db_id}: {error}")
+        return callback
+
+    async def _save_bot_info(self, bot_db_id: int, bot_info: User):
+        """Cache get_me() in the DB so lazy activation can skip it."""
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    update(Bot).where(Bot.id == bot_db_id).values(
+                        tg_user_id=bot_info.id,
+                        tg_username=bot_info.username,
+                        tg_first_name=bot_info.first_name,
+                    )
+                )
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to cache bot info for {bot_db_id}: {e}")
+
+    @property
+    def supervised_polling(self) -> bool:
+        return settings.TG_MODE != "webhook" and settings.POLLING_SUPERVISOR
+
+    @property
+    def lazy(self) -> bool:
+        # Lazy activation needs webhooks: a polling bot must be running to receive anything
+        return settings.BOT_LAZY_START and settings.TG_MODE == "webhook"
+
+    async def ensure_app(self, bot_db_id: int) -> Application | None:
+        """
+        Return the running Application for a bot, activating it on demand in lazy
+        mode. Returns None for unknown or disabled bots (or stopped ones in eager mode).
+        Bots owned by another shard worker get a local send-only app (no updates).
+        """
+        app = self.apps.get(bot_db_id)
+        owned = shard_coordinator.owns(bot_db_id)
+        if app is None and (self.lazy or not owned):
+            lock = self._activation_locks.setdefault(bot_db_id, asyncio.Lock())
+            async with lock:
+                app = self.apps.get(bot_db_id)
+                if app is None:
+                    app = await self._activate(bot_db_id)
+                    if app is not None and not owned:
+                        self.send_only.add(bot_db_id)
+        if app is not None:
+            self.last_activity[bot_db_id] = time.monotonic()
+        return app
+
+    async def _activate(self, bot_db_id: int) -> Application | None:
+        """
+        Lazy cold start: build and start the Application from the DB row. The
+        webhook is already registered with Telegram, so it is not set again.
+        """
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Bot.token, Bot.tg_user_id, Bot.tg_username, Bot.tg_first_name)
+                .where(Bot.id == bot_db_id, Bot.status == "active")
+            )
+            row = result.first()
+        if row is None:
+            return None
+
+        bot_info = None
+        if row.tg_user_id:
+            bot_info = User(id=row.tg_user_id, first_name=row.tg_first_name or "", is_bot=True, username=row.tg_username)
+
+        try:
+            app = self._build_app(row.token, bot_db_id, bot_info)
+            await app.initialize()
+            await app.start()
+        except Exception as e:
+            logger.error(f"Failed to activate bot {bot_db_id}: {e}")
+            return None
+
+        if bot_info is None:
+            await self._save_bot_info(bot_db_id, app.bot.bot)
+
+        self.apps[bot_db_id] = app
+        logger.info(f"Activated Bot {bot_db_id} on demand in {(time.perf_counter() - started) * 1000:.1f}ms")
+        return app
+
+    async def evict_idle(self, idle_seconds: int = None) -> int:
+        """
+        Shut down lazily started (or send-only) apps that have had no traffic for
+        `idle_seconds`. The webhook stays registered, so the next update
+        re-activates the bot.
+        """
+        if not self.lazy and not self.send_only:
+            return 0
+        idle_seconds = idle_seconds if idle_seconds is not None else settings.BOT_IDLE_EVICT_SECONDS
+        cutoff = time.monotonic() - idle_seconds
+        evicted = 0
+        for bot_db_id, last_seen in list(self.last_activity.items()):
+            if last_seen > cutoff or not (self.lazy or bot_db_id in self.send_only):
+                continue
+            lock = self._activation_locks.setdefault(bot_db_id, asyncio.Lock())
+            async with lock:
+                app = self.apps.pop(bot_db_id, None)
+                self.last_activity.pop(bot_db_id, None)
+                self.send_only.discard(bot_db_id)
+                bot_health.forget(bot_db_id)
+                if app is None:
+                    continue
+                try:
+                    await app.stop()
+                    await app.shutdown()
+                except Exception as e:
+                    logger.warning(f"Error evicting bot {bot_db_id}: {e}")
+                evicted += 1
+        if evicted:
+            logger.info(f"Evicted {evicted} idle bots")
+        return evicted
+
+    async def stop_bot(self, bot_db_id: int, release_webhook: bool = True):
+        """
+        Stop a bot. `release_webhook=False` keeps its webhook registered, for when
+        the bot keeps running elsewhere (shard handoff, worker shutdown).
+        """
+        self.last_activity.pop(bot_db_id, None)
+        bot_health.forget(bot_db_id)
         if bot_db_id in self.apps:
             app = self.apps[bot_db_id]
-            if settings.TG_MODE == "webhook":
-                await app.bot.delete_webhook()
-            else:
+            if bot_db_id in self.send_only:
+                self.send_only.discard(bot_db_id)
+            elif settings.TG_MODE == "webhook":
+                if release_webhook:
+                    await app.bot.delete_webhook()
+            elif self.supervised_polling:
+                await polling_supervisor.unregister(bot_db_id)
+            elif app.updater.running:
                 await app.updater.stop()
-            await app.stop()
+            if app.running:
+                await app.stop()
             await app.shutdown()
             del self.apps[bot_db_id]
             logger.info(f"Stopped Bot {bot_db_id}")
 
-    # ... (reload_bot, get_app remain same) ...
-    async def reload_bot(self, token: str, bot_db_id: int):
-        await self.stop_bot(bot_db_id)
-        await self.start_bot(token, bot_db_id)
+    async def process_update(self, app: Application, update: Update):
+        """Process a webhook update, counted so `reload_bot` can drain the old app."""
+        key = id(app)
+        self._inflight[key] = self._inflight.get(key, 0) + 1
+        try:
+            await app.process_update(update)
+        finally:
+            self._inflight[key] -= 1
+            if not self._inflight[key]:
+                del self._inflight[key]
+
+    def inflight_updates(self) -> int:
+        return sum(self._inflight.values())
+
+    async def _drain(self, app: Application, timeout: float = 10.0):
+        deadline = time.monotonic() + timeout
+        while self._inflight.get(id(app)) and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+
+    async def _discard(self, app: Application):
+        try:
+            if app.running:
+                await app.stop()
+            await app.shutdown()
+        except Exception as e:
+            logger.warning(f"Failed to shut down discarded app: {e}")
+
+    async def reload_bot(self, token: str, bot_db_id: int) -> bool:
+        """
+        Hot-swap a bot (token change or config reload) without refusing updates.
+
+        The new Application is built and started first; only then is the `apps`
+        entry switched, so webhook requests always find a running app. The old
+        app finishes its in-flight updates before it is shut down. The webhook is
+        re-registered only when the token changed. If the new app fails to
+        start, the old one keeps running and False is returned.
+        """
+        old = self.apps.get(bot_db_id)
+        if old is None:
+            return await self.start_bot(token, bot_db_id)
+        if bot_db_id in self.send_only:
+            # Rebuilt with the new token on next use; the owner does the real reload
+            await self.stop_bot(bot_db_id, release_webhook=False)
+            return True
+
+        token_changed = old.bot.token != token
+        lock = self._activation_locks.setdefault(bot_db_id, asyncio.Lock())
+        async with lock:
+            new = self._build_app(token, bot_db_id)
+            try:
+                await new.initialize()
+                await new.start()
+                if settings.TG_MODE == "webhook" and token_changed:
+                    await self._set_webhook(new, bot_db_id)
+            except Exception as e:
+                logger.error(f"Failed to reload bot {bot_db_id}, keeping the running instance: {e}")
+                await self._discard(new)
+                return False
+            await self._save_bot_info(bot_db_id, new.bot.bot)
+
+            if settings.TG_MODE == "webhook":
+                self.apps[bot_db_id] = new
+            elif self.supervised_polling:
+                self.apps[bot_db_id] = new
+                await polling_supervisor.swap(bot_db_id, new, keep_offset=not token_changed)
+            else:
+                # One getUpdates per token: the old updater confirms its offset on stop
+                if old.updater.running:
+                    await old.updater.stop()
+                self.apps[bot_db_id] = new
+                await new.updater.start_polling(error_callback=self._polling_error_callback(bot_db_id))
+            self.last_activity[bot_db_id] = time.monotonic()
+
+        await self._drain(old)
+        if settings.TG_MODE == "webhook" and token_changed:
+            try:
+                await old.bot.delete_webhook()
+            except TelegramError as e:
+                logger.warning(f"Failed to remove webhook of the old token for bot {bot_db_id}: {e}")
+        await self._discard(old)
+        logger.info(f"Reloaded Bot {bot_db_id}{' with new token' if token_changed else ''}")
+        return True
+
+    async def restart_bot(self, bot_db_id: int) -> bool | None:
+        """
+        Restart one bot from its DB row (health supervisor). Webhook bots are
+        hot-swapped; polling bots are stopped first since only one getUpdates may
+        run per token. Returns None (after stopping it) if the bot is no longer active.
+        """
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(select(Bot.token).where(Bot.id == bot_db_id, Bot.status == "active"))
+            token = result.scalar()
+        if token is None:
+            await self.stop_bot(bot_db_id, release_webhook=False)
+            return None
+        if settings.TG_MODE == "webhook" and bot_db_id in self.apps and self.apps[bot_db_id].running:
+            return await self.reload_bot(token, bot_db_id)
+        try:
+            await self.stop_bot(bot_db_id, release_webhook=False)
+        except Exception as e:
+            logger.warning(f"Failed to stop bot {bot_db_id} cleanly before restart: {e}")
+            self.apps.pop(bot_db_id, None)
+        return await self.start_bot(token, bot_db_id)
 
     def get_app(self, bot_db_id: int) -> Application:
         return self.apps.get(bot_db_id)
@@ -1,31 +1,38 @@
 import redis.asyncio as redis
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.cache_codec import RowCodec
+from app.models.group import GroupConfig
 import json
 from loguru import logger
 import asyncio
+import random
 import time
 from decimal import Decimal
 
-class CacheEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super().default(obj)
+# Group configs are cached in a compact binary form (exact Decimals and
+# datetimes); see app/core/cache_codec.py
+group_config_codec = RowCodec(GroupConfig.__table__)
+
+# Cached for group ids with no GroupConfig row. Decodes to {}, which callers
+# testing `if cached:` already treat as a miss.
+MISSING_GROUP_CONFIG = b"{}"
 
 class CacheService:
     def __init__(self):
         self.redis = None
         self.enabled = False
-        self.ttl = 300 # 5 minutes default
+        self.ttl = settings.CACHE_TTL_SECONDS
         self._last_connect_attempt = 0
         self._retry_interval = 60  # Retry every 60 seconds
+        self._inflight: dict[str, asyncio.Future] = {}
 
         if settings.REDIS_URL:
             self._init_redis()
     
     def _init_redis(self):
         try:
-            self.redis = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+            self.redis = redis.from_url(settings.REDIS_URL, decode_responses=False)
             self.enabled = True
             logger.info("Redis initialized successfully")
         except Exception as e:
@@ -44,7 +51,7 @@ class CacheService:
         self._last_connect_attempt = now
         try:
             if not self.redis:
-                self.redis = redis.from_url(settings.REDIS_URL, encoding="utf-8", decode_responses=True)
+                self.redis = redis.from_url(settings.REDIS_URL, decode_responses=False)
             
             await self.redis.ping()
             self.enabled = True
@@ -55,16 +62,34 @@ class CacheService:
             self.enabled = False
             return False
 
+    @staticmethod
+    def _jittered(ttl: int) -> int:
+        return ttl + int(random.random() * ttl * settings.CACHE_TTL_JITTER)
+
+    @staticmethod
+    def _group_config_key(group_id: int, bot_id: int) -> str:
+        return f"group_config:{bot_id}:{group_id}"
+
+    @staticmethod
+    def _load_group_config(data: bytes) -> dict | None:
+        # JSON entries written before the binary codec (and the missing marker)
+        # start with "{"; binary entries from another schema decode to None
+        if data[:1] == b"{":
+            return json.loads(data, parse_float=Decimal)
+        return group_config_codec.decode(data)
+
     async def get_group_config(self, group_id: int, bot_id: int):
         if not self.enabled:
             if not await self._ensure_connection():
                 return None
             
-        key = f"group_config:{bot_id}:{group_id}"
+        key = self._group_config_key(group_id, bot_id)
         try:
-            data = await self.redis.get(key)
-            if data:
-                return json.loads(data, parse_float=Decimal)
+            with metrics.redis_timer("get"):
+                data = await self.redis.get(key)
+            config = self._load_group_config(data) if data else None
+            metrics.record_cache("group_config", config is not None, negative=data == MISSING_GROUP_CONFIG)
+            return config
         except Exception as e:
             # If connection refused, disable cache to avoid spam
             if "Connection refused" in str(e) or "Error 61" in str(e):
@@ -78,25 +103,84 @@ class CacheService:
         if not self.enabled:
             return
 
-        key = f"group_config:{bot_id}:{group_id}"
+        key = self._group_config_key(group_id, bot_id)
         try:
-            # Filter out non-serializable fields (like datetime) before caching
-            serializable = {k: str(v) if k in ['created_at', 'updated_at', 'active_start_time', 'expire_at'] and v else v 
-                           for k, v in config_dict.items()}
-            
-            await self.redis.setex(key, self.ttl, json.dumps(serializable, cls=CacheEncoder))
+            with metrics.redis_timer("setex"):
+                await self.redis.setex(key, self._jittered(self.ttl), group_config_codec.encode(config_dict))
         except Exception as e:
             if "Connection refused" in str(e) or "Error 61" in str(e):
                 self.enabled = False
             logger.error(f"Redis set error: {e}")
 
+    async def get_group_configs(self, bot_id: int, group_ids: list[int]) -> dict[int, dict]:
+        """
+        Cached configs of several groups of one bot in one MGET. Misses are left
+        out; groups cached as missing map to {}.
+        """
+        values = await self._mget([self._group_config_key(group_id, bot_id) for group_id in group_ids], "group_config", self._load_group_config)
+        return {group_id: value for group_id, value in zip(group_ids, values) if value is not None}
+
+    async def set_group_configs(self, bot_id: int, configs: dict[int, dict]):
+        """Cache several group configs of one bot in one pipelined round trip."""
+        await self._setex_many({self._group_config_key(group_id, bot_id): group_config_codec.encode(config_dict)
+                                for group_id, config_dict in configs.items()}, self.ttl)
+
+    async def set_missing_group_configs(self, bot_id: int, group_ids: list[int]):
+        """Remember for CACHE_NEGATIVE_TTL that these groups have no config."""
+        await self._setex_many({self._group_config_key(group_id, bot_id): MISSING_GROUP_CONFIG for group_id in group_ids},
+                               settings.CACHE_NEGATIVE_TTL)
+
+    async def single_flight(self, key: str, loader, cache: str = "group_config"):
+        """
+        Run `loader()` for `key` once at a time: callers arriving while a load
+        for the same key is in flight await its result (or exception) instead of
+        loading again. Keeps an expired hot entry from sending every concurrent
+        miss to the DB.
+        """
+        future = self._inflight.get(key)
+        if future is not None:
+            metrics.record_stampede_avoided(cache)
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Retrieved here so an unawaited future doesn't warn
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
     async def invalidate_group_config(self, group_id: int, bot_id: int):
         if not self.enabled:
             return
 
-        key = f"group_config:{bot_id}:{group_id}"
+        key = self._group_config_key(group_id, bot_id)
         try:
-            await self.redis.delete(key)
+            with metrics.redis_timer("delete"):
+                await self.redis.delete(key)
+        except Exception as e:
+            if "Connection refused" in str(e) or "Error 61" in str(e):
+                self.enabled = False
+            logger.error(f"Redis delete error: {e}")
+
+    async def invalidate_group_configs(self, bot_id: int, group_ids: list[int]):
+        if not self.enabled or not group_ids:
+            return
+
+        # One multi-key DEL: a single round trip however many groups
+        keys = [self._group_config_key(group_id, bot_id) for group_id in group_ids]
+        try:
+            with metrics.redis_timer("delete"):
+                await self.redis.delete(*keys)
         except Exception as e:
             if "Connection refused" in str(e) or "Error 61" in str(e):
                 self.enabled = False
@@ -107,7 +191,9 @@ class CacheService:
             if not await self._ensure_connection():
                 return None
         try:
-            data = await self.redis.get(key)
+            with metrics.redis_timer("get"):
+                data = await self.redis.get(key)
+            metrics.record_cache("kv", bool(data))
             if data:
                 return json.loads(data)
         except Exception as e:
@@ -118,8 +204,54 @@ class CacheService:
         if not self.enabled:
             return
         try:
-            await self.redis.setex(key, ttl or self.ttl, json.dumps(value))
+            with metrics.redis_timer("setex"):
+                await self.redis.setex(key, self._jittered(ttl or self.ttl), json.dumps(value))
+        except Exception as e:
+            logger.error(f"Redis set error: {e}")
+
+    async def get_many(self, keys: list[str]) -> list:
+        """Values for `keys` in one MGET, in order; None for misses."""
+        return await self._mget(keys, "kv", json.loads)
+
+    async def set_many(self, values: dict[str, dict], ttl: int = None):
+        """Set several keys with one TTL in one pipelined round trip."""
+        await self._setex_many({key: json.dumps(value) for key, value in values.items()}, ttl or self.ttl)
+
+    async def _mget(self, keys: list[str], cache: str, loads) -> list:
+        if not keys:
+            return []
+        if not self.enabled:
+            if not await self._ensure_connection():
+                return [None] * len(keys)
+        try:
+            with metrics.redis_timer("mget"):
+                values = await self.redis.mget(keys)
         except Exception as e:
+            if "Connection refused" in str(e) or "Error 61" in str(e):
+                logger.error(f"Redis connection lost: {e}. Disabling cache.")
+                self.enabled = False
+            else:
+                logger.error(f"Redis mget error: {e}")
+            return [None] * len(keys)
+        result = []
+        for data in values:
+            value = loads(data) if data else None
+            metrics.record_cache(cache, value is not None, negative=cache == "group_config" and data == MISSING_GROUP_CONFIG)
+            result.append(value)
+        return result
+
+    async def _setex_many(self, payloads: dict[str, bytes | str], ttl: int):
+        if not self.enabled or not payloads:
+            return
+        try:
+            with metrics.redis_timer("pipeline"):
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    for key, payload in payloads.items():
+                        pipe.setex(key, self._jittered(ttl), payload)
+                    await pipe.execute()
+        except Exception as e:
+            if "Connection refused" in str(e) or "Error 61" in str(e):
+                self.enabled = False
             logger.error(f"Redis set error: {e}")
 
 cache_service = CacheService()
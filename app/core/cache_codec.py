@@ -0,0 +1,143 @@
+import struct
+import zlib
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_EVEN
+from sqlalchemy import Boolean, DateTime, Float, Integer, Numeric, Table
+
+# First byte of every binary entry. 0xC1 never starts UTF-8 text, so entries
+# written as JSON by earlier versions are told apart by their first byte
+MAGIC = 0xC1
+VERSION = 1
+
+_HEADER = struct.Struct("<BBIQ") # magic, version, schema fingerprint, null bitmap
+_LENGTH = struct.Struct("<I")
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _encode_decimal(scale: int):
+    def encode(value) -> int:
+        value = value if isinstance(value, Decimal) else Decimal(str(value))
+        return int(value.scaleb(scale).to_integral_value(ROUND_HALF_EVEN))
+    return encode
+
+
+def _decode_decimal(scale: int):
+    return lambda value: Decimal(value).scaleb(-scale)
+
+
+def _encode_datetime(value) -> int:
+    value = datetime.fromisoformat(value) if isinstance(value, str) else value
+    return (value - _EPOCH) // _MICROSECOND
+
+
+def _decode_datetime(value: int) -> datetime:
+    return _EPOCH + value * _MICROSECOND
+
+
+# kind -> (struct code, encoder, decoder); None means stored as-is
+_FIXED_KINDS = {
+    "bool": ("?", bool, None),
+    "int": ("q", int, None),
+    "float": ("d", float, None),
+    "datetime": ("q", _encode_datetime, _decode_datetime),
+}
+
+
+class RowCodec:
+    """
+    Struct-packed encoding of a table row given as a column dict.
+
+    Integers, floats and booleans are packed as-is, Numeric columns as integers
+    scaled by the column's scale (exact for values the column can hold) and
+    DateTime columns as microseconds since the epoch, so both round-trip
+    exactly (DateTime columns are naive in this schema). Strings follow the
+    fixed part, length-prefixed. The header carries a fingerprint of the
+    column list: after a schema change old entries decode to None and are
+    treated as cache misses.
+    """
+
+    def __init__(self, table: Table):
+        self.fixed_columns = [] # (name, kind, scale)
+        self.string_columns = []
+        self._encoders = [] # (name, encoder, null placeholder)
+        self._decoders = []
+        fmt = "<"
+        for column in table.columns:
+            kind, scale = self._kind(column)
+            if kind == "str":
+                self.string_columns.append(column.name)
+                continue
+            self.fixed_columns.append((column.name, kind, scale))
+            if kind == "decimal":
+                code, encoder, decoder = "q", _encode_decimal(scale), _decode_decimal(scale)
+            else:
+                code, encoder, decoder = _FIXED_KINDS[kind]
+            fmt += code
+            self._encoders.append((column.name, encoder, False if code == "?" else 0))
+            self._decoders.append((column.name, decoder))
+        if len(self.fixed_columns) + len(self.string_columns) > 64:
+            raise ValueError(f"{table.name}: too many columns for the null bitmap")
+        self._fixed = struct.Struct(fmt)
+        signature = repr(self.fixed_columns + self.string_columns)
+        self.fingerprint = zlib.crc32(signature.encode())
+
+    @staticmethod
+    def _kind(column) -> tuple[str, int]:
+        column_type = column.type
+        if isinstance(column_type, Boolean):
+            return "bool", 0
+        if isinstance(column_type, Integer):
+            return "int", 0
+        if isinstance(column_type, Float): # Float subclasses Numeric
+            return "float", 0
+        if isinstance(column_type, Numeric):
+            return "decimal", column_type.scale or 0
+        if isinstance(column_type, DateTime):
+            return "datetime", 0
+        return "str", 0
+
+    def encode(self, row: dict) -> bytes:
+        nulls = 0
+        fixed = []
+        for index, (name, encoder, placeholder) in enumerate(self._encoders):
+            value = row.get(name)
+            if value is None:
+                nulls |= 1 << index
+                fixed.append(placeholder)
+            else:
+                fixed.append(encoder(value))
+        parts = [b"", self._fixed.pack(*fixed)]
+        for index, name in enumerate(self.string_columns, start=len(self.fixed_columns)):
+            value = row.get(name)
+            if value is None:
+                nulls |= 1 << index
+                parts.append(_LENGTH.pack(0))
+            else:
+                encoded = str(value).encode()
+                parts.append(_LENGTH.pack(len(encoded)))
+                parts.append(encoded)
+        parts[0] = _HEADER.pack(MAGIC, VERSION, self.fingerprint, nulls)
+        return b"".join(parts)
+
+    def decode(self, data: bytes) -> dict | None:
+        """Row dict, or None if `data` is not a current entry for this table."""
+        if len(data) < _HEADER.size:
+            return None
+        magic, version, fingerprint, nulls = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or fingerprint != self.fingerprint:
+            return None
+        row = {}
+        values = self._fixed.unpack_from(data, _HEADER.size)
+        for index, ((name, decoder), value) in enumerate(zip(self._decoders, values)):
+            if nulls >> index & 1:
+                row[name] = None
+            else:
+                row[name] = value if decoder is None else decoder(value)
+        offset = _HEADER.size + self._fixed.size
+        for index, name in enumerate(self.string_columns, start=len(self.fixed_columns)):
+            (length,) = _LENGTH.unpack_from(data, offset)
+            offset += _LENGTH.size
+            row[name] = None if nulls >> index & 1 else data[offset:offset + length].decode()
+            offset += length
+        return row
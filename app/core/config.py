@@ -9,6 +9,114 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     SENTRY_DSN: str = "" # Optional
     TIMEZONE: str = "Asia/Shanghai"
+
+    # Sentry tracing: record this share of transactions, then send all failed
+    # ones, all slower than SENTRY_SLOW_TRANSACTION_MS, and this share of the
+    # rest (adjustable at runtime via /admin/sentry/sampling)
+    SENTRY_TRACES_RECORD_RATE: float = 1.0
+    SENTRY_TRACES_SAMPLE_RATE: float = 0.05
+    SENTRY_SLOW_TRANSACTION_MS: int = 1000
+    SENTRY_PROFILES_SAMPLE_RATE: float = 0.0 # Of recorded transactions
+    # Per-update cProfile dumps armed from /admin/profiling
+    PROFILE_DUMP_DIR: str = "profiles"
+
+    # Logging: one loguru sink written from a background thread (LOG_ENQUEUE),
+    # text or one JSON object per line with bot_id/chat_id/update_id; LOG_LEVELS
+    # overrides LOG_LEVEL per module prefix ("app.bot.handlers=DEBUG,httpx=ERROR")
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = "httpx=WARNING,httpcore=WARNING,apscheduler=WARNING"
+    LOG_JSON: bool = False
+    LOG_ENQUEUE: bool = True
+    LOG_SAMPLE_RATE: float = 0.01 # Share of per-message debug lines kept
+
+    # Log how long each startup phase took (see also scripts/bench_cold_start.py)
+    STARTUP_PROFILE: bool = False
+
+    # Prometheus metrics at /metrics (handler, DB, Redis, Bot API latency, ...)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: str = "" # Required to serve /metrics; scrapers send "Authorization: Bearer <token>"
+
+    # Group config cache: TTLs get up to CACHE_TTL_JITTER (fraction) added so
+    # entries written together don't expire together; "no such group" is cached
+    # for CACHE_NEGATIVE_TTL seconds
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_TTL_JITTER: float = 0.1
+    CACHE_NEGATIVE_TTL: int = 30
+
+    # Groups in 合并回复 mode get one bill reply per burst of transactions, sent
+    # after this many quiet seconds; a burst within REPLY_EDIT_SECONDS of the
+    # last bill edits that message instead of sending a new one
+    REPLY_DEBOUNCE_SECONDS: float = 2.0
+    REPLY_EDIT_SECONDS: int = 60
+
+    # Per-bot settings (button config, bill keyboard) cached in each worker;
+    # admin writes invalidate it, the TTL bounds staleness after direct DB edits
+    BOT_SETTINGS_CACHE_TTL: int = 300
+
+    # Dashboard stats: full recount interval (counters are also updated on write)
+    STATS_RECONCILE_MINUTES: int = 5
+
+    # Lazy bot startup (webhook mode only): build a bot's Application on its first
+    # update instead of at startup, and shut it down after this many idle seconds
+    BOT_LAZY_START: bool = False
+    BOT_IDLE_EVICT_SECONDS: int = 1800
+
+    # Outbound Bot API HTTP: one pool shared by all bots (split into shards),
+    # plus a separate pool for long-polling getUpdates
+    TG_HTTP_SHARED_POOL: bool = True
+    # httpcore burns CPU re-assigning requests when one client has many busy
+    # connections, so the budget is split into several small clients
+    TG_HTTP_POOL_SHARDS: int = 16
+    TG_HTTP_MAX_CONNECTIONS: int = 8 # Per shard
+    TG_HTTP_MAX_KEEPALIVE: int = 8 # Per shard
+    TG_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    TG_HTTP_POOL_TIMEOUT: float = 5.0
+    TG_HTTP2: bool = False # Requires httpx[http2]
+    TG_GET_UPDATES_MAX_CONNECTIONS: int = 1024
+    TG_API_BASE_URL: str = "" # Default https://api.telegram.org/bot; override for a local Bot API server
+
+    # Polling mode: one supervisor schedules getUpdates for all bots instead of
+    # a PTB Updater per bot
+    POLLING_SUPERVISOR: bool = False
+    POLL_MAX_INFLIGHT: int = 64 # Concurrent getUpdates requests
+    POLL_MIN_TIMEOUT: int = 1 # Long-poll seconds for busy bots
+    POLL_MAX_TIMEOUT: int = 25 # Long-poll seconds for idle bots when slots are free
+    POLL_IDLE_BACKOFF_MAX: float = 5.0 # Max pause between empty polls
+    POLL_DISPATCH_WORKERS: int = 16
+    POLL_MAX_BACKLOG: int = 500 # Per bot; polling pauses above this
+
+    # Horizontal sharding: bots are spread over worker processes by consistent
+    # hashing on bot id; membership and the scheduler lease live in the DB
+    SHARDING_ENABLED: bool = False
+    WORKER_ID: str = "" # Default: hostname-pid
+    WORKER_URL: str = "" # Internal base URL of this worker, e.g. http://app-1:8000
+    WORKER_HEARTBEAT_SECONDS: int = 5
+    WORKER_TTL_SECONDS: int = 20
+    SHARD_VNODES: int = 64
+    INTERNAL_API_SECRET: str = "" # Worker-to-worker calls; default derived from SECRET_KEY
+
+    # Per-bot health supervisor: unhealthy bots are restarted individually with
+    # exponential backoff; see /health
+    BOT_HEALTH_CHECK_SECONDS: int = 30
+    BOT_HEALTH_MAX_POLL_ERRORS: int = 5 # getUpdates failures per check window
+    BOT_HEALTH_MIN_ERRORS: int = 20 # Handler errors per window before the rate counts
+    BOT_HEALTH_MAX_ERROR_RATE: float = 0.5 # Handler errors per update
+    BOT_RESTART_BACKOFF_BASE: int = 10
+    BOT_RESTART_BACKOFF_MAX: int = 900
+
+    # Per-bot outbound governor: Bot API calls to a chat wait for a global
+    # budget (requests/second), served interactive replies first, then
+    # notifications, then broadcasts; messages sent or edited in a chat also
+    # wait for a per-chat budget (0 disables it).
+    # RetryAfter pauses the bot and the call is retried up to OUTBOUND_MAX_RETRIES
+    BOT_API_RATE_LIMIT: float = 25.0
+    OUTBOUND_CHAT_RATE: float = 1.0
+    OUTBOUND_CHAT_BURST: int = 3
+    OUTBOUND_MAX_RETRIES: int = 2
+    # Bulk group exit: concurrent leave_chat calls, and selections larger than
+    # the threshold run as a background job
+    GROUP_EXIT_CONCURRENCY: int = 10
+    GROUP_EXIT_BACKGROUND_THRESHOLD: int = 50
     
     # Admin Auth
     ADMIN_USERNAME: str = "admin"
@@ -1,8 +1,12 @@
+import ast
+import re
+from pathlib import Path
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy import event
+from sqlalchemy import event, inspect, text
 from sqlalchemy.engine import Engine
 from app.core.config import settings
+from app.core.metrics import metrics
 
 DATABASE_URL = settings.DATABASE_URL
 
@@ -28,6 +32,7 @@ engine = create_async_engine(
     connect_args=connect_args,
     pool_pre_ping=True # Health check connections
 )
+metrics.instrument_engine(engine)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
@@ -38,3 +43,42 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+ALEMBIC_VERSIONS = Path(__file__).resolve().parents[2] / "alembic" / "versions"
+_REVISION_LINE = re.compile(r"^(revision|down_revision)\b[^=]*=\s*(.+)$", re.MULTILINE)
+
+def alembic_head() -> str | None:
+    """
+    Head revision of the migration scripts, or None unless there is exactly one.
+    Read from the files directly: importing alembic alone costs ~100ms.
+    """
+    revisions, parents = set(), set()
+    for path in ALEMBIC_VERSIONS.glob("*.py"):
+        values = dict(_REVISION_LINE.findall(path.read_text(encoding="utf-8")))
+        try:
+            revision = ast.literal_eval(values["revision"].strip())
+            down = ast.literal_eval(values.get("down_revision", "None").strip())
+        except (KeyError, ValueError, SyntaxError):
+            return None
+        revisions.add(revision)
+        parents.update(down if isinstance(down, (tuple, list)) else [down])
+    heads = revisions - parents
+    return heads.pop() if len(heads) == 1 else None
+
+def _current_revision(sync_conn) -> str | None:
+    if not inspect(sync_conn).has_table("alembic_version"):
+        return None
+    return sync_conn.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+async def ensure_schema() -> bool:
+    """
+    Create missing tables unless the DB is already stamped with the Alembic head
+    (the schema is then managed by migrations, and create_all would only cost a
+    catalog query per table on every boot). Returns whether create_all ran.
+    """
+    head = alembic_head()
+    async with engine.begin() as conn:
+        if head is not None and await conn.run_sync(_current_revision) == head:
+            return False
+        await conn.run_sync(Base.metadata.create_all)
+    return True
@@ -0,0 +1,188 @@
+import time
+from datetime import datetime
+from typing import Dict
+from loguru import logger
+from app.core.config import settings
+from app.core.sharding import shard_coordinator
+
+
+class BotHealth:
+    """Counters and restart state for one bot; also what `/health` reports."""
+
+    def __init__(self, bot_db_id: int):
+        self.bot_db_id = bot_db_id
+        self.status = "ok"
+        self.problem: str | None = None
+        self.updates = 0
+        self.errors = 0
+        self.last_update_at: datetime | None = None
+        self.last_error: str | None = None
+        self.last_error_at: datetime | None = None
+
+        # Reset after every check
+        self.window_updates = 0
+        self.window_errors = 0
+        self.window_poll_errors = 0
+
+        self.restarts = 0
+        self.restart_attempts = 0
+        self.next_restart_at = 0.0
+
+    def roll_window(self):
+        self.window_updates = 0
+        self.window_errors = 0
+        self.window_poll_errors = 0
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "bot_id": self.bot_db_id,
+            "status": self.status,
+            "problem": self.problem,
+            "updates": self.updates,
+            "errors": self.errors,
+            "last_update_at": self.last_update_at.isoformat() if self.last_update_at else None,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at.isoformat() if self.last_error_at else None,
+            "restarts": self.restarts,
+            "next_restart_in": round(max(0.0, self.next_restart_at - now), 1) if self.restart_attempts else None,
+        }
+
+
+class HealthMonitor:
+    """
+    Per-bot health supervisor.
+
+    Bots report updates, handler errors and getUpdates errors as they happen.
+    Every BOT_HEALTH_CHECK_SECONDS `check()` looks at each running bot: a
+    stopped Application or updater, a dead polling loop, repeated getUpdates
+    failures or a handler error rate above BOT_HEALTH_MAX_ERROR_RATE mark it
+    unhealthy, and only that bot is restarted. Restarts back off exponentially
+    (BOT_RESTART_BACKOFF_BASE doubling up to BOT_RESTART_BACKOFF_MAX); the
+    backoff resets once the bot stays healthy through it.
+    """
+
+    def __init__(self):
+        self.bots: Dict[int, BotHealth] = {}
+        self.last_check: float | None = None
+
+    def get(self, bot_db_id: int) -> BotHealth:
+        health = self.bots.get(bot_db_id)
+        if health is None:
+            health = BotHealth(bot_db_id)
+            self.bots[bot_db_id] = health
+        return health
+
+    def forget(self, bot_db_id: int):
+        self.bots.pop(bot_db_id, None)
+
+    # --- Reporting hooks ---
+
+    def record_update(self, bot_db_id: int):
+        health = self.get(bot_db_id)
+        health.updates += 1
+        health.window_updates += 1
+        health.last_update_at = datetime.now()
+
+    def record_error(self, bot_db_id: int, error: BaseException, polling: bool = False):
+        health = self.get(bot_db_id)
+        health.errors += 1
+        if polling:
+            health.window_poll_errors += 1
+        else:
+            health.window_errors += 1
+        health.last_error = f"{type(error).__name__}: {error}"[:200]
+        health.last_error_at = datetime.now()
+
+    # --- Checking ---
+
+    def _problem(self, health: BotHealth, app) -> str | None:
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+        from app.core.polling import polling_supervisor
+
+        if app is None:
+            return "not running"
+        if not app.running:
+            return "application stopped"
+        if settings.TG_MODE != "webhook":
+            if bot_manager.supervised_polling:
+                state = polling_supervisor.states.get(health.bot_db_id)
+                if state is None or state.stopped:
+                    return "polling stopped"
+                if state.error_streak >= settings.BOT_HEALTH_MAX_POLL_ERRORS:
+                    return f"getUpdates failed {state.error_streak} times in a row"
+            elif not app.updater.running:
+                return "updater stopped"
+            elif health.window_poll_errors >= settings.BOT_HEALTH_MAX_POLL_ERRORS:
+                return f"getUpdates failed {health.window_poll_errors} times"
+        if (
+            health.window_errors >= settings.BOT_HEALTH_MIN_ERRORS
+            and health.window_errors >= settings.BOT_HEALTH_MAX_ERROR_RATE * max(1, health.window_updates)
+        ):
+            return f"{health.window_errors} handler errors in {health.window_updates} updates"
+        return None
+
+    async def check(self) -> list[int]:
+        """Restart unhealthy bots whose backoff has elapsed; returns their ids."""
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        now = time.monotonic()
+        self.last_check = now
+        down = [bot_db_id for bot_db_id, health in self.bots.items() if health.status == "down"]
+        restarted = []
+        for bot_db_id in list(dict.fromkeys([*bot_manager.apps, *down])):
+            if bot_db_id in bot_manager.send_only or not shard_coordinator.owns(bot_db_id):
+                continue
+            health = self.get(bot_db_id)
+            problem = self._problem(health, bot_manager.apps.get(bot_db_id))
+            health.roll_window()
+
+            if problem is None:
+                health.status, health.problem = "ok", None
+                if health.restart_attempts and now >= health.next_restart_at:
+                    # Stayed healthy through the backoff window
+                    health.restart_attempts = 0
+                continue
+
+            health.problem = problem
+            if health.status != "down":
+                health.status = "unhealthy"
+            if now < health.next_restart_at:
+                continue
+
+            delay = min(settings.BOT_RESTART_BACKOFF_MAX, settings.BOT_RESTART_BACKOFF_BASE * 2 ** health.restart_attempts)
+            health.restart_attempts += 1
+            health.next_restart_at = now + delay
+            logger.warning(f"Bot {bot_db_id} unhealthy ({problem}); restarting (attempt {health.restart_attempts}, next in {delay}s)")
+
+            ok = await bot_manager.restart_bot(bot_db_id)
+            if ok is None:
+                # Disabled or deleted meanwhile
+                continue
+            # stop_bot forgets the bot; keep its history and backoff
+            self.bots[bot_db_id] = health
+            health.restarts += 1
+            health.status = "restarted" if ok else "down"
+            restarted.append(bot_db_id)
+        return restarted
+
+    def report(self) -> dict:
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        now = time.monotonic()
+        bots = [health.snapshot(now) for health in self.bots.values()]
+        unhealthy = sum(1 for bot in bots if bot["status"] in ("unhealthy", "down"))
+        # The check runs from the scheduler; if it stopped running, the process is wedged
+        stalled = self.last_check is not None and now - self.last_check > 3 * settings.BOT_HEALTH_CHECK_SECONDS
+        return {
+            "status": "stalled" if stalled else ("degraded" if unhealthy else "ok"),
+            "last_check_seconds_ago": round(now - self.last_check, 1) if self.last_check is not None else None,
+            "running_bots": len(set(bot_manager.apps) - bot_manager.send_only),
+            "unhealthy_bots": unhealthy,
+            "bots": bots,
+        }
+
+
+bot_health = HealthMonitor()
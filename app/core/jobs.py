@@ -0,0 +1,74 @@
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Awaitable, Callable
+from loguru import logger
+from app.core.sharding import shard_coordinator
+
+
+class JobRegistry:
+    """
+    In-process registry for long-running API operations (bulk exits, ...).
+
+    Jobs run as asyncio tasks; callers poll `get(job_id)` for status, progress
+    and result. Only the most recent `max_jobs` are kept.
+
+    State lives in the creating process only. Job ids end with ".<worker_id>"
+    so that with SHARDING_ENABLED a poll reaching another worker can be sent
+    back with `shard_coordinator.fetch_job`; jobs die with their worker.
+    """
+
+    def __init__(self, max_jobs: int = 200):
+        self.max_jobs = max_jobs
+        self.jobs: dict[str, dict] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def submit(self, kind: str, owner: int | None, total: int, func: Callable[[dict], Awaitable]) -> dict:
+        """
+        Start `func(job)` in the background. `func` may update job["done"] as it
+        goes; its return value becomes job["result"].
+        """
+        job_id = f"{uuid.uuid4().hex}.{shard_coordinator.worker_id}"
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "owner": owner,
+            "status": "pending",
+            "total": total,
+            "done": 0,
+            "result": None,
+            "error": None,
+            "created_at": datetime.now(),
+            "finished_at": None,
+        }
+        self.jobs[job_id] = job
+        self._prune()
+        self._tasks[job_id] = asyncio.create_task(self._run(job, func))
+        return job
+
+    async def _run(self, job: dict, func):
+        job["status"] = "running"
+        try:
+            job["result"] = await func(job)
+            job["status"] = "done"
+        except Exception as e:
+            logger.error(f"Job {job['kind']} {job['id']} failed: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.now()
+            self._tasks.pop(job["id"], None)
+
+    def _prune(self):
+        if len(self.jobs) <= self.max_jobs:
+            return
+        finished = [j for j in self.jobs.values() if j["finished_at"] is not None]
+        finished.sort(key=lambda j: j["finished_at"])
+        for job in finished[:len(self.jobs) - self.max_jobs]:
+            self.jobs.pop(job["id"], None)
+
+    def get(self, job_id: str) -> dict | None:
+        return self.jobs.get(job_id)
+
+
+job_registry = JobRegistry()
@@ -0,0 +1,138 @@
+import json
+import logging
+import random
+import sys
+import traceback
+from loguru import logger
+from app.core.config import settings
+
+# Bound by BotApplication.process_update via logger.contextualize
+CONTEXT_FIELDS = ("bot_id", "chat_id", "update_id")
+
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"
+    "{extra[_context]}\n{exception}"
+)
+
+
+def parse_levels(spec: str) -> dict[str, int]:
+    """"app.bot.handlers=WARNING,httpx=ERROR" -> {module prefix: level number}."""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        try:
+            levels[name.strip()] = logger.level(level.strip().upper()).no
+        except ValueError:
+            logger.warning(f"Ignoring invalid LOG_LEVELS entry: {item!r}")
+    return levels
+
+
+class LevelFilter:
+    """Per-logger minimum level: the longest configured module prefix of the record's name wins."""
+
+    def __init__(self, default: int, overrides: dict[str, int]):
+        self.default = default
+        self.overrides = overrides
+        self._cache: dict[str, int] = {}
+
+    def level_for(self, name: str) -> int:
+        level = self._cache.get(name)
+        if level is None:
+            level = self.default
+            best = -1
+            for prefix, prefix_level in self.overrides.items():
+                if (name == prefix or name.startswith(prefix + ".")) and len(prefix) > best:
+                    level, best = prefix_level, len(prefix)
+            self._cache[name] = level
+        return level
+
+    def __call__(self, record) -> bool:
+        return record["level"].no >= self.level_for(record["name"] or "")
+
+
+def _text_format(record) -> str:
+    context = " ".join(f"{field}={record['extra'][field]}" for field in CONTEXT_FIELDS if record["extra"].get(field) is not None)
+    record["extra"]["_context"] = f" [{context}]" if context else ""
+    return TEXT_FORMAT
+
+
+def _json_format(record) -> str:
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    payload.update((key, value) for key, value in record["extra"].items() if not key.startswith("_"))
+    if record["exception"] is not None:
+        error_type, error, tb = record["exception"]
+        payload["exception"] = "".join(traceback.format_exception(error_type, error, tb))
+    record["extra"]["_json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+class InterceptHandler(logging.Handler):
+    """Routes stdlib logging (PTB, httpx, APScheduler, ...) into loguru."""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        frame, depth = logging.currentframe(), 2
+        while frame and frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+        logger.opt(depth=depth, exception=record.exc_info).log(level, record.getMessage())
+
+
+class SampledLogger:
+    """
+    For lines logged once per chat message: each call is kept with probability
+    LOG_SAMPLE_RATE, checked before anything is formatted. Use loguru's lazy
+    "{}" arguments rather than f-strings so dropped lines cost nothing.
+    """
+
+    def log(self, level: str, message: str, *args, **kwargs):
+        if random.random() < settings.LOG_SAMPLE_RATE:
+            logger.opt(depth=2).log(level, message, *args, **kwargs)
+
+    def debug(self, message: str, *args, **kwargs):
+        self.log("DEBUG", message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs):
+        self.log("INFO", message, *args, **kwargs)
+
+
+sampled_logger = SampledLogger()
+
+
+def setup_logging(sink=sys.stderr):
+    """
+    Replace loguru's default handler with one sink configured from LOG_*:
+    text or JSON (LOG_JSON), written from a background thread (LOG_ENQUEUE),
+    filtered per module (LOG_LEVEL / LOG_LEVELS). Stdlib logging goes through
+    the same sink.
+    """
+    default = logger.level(settings.LOG_LEVEL.upper()).no
+    overrides = parse_levels(settings.LOG_LEVELS)
+    minimum = min([default, *overrides.values()])
+
+    logger.remove()
+    logger.configure(extra={"_context": ""})
+    logger.add(
+        sink,
+        level=minimum,
+        format=_json_format if settings.LOG_JSON else _text_format,
+        filter=LevelFilter(default, overrides),
+        enqueue=settings.LOG_ENQUEUE,
+        colorize=False if settings.LOG_JSON else None,
+    )
+
+    logging.basicConfig(handlers=[InterceptHandler()], level=minimum, force=True)
+    for name, level in overrides.items():
+        # Lets noisy stdlib loggers drop records before they are built
+        logging.getLogger(name).setLevel(level)
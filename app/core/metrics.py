@@ -0,0 +1,194 @@
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache, wraps
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from app.core.config import settings
+
+# Seconds; from sub-millisecond cache/DB calls up to slow Bot API requests
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+"?(\w+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def statement_tag(statement: str) -> str:
+    """Low-cardinality label for a SQL statement: verb plus first table, e.g. "select ledger_records"."""
+    words = statement.split(None, 1)
+    if not words:
+        return "unknown"
+    verb = words[0].lower()
+    match = _STATEMENT_TABLE.search(statement)
+    return f"{verb} {match.group(1).lower()}" if match else verb
+
+
+class _QueueCollector:
+    """Gauges computed at scrape time from the bot manager and polling supervisor."""
+
+    def describe(self):
+        # Lets the registry skip calling collect() at import time
+        yield GaugeMetricFamily("update_queue_depth", "Updates received but not handled yet", labels=["source"])
+        yield GaugeMetricFamily("bots_running", "Bot Applications running in this process")
+        yield GaugeMetricFamily("outbound_queue_depth", "Bot API calls waiting in the outbound governors", labels=["priority"])
+
+    def collect(self):
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+        from app.core.polling import polling_supervisor
+
+        depth = GaugeMetricFamily("update_queue_depth", "Updates received but not handled yet", labels=["source"])
+        depth.add_metric(["webhook"], bot_manager.inflight_updates())
+        depth.add_metric(["polling"], sum(state.backlog for state in polling_supervisor.states.values()))
+        yield depth
+        yield GaugeMetricFamily("bots_running", "Bot Applications running in this process", value=len(bot_manager.apps))
+        outbound = GaugeMetricFamily("outbound_queue_depth", "Bot API calls waiting in the outbound governors", labels=["priority"])
+        totals = {}
+        for app in list(bot_manager.apps.values()):
+            governor = getattr(app.bot, "rate_limiter", None)
+            if hasattr(governor, "queue_depth"):
+                for priority, depth in governor.queue_depth().items():
+                    totals[priority] = totals.get(priority, 0) + depth
+        for priority, depth in totals.items():
+            outbound.add_metric([priority], depth)
+        yield outbound
+
+
+class Metrics:
+    """
+    Prometheus metrics for the hot paths, rendered at `/metrics`.
+
+    Histograms are labelled by handler / statement / command / method only;
+    bot_id appears on counters, whose cardinality stays at one series per bot.
+    With METRICS_ENABLED off nothing is hooked in and the recorders return
+    immediately (see scripts/bench_metrics.py for the overhead).
+    """
+
+    def __init__(self):
+        self.enabled = settings.METRICS_ENABLED
+        self.handler_seconds = Histogram(
+            "bot_handler_seconds", "Time spent in a bot update handler", ["handler"], buckets=LATENCY_BUCKETS,
+        )
+        self.bot_updates = Counter("bot_updates", "Updates received", ["bot_id"])
+        self.db_query_seconds = Histogram(
+            "db_query_seconds", "SQL statement latency", ["statement"], buckets=LATENCY_BUCKETS,
+        )
+        self.redis_command_seconds = Histogram(
+            "redis_command_seconds", "Redis command latency", ["command"], buckets=LATENCY_BUCKETS,
+        )
+        self.telegram_api_seconds = Histogram(
+            "telegram_api_seconds", "Bot API request latency", ["method"], buckets=LATENCY_BUCKETS,
+        )
+        self.telegram_api_errors = Counter(
+            "telegram_api_errors", "Bot API requests that failed, by HTTP status or exception", ["method", "code"],
+        )
+        self.broadcast_messages = Counter("broadcast_messages", "Broadcast sends", ["bot_id", "result"])
+        self.outbound_wait_seconds = Histogram(
+            "telegram_outbound_wait_seconds", "Time Bot API calls waited in the outbound governor", ["priority"],
+            buckets=LATENCY_BUCKETS,
+        )
+        self.telegram_retry_after = Counter(
+            "telegram_retry_after", "RetryAfter (flood control) responses handled by the outbound governor", ["bot_id"],
+        )
+        self.cache_requests = Counter("cache_requests", "Cache lookups", ["cache", "result"])
+        self.cache_stampedes_avoided = Counter(
+            "cache_stampedes_avoided", "Cache misses that joined an in-flight load instead of querying", ["cache"]
+        )
+        if self.enabled:
+            REGISTRY.register(_QueueCollector())
+
+    # --- Hooks ---
+
+    def instrument_handlers(self, app):
+        """Time every handler callback registered on a PTB Application."""
+        if not self.enabled:
+            return
+        for handlers in app.handlers.values():
+            for handler in handlers:
+                handler.callback = self._timed(handler.callback)
+
+    def _timed(self, callback):
+        histogram = self.handler_seconds.labels(getattr(callback, "__name__", type(callback).__name__))
+
+        @wraps(callback)
+        async def timed(update, context):
+            started = time.perf_counter()
+            try:
+                return await callback(update, context)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+        return timed
+
+    def instrument_engine(self, engine):
+        """Time every statement executed on a (sync or async) SQLAlchemy engine."""
+        if not self.enabled:
+            return
+        sync_engine = getattr(engine, "sync_engine", engine)
+
+        @lru_cache(maxsize=2048)
+        def histogram_for(statement: str):
+            return self.db_query_seconds.labels(statement_tag(statement))
+
+        # The start time lives on the statement's execution context, so a
+        # statement that fails (no after_cursor_execute) leaves nothing behind.
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            if context is not None:
+                context._metrics_started = time.perf_counter()
+
+        @event.listens_for(sync_engine, "after_cursor_execute")
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, "_metrics_started", None)
+            if started is not None:
+                histogram_for(statement).observe(time.perf_counter() - started)
+
+    # --- Recorders ---
+
+    def record_update(self, bot_db_id: int):
+        if self.enabled:
+            self.bot_updates.labels(str(bot_db_id)).inc()
+
+    def record_telegram(self, method: str, seconds: float, status: int | str):
+        if not self.enabled:
+            return
+        self.telegram_api_seconds.labels(method).observe(seconds)
+        if status != 200:
+            self.telegram_api_errors.labels(method, str(status)).inc()
+
+    def record_broadcast(self, bot_db_id: int, ok: bool):
+        if self.enabled:
+            self.broadcast_messages.labels(str(bot_db_id), "success" if ok else "failed").inc()
+
+    def record_outbound_wait(self, priority: str, seconds: float):
+        if self.enabled:
+            self.outbound_wait_seconds.labels(priority).observe(seconds)
+
+    def record_retry_after(self, bot_db_id: int):
+        if self.enabled:
+            self.telegram_retry_after.labels(str(bot_db_id)).inc()
+
+    def record_cache(self, cache: str, hit: bool, negative: bool = False):
+        if self.enabled:
+            self.cache_requests.labels(cache, "negative" if negative else "hit" if hit else "miss").inc()
+
+    def record_stampede_avoided(self, cache: str):
+        if self.enabled:
+            self.cache_stampedes_avoided.labels(cache).inc()
+
+    @contextmanager
+    def redis_timer(self, command: str):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.redis_command_seconds.labels(command).observe(time.perf_counter() - started)
+
+    def render(self) -> tuple[bytes, str]:
+        return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+metrics = Metrics()
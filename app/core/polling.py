@@ -0,0 +1,273 @@
+import asyncio
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict
+from loguru import logger
+from telegram import Update
+from telegram.ext import Application
+from telegram.error import Conflict, Forbidden, InvalidToken, RetryAfter, TelegramError
+from app.core.config import settings
+from app.core.rate_limit import retry_after_seconds
+
+
+class BotPollState:
+    """Polling bookkeeping for one bot; also what `PollingSupervisor.stats()` reports."""
+
+    def __init__(self, bot_db_id: int, app: Application):
+        self.bot_db_id = bot_db_id
+        self.app = app
+        self.offset: int | None = None
+        self.next_poll_at = 0.0
+        self.idle_polls = 0
+        self.error_streak = 0
+        self.task: asyncio.Task | None = None
+        self.stopped = False
+
+        self.pending: deque = deque()
+        self.dispatching = False
+
+        self.polls = 0
+        self.updates = 0
+        self.processed = 0
+        self.errors = 0
+        self.last_timeout = 0
+        self.last_latency_ms = 0.0
+        self.avg_latency_ms = 0.0
+        self.last_update_at: datetime | None = None
+
+    @property
+    def backlog(self) -> int:
+        return len(self.pending)
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "bot_id": self.bot_db_id,
+            "polls": self.polls,
+            "updates": self.updates,
+            "processed": self.processed,
+            "errors": self.errors,
+            "backlog": self.backlog,
+            "polling": self.task is not None,
+            "timeout": self.last_timeout,
+            "next_poll_in": round(max(0.0, self.next_poll_at - now), 2),
+            "last_latency_ms": round(self.last_latency_ms, 1),
+            "avg_latency_ms": round(self.avg_latency_ms, 1),
+            "last_update_at": self.last_update_at.isoformat() if self.last_update_at else None,
+        }
+
+
+class PollingSupervisor:
+    """
+    Runs getUpdates for every polling bot from one scheduler loop instead of one
+    PTB Updater per bot.
+
+    - At most POLL_MAX_INFLIGHT getUpdates requests are open at once.
+    - Busy bots (last poll returned updates) are polled again immediately with a
+      short long-poll timeout; idle bots back off exponentially up to
+      POLL_IDLE_BACKOFF_MAX and get longer long-polls while slots are free.
+    - Updates go to a shared pool of POLL_DISPATCH_WORKERS; one bot's updates are
+      always processed in order by a single worker at a time.
+    """
+
+    BATCH_LIMIT = 100
+
+    def __init__(self):
+        self.states: Dict[int, BotPollState] = {}
+        self.inflight = 0
+        self._queue: asyncio.Queue | None = None
+        self._wake: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def _ensure_started(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._scheduler())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(max(1, settings.POLL_DISPATCH_WORKERS))]
+        logger.info("Polling supervisor started")
+
+    async def register(self, bot_db_id: int, app: Application):
+        # getUpdates is refused while a webhook is set
+        await app.bot.delete_webhook()
+        self._ensure_started()
+        self.states[bot_db_id] = BotPollState(bot_db_id, app)
+        self._wake.set()
+
+    async def unregister(self, bot_db_id: int, drain_timeout: float = 5.0):
+        state = self.states.get(bot_db_id)
+        if state is None:
+            return
+        state.stopped = True
+        if state.task:
+            state.task.cancel()
+
+        # Let already fetched updates finish, then confirm the offset so they are
+        # not delivered again after a restart
+        deadline = time.monotonic() + drain_timeout
+        while (state.pending or state.dispatching) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        if state.offset is not None:
+            try:
+                await state.app.bot.get_updates(offset=state.offset, timeout=0, limit=1)
+            except TelegramError as e:
+                logger.warning(f"Failed to confirm update offset for bot {bot_db_id}: {e}")
+        self.states.pop(bot_db_id, None)
+
+    async def swap(self, bot_db_id: int, app: Application, keep_offset: bool = True):
+        """
+        Point a registered bot at a reloaded Application. With the same token the
+        offset carries over and nothing is refetched; updates already fetched by
+        the old app are processed before this returns. A new token starts over.
+        """
+        state = self.states.get(bot_db_id)
+        if state is None or not keep_offset:
+            await self.unregister(bot_db_id)
+            await self.register(bot_db_id, app)
+            return
+        state.app = app
+        # Updates fetched with the old bot are bound to it: let them finish.
+        # Only the poll already in flight matters; later polls use the new bot.
+        deadline = time.monotonic() + 10.0
+        if state.task is not None:
+            await asyncio.wait([state.task], timeout=10.0)
+        fetched = state.updates
+        while state.processed < fetched and time.monotonic() < deadline:
+            await asyncio.sleep(0.02)
+
+    async def stop(self):
+        for bot_db_id in list(self.states):
+            await self.unregister(bot_db_id, drain_timeout=1.0)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # --- Scheduling ---
+
+    def _timeout_for(self, state: BotPollState) -> int:
+        if state.idle_polls == 0:
+            return settings.POLL_MIN_TIMEOUT
+        # Long polls hold a slot: stretch them only while slots are free
+        free = 1 - self.inflight / max(1, settings.POLL_MAX_INFLIGHT)
+        span = settings.POLL_MAX_TIMEOUT - settings.POLL_MIN_TIMEOUT
+        return settings.POLL_MIN_TIMEOUT + int(span * max(0.0, free))
+
+    async def _scheduler(self):
+        while True:
+            now = time.monotonic()
+            next_wake = now + 1.0
+            for state in sorted(self.states.values(), key=lambda s: s.next_poll_at):
+                if state.task is not None or state.stopped:
+                    continue
+                if state.next_poll_at > now:
+                    next_wake = min(next_wake, state.next_poll_at)
+                    break
+                if self.inflight >= settings.POLL_MAX_INFLIGHT:
+                    break
+                if state.backlog >= settings.POLL_MAX_BACKLOG:
+                    # Let the dispatcher catch up before fetching more
+                    state.next_poll_at = now + 0.5
+                    continue
+                self.inflight += 1
+                state.task = asyncio.create_task(self._poll(state))
+
+            self._wake.clear()
+            # asyncio.timeout rather than wait_for: on 3.11 wait_for can swallow a
+            # cancel that races with the wake-up, and stop() would hang
+            try:
+                async with asyncio.timeout(max(0.01, next_wake - time.monotonic())):
+                    await self._wake.wait()
+            except TimeoutError:
+                pass
+
+    async def _poll(self, state: BotPollState):
+        timeout = self._timeout_for(state)
+        state.last_timeout = timeout
+        started = time.monotonic()
+        try:
+            updates = await state.app.bot.get_updates(
+                offset=state.offset,
+                timeout=timeout,
+                limit=self.BATCH_LIMIT,
+                allowed_updates=Update.ALL_TYPES,
+            )
+            state.polls += 1
+            state.error_streak = 0
+            state.last_latency_ms = (time.monotonic() - started) * 1000
+            state.avg_latency_ms = state.last_latency_ms if state.polls == 1 else 0.8 * state.avg_latency_ms + 0.2 * state.last_latency_ms
+
+            if updates:
+                state.offset = updates[-1].update_id + 1
+                state.idle_polls = 0
+                state.next_poll_at = time.monotonic()
+                state.updates += len(updates)
+                state.last_update_at = datetime.now()
+                self._enqueue(state, updates)
+            else:
+                state.idle_polls += 1
+                backoff = min(settings.POLL_IDLE_BACKOFF_MAX, 0.25 * 2 ** (state.idle_polls - 1))
+                state.next_poll_at = time.monotonic() + backoff
+        except asyncio.CancelledError:
+            raise
+        except RetryAfter as e:
+            state.errors += 1
+            state.next_poll_at = time.monotonic() + retry_after_seconds(e)
+        except (InvalidToken, Forbidden) as e:
+            state.errors += 1
+            state.stopped = True
+            logger.error(f"Polling stopped for bot {state.bot_db_id}: {e}")
+        except Exception as e:
+            state.errors += 1
+            state.error_streak += 1
+            delay = min(30.0, 2 ** state.error_streak)
+            if isinstance(e, Conflict):
+                # Another process is polling the same token
+                delay = max(delay, 5.0)
+            logger.warning(f"getUpdates failed for bot {state.bot_db_id} (retry in {delay:.0f}s): {e}")
+            state.next_poll_at = time.monotonic() + delay
+        finally:
+            self.inflight -= 1
+            state.task = None
+            self._wake.set()
+
+    # --- Dispatch ---
+
+    def _enqueue(self, state: BotPollState, updates: list):
+        state.pending.extend(updates)
+        if not state.dispatching:
+            state.dispatching = True
+            self._queue.put_nowait(state)
+
+    async def _worker(self):
+        while True:
+            state = await self._queue.get()
+            try:
+                while state.pending:
+                    update = state.pending.popleft()
+                    try:
+                        await state.app.process_update(update)
+                    except Exception as e:
+                        logger.error(f"Error processing update {update.update_id} for bot {state.bot_db_id}: {e}")
+                    state.processed += 1
+            finally:
+                state.dispatching = False
+                self._queue.task_done()
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "running": self.running,
+            "inflight": self.inflight,
+            "max_inflight": settings.POLL_MAX_INFLIGHT,
+            "dispatch_queue": self._queue.qsize() if self._queue else 0,
+            "bots": [state.snapshot(now) for state in self.states.values()],
+        }
+
+
+polling_supervisor = PollingSupervisor()
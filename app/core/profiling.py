@@ -0,0 +1,119 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from loguru import logger
+from app.core.config import settings
+
+
+class ProfileTarget:
+    def __init__(self, bot_id: int | None, group_id: int | None, count: int, minutes: float):
+        self.bot_id = bot_id
+        self.group_id = group_id
+        self.remaining = count
+        self.expires_at = time.monotonic() + minutes * 60
+
+    def matches(self, bot_db_id: int | None, chat_id: int | None) -> bool:
+        return (self.bot_id is None or self.bot_id == bot_db_id) and (self.group_id is None or self.group_id == chat_id)
+
+    def snapshot(self, now: float) -> dict:
+        return {
+            "bot_id": self.bot_id,
+            "group_id": self.group_id,
+            "remaining": self.remaining,
+            "expires_in": round(max(0.0, self.expires_at - now)),
+        }
+
+
+class RequestProfiler:
+    """
+    Opt-in cProfile dumps of individual bot updates.
+
+    Armed from /admin/profiling with a bot and/or group id and a number of
+    updates; each matching update is profiled and written to PROFILE_DUMP_DIR
+    as `.prof` (pstats format: snakeviz, `python -m pstats`) plus a `.txt`
+    top-40 by cumulative time. One update is profiled at a time, and the
+    profile includes whatever else the event loop ran meanwhile. When nothing
+    is armed the cost is one list check per update.
+    """
+
+    def __init__(self):
+        self.targets: list[ProfileTarget] = []
+        self._busy = False
+
+    def arm(self, bot_id: int | None, group_id: int | None, count: int, minutes: float) -> dict:
+        target = ProfileTarget(bot_id, group_id, count, minutes)
+        self.targets.append(target)
+        logger.info(f"Profiling armed: {target.snapshot(time.monotonic())}")
+        return target.snapshot(time.monotonic())
+
+    def disarm(self):
+        self.targets = []
+
+    def _take(self, bot_db_id: int | None, chat_id: int | None) -> ProfileTarget | None:
+        now = time.monotonic()
+        self.targets = [target for target in self.targets if target.remaining > 0 and target.expires_at > now]
+        for target in self.targets:
+            if target.matches(bot_db_id, chat_id):
+                target.remaining -= 1
+                return target
+        return None
+
+    @contextmanager
+    def profile(self, bot_db_id: int | None, chat_id: int | None):
+        if self._busy or not self.targets or self._take(bot_db_id, chat_id) is None:
+            yield
+            return
+        self._busy = True
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._busy = False
+            self._dump(profiler, bot_db_id, chat_id, time.perf_counter() - started)
+
+    def _dump(self, profiler: cProfile.Profile, bot_db_id: int | None, chat_id: int | None, seconds: float):
+        try:
+            os.makedirs(settings.PROFILE_DUMP_DIR, exist_ok=True)
+            base = f"{datetime.now():%Y%m%d-%H%M%S-%f}_bot{bot_db_id}_chat{chat_id}"
+            path = os.path.join(settings.PROFILE_DUMP_DIR, base)
+            profiler.dump_stats(f"{path}.prof")
+            summary = io.StringIO()
+            summary.write(f"bot {bot_db_id} chat {chat_id}: {seconds * 1000:.1f} ms wall\n\n")
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(40)
+            with open(f"{path}.txt", "w") as f:
+                f.write(summary.getvalue())
+            logger.info(f"Profiled update for bot {bot_db_id} chat {chat_id} ({seconds * 1000:.1f} ms): {base}.prof")
+        except OSError as e:
+            logger.error(f"Failed to write profile dump: {e}")
+
+    # --- Dumps ---
+
+    def dumps(self) -> list[dict]:
+        if not os.path.isdir(settings.PROFILE_DUMP_DIR):
+            return []
+        names = sorted((name for name in os.listdir(settings.PROFILE_DUMP_DIR) if name.endswith((".prof", ".txt"))), reverse=True)
+        return [{"name": name, "size": os.path.getsize(os.path.join(settings.PROFILE_DUMP_DIR, name))} for name in names]
+
+    def dump_path(self, name: str) -> str | None:
+        """Path of an existing dump; None for unknown names or anything outside PROFILE_DUMP_DIR."""
+        if name != os.path.basename(name) or not name.endswith((".prof", ".txt")):
+            return None
+        path = os.path.join(settings.PROFILE_DUMP_DIR, name)
+        return path if os.path.isfile(path) else None
+
+    def snapshot(self) -> dict:
+        now = time.monotonic()
+        return {
+            "targets": [target.snapshot(now) for target in self.targets if target.remaining > 0 and target.expires_at > now],
+            "dumps": self.dumps(),
+        }
+
+
+request_profiler = RequestProfiler()
@@ -0,0 +1,168 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import suppress
+from enum import IntEnum
+from loguru import logger
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+from app.core.config import settings
+from app.core.metrics import metrics
+
+
+def retry_after_seconds(error: RetryAfter) -> float:
+    # RetryAfter.retry_after is an int or a timedelta depending on PTB settings
+    value = error.retry_after
+    return value.total_seconds() if hasattr(value, "total_seconds") else float(value)
+
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` tokens per second, bursts up to `capacity`.
+
+    Callers await `acquire()` before each Bot API call; waiters are served in
+    arrival order so a bulk job cannot starve a single interactive request.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, tokens: float = 1.0) -> float:
+        """Take `tokens` and return 0 if available, else the seconds until they will be."""
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate
+
+    def idle(self) -> bool:
+        """Full and nobody waiting: indistinguishable from a new bucket."""
+        self._refill()
+        return self._tokens >= self.capacity and not self._lock.locked()
+
+    async def acquire(self, tokens: float = 1.0):
+        async with self._lock:
+            while (delay := self.take(tokens)) > 0:
+                await asyncio.sleep(delay)
+
+
+class OutboundPriority(IntEnum):
+    """Pass as `rate_limit_args=` to ExtBot methods; lower is served first."""
+    INTERACTIVE = 0 # Handler replies (the default)
+    NOTIFICATION = 1 # Welcome messages, trial approvals, single admin messages
+    BROADCAST = 2 # Broadcasts and other bulk jobs
+
+
+# Telegram's per-chat limit is on messages posted to the chat; reads and
+# membership calls (getChatMember, leaveChat, ...) only count globally.
+CHAT_PACED_ENDPOINTS = ("send", "edit", "copy", "forward")
+
+
+class OutboundGovernor(BaseRateLimiter[int]):
+    """
+    Outbound scheduler for one bot, installed as the PTB rate limiter of its
+    Application so every Bot API call of the bot passes through it.
+
+    Messages sent or edited in a chat take a token from that chat's bucket
+    (OUTBOUND_CHAT_RATE); every call addressed to a chat then queues for the
+    bot's global bucket (BOT_API_RATE_LIMIT). The queue is served by OutboundPriority, then in
+    arrival order, so a large broadcast cannot delay live transaction replies.
+    Calls without a chat (getUpdates, getMe, webhook setup) pass straight
+    through. A RetryAfter pauses the whole bot for the requested time and the
+    call is queued again, up to OUTBOUND_MAX_RETRIES times.
+    """
+
+    MAX_CHAT_BUCKETS = 4096
+
+    def __init__(self, bot_db_id: int):
+        self.bot_db_id = bot_db_id
+        self._global = TokenBucket(settings.BOT_API_RATE_LIMIT)
+        self._chats: dict[int | str, TokenBucket] = {}
+        self._waiters = [] # heap of (priority, seq, future)
+        self._seq = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+        self._paused_until = 0.0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._dispatcher
+        for _, _, future in self._waiters:
+            future.cancel()
+        self._waiters.clear()
+
+    def queue_depth(self) -> dict[str, int]:
+        depth = {priority.name.lower(): 0 for priority in OutboundPriority}
+        for priority, _, future in self._waiters:
+            if not future.done():
+                depth[OutboundPriority(priority).name.lower()] += 1
+        return depth
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get("chat_id")
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+        priority = OutboundPriority(rate_limit_args or OutboundPriority.INTERACTIVE)
+
+        started = time.monotonic()
+        if settings.OUTBOUND_CHAT_RATE > 0 and endpoint.startswith(CHAT_PACED_ENDPOINTS):
+            await self._chat_bucket(chat_id).acquire()
+        for attempt in range(settings.OUTBOUND_MAX_RETRIES + 1):
+            await self._acquire(priority)
+            if attempt == 0:
+                metrics.record_outbound_wait(priority.name.lower(), time.monotonic() - started)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                metrics.record_retry_after(self.bot_db_id)
+                if attempt == settings.OUTBOUND_MAX_RETRIES:
+                    raise
+                pause = retry_after_seconds(e)
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+                logger.warning(f"Bot {self.bot_db_id} hit flood control on {endpoint}, pausing outbound calls for {pause:g}s")
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= self.MAX_CHAT_BUCKETS:
+                self._chats = {key: bucket for key, bucket in self._chats.items() if not bucket.idle()}
+            bucket = TokenBucket(settings.OUTBOUND_CHAT_RATE, settings.OUTBOUND_CHAT_BURST)
+            self._chats[chat_id] = bucket
+        return bucket
+
+    async def _acquire(self, priority: OutboundPriority):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self):
+        """Hand out global tokens to the best waiter; exits when the queue is empty."""
+        while True:
+            # Waiters cancelled while queued (e.g. their handler timed out)
+            while self._waiters and self._waiters[0][2].done():
+                heapq.heappop(self._waiters)
+            if not self._waiters:
+                return
+            delay = self._paused_until - time.monotonic()
+            if delay <= 0:
+                delay = self._global.take()
+                if delay <= 0:
+                    heapq.heappop(self._waiters)[2].set_result(None)
+                    continue
+            await asyncio.sleep(delay)
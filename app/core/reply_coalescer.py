@@ -0,0 +1,81 @@
+import asyncio
+import time
+from telegram.error import BadRequest
+from loguru import logger
+from app.core.config import settings
+
+
+class ReplyCoalescer:
+    """
+    Debounced bill replies for groups in 合并回复 mode (GroupConfig.reply_debounce).
+
+    `schedule` is called once per recorded transaction; only the latest render
+    per (bot, chat) survives, and it runs once the chat has been quiet for
+    REPLY_DEBOUNCE_SECONDS. If the previous bill in that chat was sent less than
+    REPLY_EDIT_SECONDS ago it is edited in place, otherwise a new message is
+    sent. A burst of N transactions thus costs one Bot API call instead of N.
+    Transactions arriving while a reply is being sent start the next round.
+    """
+
+    def __init__(self):
+        self._renders = {} # (bot_db_id, chat_id) -> (bot, render)
+        self._deadlines: dict[tuple, float] = {}
+        self._tasks: dict[tuple, asyncio.Task] = {}
+        self._last_bill: dict[tuple, tuple[int, float]] = {} # -> (message_id, sent at)
+        self.coalesced = 0
+        self._flush_now = asyncio.Event() # Set at shutdown: stop waiting for quiet
+
+    def schedule(self, bot, bot_db_id: int, chat_id: int, render):
+        """`render()` is awaited at send time and returns (text, reply_markup)."""
+        key = (bot_db_id, chat_id)
+        if key in self._renders:
+            self.coalesced += 1
+        self._renders[key] = (bot, render)
+        self._deadlines[key] = time.monotonic() + settings.REPLY_DEBOUNCE_SECONDS
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._run(key))
+
+    async def _run(self, key: tuple):
+        try:
+            while key in self._renders:
+                delay = self._deadlines[key] - time.monotonic()
+                if delay > 0 and not self._flush_now.is_set():
+                    try:
+                        await asyncio.wait_for(self._flush_now.wait(), delay)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                bot, render = self._renders.pop(key)
+                del self._deadlines[key]
+                try:
+                    await self._send(bot, key, *await render())
+                except Exception as e:
+                    logger.error(f"Debounced bill reply failed for bot {key[0]} chat {key[1]}: {e}")
+        finally:
+            self._tasks.pop(key, None)
+
+    async def _send(self, bot, key: tuple, text: str, reply_markup):
+        chat_id = key[1]
+        last = self._last_bill.get(key)
+        if last and time.monotonic() - last[1] < settings.REPLY_EDIT_SECONDS:
+            try:
+                await bot.edit_message_text(text, chat_id=chat_id, message_id=last[0], parse_mode='HTML', reply_markup=reply_markup)
+                return
+            except BadRequest as e:
+                if "not modified" in str(e).lower():
+                    return
+                # Deleted or too old to edit: fall through to a new message
+        message = await bot.send_message(chat_id, text, parse_mode='HTML', reply_markup=reply_markup)
+        self._last_bill[key] = (message.message_id, time.monotonic())
+
+    async def flush_all(self):
+        """Send every pending reply now (shutdown)."""
+        self._flush_now.set()
+        try:
+            if self._tasks:
+                await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        finally:
+            self._flush_now.clear()
+
+
+reply_coalescer = ReplyCoalescer()
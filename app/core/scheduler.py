@@ -1,19 +1,39 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from loguru import logger
 from app.core.database import AsyncSessionLocal
 from app.services.ledger_service import LedgerService
+from app.services.stats_service import stats_service
 from app.models.group import GroupConfig
+from app.models.cluster import ScheduledRun
 from app.core.config import settings
+from app.core.sharding import shard_coordinator
+from app.core.utils import get_business_day_start
 
 # Initialize Scheduler
 scheduler = AsyncIOScheduler(timezone=settings.TIMEZONE)
 
+SETTLEMENT_RUN = "daily_settlement"
+
 async def daily_settlement_job():
     """
     Daily job at 04:00 AM to stop all active groups.
     Users must manually type /start to resume.
+
+    Also scheduled every minute as a catch-up: the business day it last
+    completed is recorded in scheduled_runs, so a 04:00 tick missed because
+    the leader died with its lease still valid (or every worker was down) is
+    run by the next lease holder. Only groups activated before the business
+    day started are stopped, so a run interrupted half-way can be repeated.
     """
+    # Every worker schedules the job; only the lease holder runs it
+    if not await shard_coordinator.acquire_leadership():
+        return
+    day_start = get_business_day_start().replace(tzinfo=None)
+    async with AsyncSessionLocal() as session:
+        last = await session.get(ScheduledRun, SETTLEMENT_RUN)
+        if last and last.last_run_at >= day_start:
+            return
     logger.info("Running daily settlement job...")
     async with AsyncSessionLocal() as session:
         service = LedgerService(session)
@@ -27,7 +47,10 @@ async def daily_settlement_job():
         #    If private chat is also "active", we stop it too? 
         #    User request: "Only send to activated active groups, not inactive, not private chats"
         
-        stmt = select(GroupConfig).where(GroupConfig.is_active == True)
+        stmt = select(GroupConfig).where(
+            GroupConfig.is_active == True,
+            or_(GroupConfig.active_start_time < day_start, GroupConfig.active_start_time.is_(None))
+        )
         result = await session.execute(stmt)
         groups = result.scalars().all()
         
@@ -50,11 +73,53 @@ async def daily_settlement_job():
             # Stop recording (Silent settlement)
             await service.stop_recording(group.group_id, group.bot_id)
             count += 1
-                
+
+        await session.merge(ScheduledRun(name=SETTLEMENT_RUN, last_run_at=day_start))
+        await session.commit()
         logger.info(f"Daily settlement completed. Silently stopped recording for {count} groups.")
 
+async def stats_reconcile_job():
+    """
+    Recount dashboard stats from the DB to correct drift in the incremental counters.
+    """
+    async with AsyncSessionLocal() as session:
+        await stats_service.reconcile(session)
+
+async def idle_bot_eviction_job():
+    """
+    Lazy mode: shut down bots that have been idle longer than BOT_IDLE_EVICT_SECONDS.
+    Sharded mode: also drops send-only copies of bots owned by other workers.
+    """
+    # Avoid circular import
+    from app.core.bot_manager import bot_manager
+    await bot_manager.evict_idle()
+
+async def bot_health_job():
+    """
+    Restart bots whose Application, updater or polling loop died, or whose
+    handlers keep failing.
+    """
+    # Avoid circular import
+    from app.core.health import bot_health
+    await bot_health.check()
+
 def start_scheduler():
     # Run at 04:00 every day
     # Use 'cron' trigger
     scheduler.add_job(daily_settlement_job, 'cron', hour=4, minute=0, id="daily_settlement")
+    # Catch-up when the 04:00 run was missed (see daily_settlement_job)
+    scheduler.add_job(daily_settlement_job, 'interval', minutes=1, id="daily_settlement_catchup")
+    scheduler.add_job(
+        stats_reconcile_job, 'interval',
+        minutes=settings.STATS_RECONCILE_MINUTES, id="stats_reconcile"
+    )
+    if (settings.BOT_LAZY_START and settings.TG_MODE == "webhook") or settings.SHARDING_ENABLED:
+        scheduler.add_job(
+            idle_bot_eviction_job, 'interval',
+            seconds=max(60, settings.BOT_IDLE_EVICT_SECONDS // 4), id="idle_bot_eviction"
+        )
+    scheduler.add_job(
+        bot_health_job, 'interval',
+        seconds=settings.BOT_HEALTH_CHECK_SECONDS, id="bot_health"
+    )
     scheduler.start()
@@ -0,0 +1,286 @@
+import asyncio
+import bisect
+import hashlib
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Dict
+import httpx
+from sqlalchemy import select, update, delete, insert
+from sqlalchemy.exc import IntegrityError
+from loguru import logger
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.bot import Bot
+from app.models.cluster import WorkerNode, LeaderLock
+
+FORWARDED_HEADER = "X-Shard-Forwarded"
+INTERNAL_SECRET_HEADER = "X-Internal-Secret"
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Consistent hash ring of worker ids, `vnodes` points per worker."""
+
+    def __init__(self, nodes: list[str], vnodes: int = 64):
+        self.nodes = sorted(nodes)
+        points = sorted((_hash(f"{node}#{i}"), node) for node in self.nodes for i in range(vnodes))
+        self._keys = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def owner(self, bot_id: int) -> str | None:
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(f"bot:{bot_id}")) % len(self._keys)
+        return self._owners[index]
+
+
+class ShardCoordinator:
+    """
+    Worker membership, bot ownership and the scheduler leader lease.
+
+    Every worker heartbeats into `worker_nodes`; live workers form a HashRing
+    that decides which worker runs each bot. On membership changes the worker
+    starts bots it gained and shuts down bots it lost (without touching their
+    webhooks). Webhooks and admin start/stop calls for bots owned elsewhere are
+    forwarded to the owner over HTTP. With SHARDING_ENABLED off this worker owns
+    everything and is always the leader.
+    """
+
+    SCHEDULER_LOCK = "scheduler"
+
+    def __init__(self):
+        self.enabled = settings.SHARDING_ENABLED
+        self.worker_id = settings.WORKER_ID or f"{socket.gethostname()}-{os.getpid()}"
+        self.url = (settings.WORKER_URL or f"http://{socket.gethostname()}:8000").rstrip("/")
+        self.members: Dict[str, str] = {}
+        self.ring = HashRing([self.worker_id], settings.SHARD_VNODES)
+        self.is_leader = not self.enabled
+        self._task: asyncio.Task | None = None
+        self._client: httpx.AsyncClient | None = None
+
+    @property
+    def internal_secret(self) -> str:
+        return settings.INTERNAL_API_SECRET or hashlib.sha256(f"internal_{settings.SECRET_KEY}".encode()).hexdigest()
+
+    # --- Ownership ---
+
+    def owner(self, bot_id: int) -> str:
+        if not self.enabled:
+            return self.worker_id
+        return self.ring.owner(bot_id) or self.worker_id
+
+    def owns(self, bot_id: int) -> bool:
+        return self.owner(bot_id) == self.worker_id
+
+    def owner_url(self, bot_id: int) -> str:
+        return self.members.get(self.owner(bot_id), self.url)
+
+    # --- Lifecycle ---
+
+    async def start(self):
+        if not self.enabled:
+            return
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=5.0))
+        # Announce ourselves and give peers starting at the same time a moment to
+        # do the same, so the first rebalance doesn't grab every bot
+        await self._register()
+        await asyncio.sleep(1.0)
+        await self.heartbeat()
+        self._task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"Shard worker {self.worker_id} joined ({len(self.members)} workers)")
+
+    async def stop(self):
+        if not self.enabled:
+            return
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(WorkerNode).where(WorkerNode.worker_id == self.worker_id))
+            await session.execute(
+                update(LeaderLock)
+                .where(LeaderLock.name == self.SCHEDULER_LOCK, LeaderLock.holder == self.worker_id)
+                .values(expires_at=datetime.now())
+            )
+            await session.commit()
+        if self._client:
+            await self._client.aclose()
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(settings.WORKER_HEARTBEAT_SECONDS)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.error(f"Shard heartbeat failed: {e}")
+
+    async def _register(self):
+        now = datetime.now()
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(WorkerNode).where(WorkerNode.worker_id == self.worker_id).values(url=self.url, heartbeat_at=now)
+            )
+            if result.rowcount == 0:
+                session.add(WorkerNode(worker_id=self.worker_id, url=self.url, heartbeat_at=now, started_at=now))
+            await session.commit()
+
+    async def heartbeat(self):
+        await self._register()
+        now = datetime.now()
+        async with AsyncSessionLocal() as session:
+            alive = (await session.execute(
+                select(WorkerNode.worker_id, WorkerNode.url)
+                .where(WorkerNode.heartbeat_at >= now - timedelta(seconds=settings.WORKER_TTL_SECONDS))
+            )).all()
+
+        members = {row.worker_id: row.url for row in alive}
+        members[self.worker_id] = self.url
+        changed = set(members) != set(self.members)
+        self.members = members
+        if changed:
+            self.ring = HashRing(list(members), settings.SHARD_VNODES)
+            logger.info(f"Shard membership changed: {sorted(members)}")
+            await self.rebalance()
+
+        await self.acquire_leadership()
+
+    async def acquire_leadership(self) -> bool:
+        """Take or renew the scheduler lease; returns whether this worker holds it."""
+        if not self.enabled:
+            return True
+        now = datetime.now()
+        expires = now + timedelta(seconds=settings.WORKER_TTL_SECONDS)
+        async with AsyncSessionLocal() as session:
+            result = await session.execute(
+                update(LeaderLock)
+                .where(
+                    LeaderLock.name == self.SCHEDULER_LOCK,
+                    (LeaderLock.holder == self.worker_id) | (LeaderLock.expires_at < now) | (LeaderLock.expires_at.is_(None)),
+                )
+                .values(holder=self.worker_id, expires_at=expires)
+            )
+            acquired = result.rowcount > 0
+            if not acquired:
+                exists = await session.scalar(select(LeaderLock.name).where(LeaderLock.name == self.SCHEDULER_LOCK))
+                if exists is None:
+                    try:
+                        await session.execute(
+                            insert(LeaderLock).values(name=self.SCHEDULER_LOCK, holder=self.worker_id, expires_at=expires)
+                        )
+                        acquired = True
+                    except IntegrityError:
+                        await session.rollback()
+            await session.commit()
+
+        if acquired != self.is_leader:
+            logger.info(f"Shard worker {self.worker_id} {'acquired' if acquired else 'lost'} scheduler leadership")
+        self.is_leader = acquired
+        return acquired
+
+    async def rebalance(self):
+        """Start bots this worker now owns and release the ones it lost."""
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        async with AsyncSessionLocal() as session:
+            bots = (await session.execute(select(Bot.id, Bot.token).where(Bot.status == "active"))).all()
+
+        owned = {bot.id for bot in bots if self.owns(bot.id)}
+        for bot_id in list(bot_manager.apps):
+            if bot_id not in owned and bot_id not in bot_manager.send_only:
+                await bot_manager.stop_bot(bot_id, release_webhook=False)
+        if not bot_manager.lazy:
+            to_start = [
+                bot for bot in bots
+                if bot.id in owned and (bot.id not in bot_manager.apps or bot.id in bot_manager.send_only)
+            ]
+            if to_start:
+                await bot_manager.start_all_bots(to_start)
+
+    # --- Forwarding ---
+
+    async def forward(self, bot_id: int, path: str, body: bytes, headers: dict) -> httpx.Response:
+        url = f"{self.owner_url(bot_id)}{path}"
+        headers = {**headers, FORWARDED_HEADER: self.worker_id, INTERNAL_SECRET_HEADER: self.internal_secret}
+        return await self._client.post(url, content=body, headers=headers)
+
+    async def _forward_action(self, bot_id: int, action: str) -> bool:
+        """POST /internal/bots/{id}/{action} to the owner; False when it is unreachable or refuses."""
+        try:
+            response = await self.forward(bot_id, f"/internal/bots/{bot_id}/{action}", b"", {})
+            return response.status_code == 200 and response.json().get("success", False)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not {action} bot {bot_id} on its owner: {e}")
+            return False
+
+    async def start_bot(self, bot_id: int) -> bool:
+        """Start a bot on its owning worker."""
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        if self.owns(bot_id):
+            async with AsyncSessionLocal() as session:
+                bot = await session.get(Bot, bot_id)
+            return bool(bot) and await bot_manager.start_bot(bot.token, bot.id)
+        return await self._forward_action(bot_id, "start")
+
+    async def reload_bot(self, bot_id: int) -> bool:
+        """Hot-reload a bot from its DB row on its owning worker."""
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        if self.owns(bot_id):
+            async with AsyncSessionLocal() as session:
+                bot = await session.get(Bot, bot_id)
+            return bool(bot) and await bot_manager.reload_bot(bot.token, bot.id)
+        if bot_id in bot_manager.send_only:
+            # Rebuilt from the DB row on next use
+            await bot_manager.stop_bot(bot_id, release_webhook=False)
+        return await self._forward_action(bot_id, "reload")
+
+    async def stop_bot(self, bot_id: int) -> bool:
+        """Stop a bot on its owning worker (and drop any send-only copy here)."""
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        if self.owns(bot_id):
+            await bot_manager.stop_bot(bot_id)
+            return True
+        await bot_manager.stop_bot(bot_id, release_webhook=False)
+        return await self._forward_action(bot_id, "stop")
+
+    async def fetch_job(self, job_id: str) -> dict | None:
+        """A background job created on another live worker (see JobRegistry), or None."""
+        worker = job_id.partition(".")[2]
+        url = self.members.get(worker)
+        if not self.enabled or not url or worker == self.worker_id:
+            return None
+        headers = {FORWARDED_HEADER: self.worker_id, INTERNAL_SECRET_HEADER: self.internal_secret}
+        try:
+            response = await self._client.post(f"{url}/internal/jobs/{job_id}", headers=headers)
+            return response.json().get("job") if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning(f"Could not fetch job {job_id} from worker {worker}: {e}")
+            return None
+
+    async def invalidate_bot_config(self, bot_id: int) -> bool:
+        """Drop a bot's cached settings here and on its owning worker (best effort: the cache has a TTL)."""
+        # Avoid circular import
+        from app.services.config_service import invalidate_bot_config
+
+        invalidate_bot_config(bot_id)
+        if self.owns(bot_id):
+            return True
+        try:
+            response = await self.forward(bot_id, f"/internal/bots/{bot_id}/invalidate_config", b"", {})
+            return response.status_code == 200
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not invalidate bot {bot_id} config on its owner: {e}")
+            return False
+
+
+shard_coordinator = ShardCoordinator()
@@ -0,0 +1,40 @@
+import time
+from contextlib import contextmanager
+from loguru import logger
+from app.core.config import settings
+
+
+class StartupProfile:
+    """
+    Wall time of startup phases (module imports, schema check, stats priming,
+    bot startup...). Logged as one table once startup finishes when
+    STARTUP_PROFILE is on; `scripts/bench_cold_start.py --profile` adds a
+    per-module import breakdown.
+    """
+
+    def __init__(self):
+        self.phases: list[tuple[str, float]] = []
+
+    def record(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def report(self) -> dict:
+        return {name: round(seconds * 1000, 1) for name, seconds in self.phases}
+
+    def log(self):
+        if not settings.STARTUP_PROFILE:
+            return
+        total = sum(seconds for _, seconds in self.phases)
+        lines = [f"  {name:<24}{seconds * 1000:>9.1f} ms" for name, seconds in self.phases]
+        logger.info("Startup profile:\n" + "\n".join(lines) + f"\n  {'total':<24}{total * 1000:>9.1f} ms")
+
+
+startup_profile = StartupProfile()
@@ -0,0 +1,162 @@
+import asyncio
+import time
+import httpx
+from typing import Callable, Dict, List
+from loguru import logger
+from telegram.error import TelegramError, TimedOut
+from telegram.request import BaseRequest, HTTPXRequest
+from app.core.config import settings
+from app.core.metrics import metrics
+
+_DefaultValue = type(BaseRequest.DEFAULT_NONE)
+
+
+class SharedHTTPXRequest(HTTPXRequest):
+    """
+    HTTPXRequest that borrows its httpx client from `TelegramHTTPPool` instead of
+    owning one. Shutting a bot down leaves the shared client open; the pool is
+    closed once at application exit.
+
+    Requests queue on the shard's semaphore before reaching httpx: httpcore's
+    own pool times out connects when far more requests wait than it has
+    connections, which is the normal state of a pool shared by hundreds of bots.
+    """
+
+    def __init__(self, client_factory: Callable[[], httpx.AsyncClient], slots_factory: Callable[[], asyncio.Semaphore], **kwargs):
+        self._client_factory = client_factory
+        self._slots_factory = slots_factory
+        super().__init__(**kwargs)
+
+    def _build_client(self) -> httpx.AsyncClient:
+        return self._client_factory()
+
+    async def do_request(
+        self,
+        url: str,
+        method: str,
+        request_data=None,
+        read_timeout=BaseRequest.DEFAULT_NONE,
+        write_timeout=BaseRequest.DEFAULT_NONE,
+        connect_timeout=BaseRequest.DEFAULT_NONE,
+        pool_timeout=BaseRequest.DEFAULT_NONE,
+    ) -> tuple[int, bytes]:
+        slots = self._slots_factory()
+        wait = self._client.timeout.pool if isinstance(pool_timeout, _DefaultValue) else pool_timeout
+        try:
+            async with asyncio.timeout(wait):
+                await slots.acquire()
+        except TimeoutError as err:
+            raise TimedOut(
+                message="Pool timeout: all shared connections are busy. Request was *not* sent to Telegram."
+            ) from err
+        started = time.perf_counter()
+        status = "exception"
+        try:
+            status, payload = await super().do_request(
+                url, method, request_data, read_timeout, write_timeout, connect_timeout, pool_timeout
+            )
+            return status, payload
+        except TelegramError as err:
+            status = type(err).__name__
+            raise
+        finally:
+            slots.release()
+            metrics.record_telegram(url.rsplit("/", 1)[-1], time.perf_counter() - started, status)
+
+    async def shutdown(self) -> None:
+        # The client belongs to the shared pool
+        return
+
+
+class TelegramHTTPPool:
+    """
+    Outbound Bot API connection pools shared by every bot.
+
+    Regular API calls and long-polling getUpdates use separate pools so parked
+    long polls never starve sendMessage. The API pool is split into
+    TG_HTTP_POOL_SHARDS clients of TG_HTTP_MAX_CONNECTIONS each; a bot always
+    maps to the same shard.
+    """
+
+    API = "api"
+    GET_UPDATES = "get_updates"
+
+    def __init__(self):
+        self._shards: Dict[str, List[httpx.AsyncClient]] = {}
+        self._slots: Dict[str, List[asyncio.Semaphore]] = {}
+        self._http2 = settings.TG_HTTP2
+
+    def _max_connections(self, kind: str) -> int:
+        return settings.TG_HTTP_MAX_CONNECTIONS if kind == self.API else settings.TG_GET_UPDATES_MAX_CONNECTIONS
+
+    def _shard_count(self, kind: str) -> int:
+        # Each bot parks at most one long poll, so getUpdates never contends: one client
+        return max(1, settings.TG_HTTP_POOL_SHARDS) if kind == self.API else 1
+
+    def _build(self, kind: str) -> httpx.AsyncClient:
+        max_connections = self._max_connections(kind)
+        limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(settings.TG_HTTP_MAX_KEEPALIVE, max_connections),
+            keepalive_expiry=settings.TG_HTTP_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(connect=5.0, read=5.0, write=5.0, pool=settings.TG_HTTP_POOL_TIMEOUT)
+        if self._http2:
+            try:
+                return httpx.AsyncClient(limits=limits, timeout=timeout, http1=False, http2=True)
+            except ImportError:
+                logger.warning("TG_HTTP2 needs `pip install httpx[http2]`; falling back to HTTP/1.1")
+                self._http2 = False
+        return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    def client(self, kind: str, shard_key: int) -> httpx.AsyncClient:
+        shards = self._shards.get(kind)
+        if shards is None:
+            shards = [self._build(kind) for _ in range(self._shard_count(kind))]
+            self._shards[kind] = shards
+        index = shard_key % len(shards)
+        if shards[index].is_closed:
+            shards[index] = self._build(kind)
+        return shards[index]
+
+    def slots(self, kind: str, shard_key: int) -> asyncio.Semaphore:
+        slots = self._slots.get(kind)
+        if slots is None:
+            slots = [asyncio.Semaphore(self._max_connections(kind)) for _ in range(self._shard_count(kind))]
+            self._slots[kind] = slots
+        return slots[shard_key % len(slots)]
+
+    def bot_request_kwargs(self, bot_db_id: int) -> dict:
+        """
+        `request` / `get_updates_request` (plus `base_url` when overridden) for a
+        bot's ExtBot or ApplicationBuilder. Empty when the shared pool is disabled,
+        in which case PTB builds its own per-bot pools.
+        """
+        kwargs = {}
+        if settings.TG_HTTP_SHARED_POOL:
+            http_version = "2" if self._http2 else "1.1"
+            kwargs["request"] = SharedHTTPXRequest(
+                lambda: self.client(self.API, bot_db_id),
+                lambda: self.slots(self.API, bot_db_id),
+                pool_timeout=settings.TG_HTTP_POOL_TIMEOUT,
+                http_version=http_version,
+            )
+            kwargs["get_updates_request"] = SharedHTTPXRequest(
+                lambda: self.client(self.GET_UPDATES, bot_db_id),
+                lambda: self.slots(self.GET_UPDATES, bot_db_id),
+                http_version=http_version,
+            )
+        if settings.TG_API_BASE_URL:
+            kwargs["base_url"] = settings.TG_API_BASE_URL
+            kwargs["base_file_url"] = settings.TG_API_BASE_URL.rstrip("/").removesuffix("/bot") + "/file/bot"
+        return kwargs
+
+    async def aclose(self):
+        for shards in self._shards.values():
+            for client in shards:
+                await client.aclose()
+        self._shards = {}
+        self._slots = {}
+
+
+telegram_http = TelegramHTTPPool()
@@ -0,0 +1,141 @@
+import random
+from contextlib import contextmanager
+from datetime import datetime
+from loguru import logger
+from app.core.config import settings
+
+# Never worth a trace: probes and scrapes
+UNTRACED_PATHS = {"/health", "/metrics", "/"}
+
+
+def _parse_timestamp(value) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return None
+
+
+class SamplingPolicy:
+    """
+    Which Sentry transactions are recorded and which are sent.
+
+    At the start of a transaction `traces_sampler` records a share of them
+    (`record_rate`). When a recorded transaction finishes,
+    `before_send_transaction` always keeps failed ones (non-ok status on the
+    transaction or any span) and ones slower than `slow_ms`. Others are sent
+    with probability `keep_rate`. Profiles are taken for `profiles_rate` of
+    the recorded transactions. All four can be changed at runtime through
+    /admin/sentry/sampling; changes apply to this process only.
+    """
+
+    FIELDS = ("record_rate", "keep_rate", "slow_ms", "profiles_rate")
+
+    def __init__(self):
+        self.record_rate = settings.SENTRY_TRACES_RECORD_RATE
+        self.keep_rate = settings.SENTRY_TRACES_SAMPLE_RATE
+        self.slow_ms = settings.SENTRY_SLOW_TRANSACTION_MS
+        self.profiles_rate = settings.SENTRY_PROFILES_SAMPLE_RATE
+        self.counts = {"error": 0, "slow": 0, "sampled": 0, "dropped": 0}
+
+    def update(self, **values):
+        for name, value in values.items():
+            if value is None:
+                continue
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown sampling setting: {name}")
+            if name == "slow_ms":
+                if value < 0:
+                    raise ValueError("slow_ms must be >= 0")
+            elif not 0.0 <= value <= 1.0:
+                raise ValueError(f"{name} must be between 0 and 1")
+            setattr(self, name, value)
+        logger.info(f"Sentry sampling updated: {self.snapshot()}")
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": bool(settings.SENTRY_DSN),
+            **{name: getattr(self, name) for name in self.FIELDS},
+            "sent": dict(self.counts),
+        }
+
+    # --- Sentry callbacks ---
+
+    def traces_sampler(self, sampling_context: dict) -> float:
+        parent_sampled = sampling_context.get("parent_sampled")
+        if parent_sampled is not None:
+            return float(parent_sampled)
+        scope = sampling_context.get("asgi_scope") or {}
+        if scope.get("path") in UNTRACED_PATHS:
+            return 0.0
+        return self.record_rate
+
+    def profiles_sampler(self, sampling_context: dict) -> float:
+        return self.profiles_rate
+
+    def classify(self, event: dict) -> str:
+        """Verdict for a finished transaction event: error, slow, sampled or dropped."""
+        status = event.get("contexts", {}).get("trace", {}).get("status")
+        if status not in (None, "ok") or any(span.get("status") not in (None, "ok") for span in event.get("spans") or ()):
+            return "error"
+        started, finished = _parse_timestamp(event.get("start_timestamp")), _parse_timestamp(event.get("timestamp"))
+        if started and finished and (finished - started).total_seconds() * 1000 >= self.slow_ms:
+            return "slow"
+        return "sampled" if random.random() < self.keep_rate else "dropped"
+
+    def before_send_transaction(self, event: dict, hint: dict):
+        verdict = self.classify(event)
+        self.counts[verdict] += 1
+        return None if verdict == "dropped" else event
+
+
+class Tracing:
+    """Sentry setup plus the update-level transaction used for bot updates."""
+
+    def __init__(self):
+        self.enabled = False
+        self.policy = SamplingPolicy()
+
+    def init(self):
+        # Imported only when configured: sentry_sdk is slow to import
+        import sentry_sdk
+        sentry_sdk.init(
+            dsn=settings.SENTRY_DSN,
+            traces_sampler=self.policy.traces_sampler,
+            profiles_sampler=self.policy.profiles_sampler,
+            before_send_transaction=self.policy.before_send_transaction,
+        )
+        self.enabled = True
+
+    @contextmanager
+    def update_transaction(self, bot_db_id: int | None, chat_id: int | None):
+        """
+        Transaction around one bot update (polling mode), or a span inside the
+        webhook request's transaction.
+        """
+        if not self.enabled:
+            yield
+            return
+        import sentry_sdk
+        if sentry_sdk.get_current_span() is not None:
+            context = sentry_sdk.start_span(op="bot.update", name=f"bot {bot_db_id}")
+        else:
+            context = sentry_sdk.start_transaction(op="bot.update", name="bot update")
+        with context as span:
+            span.set_tag("bot_id", str(bot_db_id))
+            span.set_tag("chat_id", str(chat_id))
+            yield
+
+    def mark_error(self):
+        """Flag the current transaction as failed so the policy keeps it (handler errors are caught by PTB)."""
+        if not self.enabled:
+            return
+        import sentry_sdk
+        span = sentry_sdk.get_current_span()
+        if span is not None:
+            span.set_status("internal_error")
+            if span.containing_transaction is not None:
+                span.containing_transaction.set_status("internal_error")
+
+
+tracing = Tracing()
@@ -1,4 +1,4 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 import pytz
 from app.core.config import settings
@@ -50,3 +50,15 @@ def to_timezone(dt: datetime):
         # IF we consistently insert in target timezone.
         return tz.localize(dt)
     return dt.astimezone(tz)
+
+def get_business_day_start(now: datetime = None) -> datetime:
+    """Returns the start of the current 4AM-4AM business day (same tz as `now`)"""
+    now = now or get_now()
+    if now.hour < 4:
+        start_date = now.date() - timedelta(days=1)
+    else:
+        start_date = now.date()
+    start_time = datetime.combine(start_date, time(4, 0))
+    if now.tzinfo:
+        start_time = now.tzinfo.localize(start_time)
+    return start_time
@@ -1,25 +1,40 @@
-from fastapi import FastAPI
+import time
+_import_started = time.perf_counter()
+
+import secrets
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
-import sentry_sdk
 from app.core.config import settings
-from app.core.database import engine, Base, AsyncSessionLocal
+from app.core.database import AsyncSessionLocal, ensure_schema
+from app.core.startup_profile import startup_profile
 from app.core.bot_manager import bot_manager
+from app.core.telegram_http import telegram_http
+from app.core.polling import polling_supervisor
+from app.core.sharding import shard_coordinator
+from app.core.health import bot_health
+from app.core.metrics import metrics
+from app.core.tracing import tracing
+from app.core.log import setup_logging
+from app.core.reply_coalescer import reply_coalescer
 from app.models.bot import Bot
 from app.models.group import GroupConfig, Operator, LedgerRecord, LicenseCode
 from app.models.audit import AuditLog
+from app.models.cluster import WorkerNode, LeaderLock, ScheduledRun
 from app.core.scheduler import start_scheduler, scheduler
+from app.services.stats_service import stats_service
 from sqlalchemy import select
 from loguru import logger
-from app.api import admin, webhook, dashboard, customer
+from app.api import admin, webhook, dashboard, customer, internal
 from app.api.bill import router as bill_router
 
-# Initialize Sentry
+startup_profile.record("import app.main", time.perf_counter() - _import_started)
+
+setup_logging()
+
+# Initialize Sentry with the adaptive sampling policy (see app/core/tracing.py)
 if settings.SENTRY_DSN:
-    sentry_sdk.init(
-        dsn=settings.SENTRY_DSN,
-        traces_sample_rate=1.0,
-        profiles_sample_rate=1.0,
-    )
+    tracing.init()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -27,24 +42,40 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up...")
     
     # Start Scheduler
-    start_scheduler()
+    with startup_profile.phase("scheduler"):
+        start_scheduler()
     logger.info("Scheduler started.")
     
-    # Create DB Tables (for demo purposes)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Create DB Tables (for demo purposes; skipped once migrations are at head)
+    with startup_profile.phase("schema"):
+        if not await ensure_schema():
+            logger.info("Database is at the Alembic head; skipping create_all.")
     
     # Load Active Bots
     async with AsyncSessionLocal() as session:
+        # Prime dashboard counters before serving
+        with startup_profile.phase("stats reconcile"):
+            await stats_service.reconcile(session)
+
         result = await session.execute(select(Bot).where(Bot.status == "active"))
         bots = result.scalars().all()
         
-        if bots:
+        if shard_coordinator.enabled:
+            logger.info(f"Found {len(bots)} active bots. Sharded mode: starting the ones this worker owns.")
+        elif bots and bot_manager.lazy:
+            logger.info(f"Found {len(bots)} active bots. Lazy mode: each starts on its first update.")
+        elif bots:
             logger.info(f"Found {len(bots)} active bots. Starting them in parallel...")
             # Use the new parallel startup
-            await bot_manager.start_all_bots(bots)
+            with startup_profile.phase(f"start {len(bots)} bots"):
+                await bot_manager.start_all_bots(bots)
         else:
             logger.info("No active bots found.")
+
+    # Joins the cluster and starts owned bots (no-op unless SHARDING_ENABLED)
+    with startup_profile.phase("join shard cluster"):
+        await shard_coordinator.start()
+    startup_profile.log()
             
     yield
     
@@ -54,9 +85,19 @@ async def lifespan(app: FastAPI):
     # Stop Scheduler
     scheduler.shutdown()
     
-    # Stop all bots
+    # Leave the cluster first so peers pick up our bots on their next heartbeat
+    await shard_coordinator.stop()
+
+    # Send bill replies still waiting for a quiet window while bots can send
+    await reply_coalescer.flush_all()
+
+    # Stop all bots (in sharded mode the new owner keeps using the webhook)
     for bot_id in list(bot_manager.apps.keys()):
-        await bot_manager.stop_bot(bot_id)
+        await bot_manager.stop_bot(bot_id, release_webhook=not shard_coordinator.enabled)
+    await polling_supervisor.stop()
+    await telegram_http.aclose()
+    # Flush lines still queued for the background log writer
+    await logger.complete()
 
 app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
@@ -65,7 +106,27 @@ app.include_router(customer.router, prefix="/customer", tags=["Customer"])
 app.include_router(webhook.router, prefix="/telegram", tags=["Webhook"])
 app.include_router(bill_router, tags=["bill"])
 app.include_router(dashboard.router, tags=["dashboard"])
+app.include_router(internal.router, prefix="/internal", tags=["Internal"], include_in_schema=False)
 
 @app.get("/")
 async def root():
     return {"message": "HuiYing Ledger Platform V3 Running"}
+
+@app.get("/health")
+async def health():
+    """Per-bot health for the watchdog: 503 only when the health checks themselves stopped running."""
+    report = bot_health.report()
+    return JSONResponse(report, status_code=503 if report["status"] == "stalled" else 200)
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus scrape endpoint (METRICS_ENABLED); not served until METRICS_TOKEN is set."""
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Metrics endpoint requires METRICS_TOKEN")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not secrets.compare_digest(supplied, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
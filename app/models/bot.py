@@ -21,6 +21,11 @@ class Bot(Base):
     web_username = Column(String, unique=True, nullable=True) # Custom login account
     web_password = Column(String, nullable=True)
 
+    # Cached get_me() result, used to activate the bot without a network call (lazy mode)
+    tg_user_id = Column(BigInteger, nullable=True)
+    tg_username = Column(String, nullable=True)
+    tg_first_name = Column(String, nullable=True)
+
     # Relationships
     fee_template = relationship("BotFeeTemplate", back_populates="bot", uselist=False)
     exchange_template = relationship("BotExchangeTemplate", back_populates="bot", uselist=False)
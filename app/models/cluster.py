@@ -0,0 +1,24 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class WorkerNode(Base):
+    __tablename__ = "worker_nodes"
+
+    worker_id = Column(String, primary_key=True) # e.g. "app-1-8123"
+    url = Column(String, nullable=False) # Internal base URL other workers forward to
+    heartbeat_at = Column(DateTime, nullable=False, index=True)
+    started_at = Column(DateTime, default=func.now())
+
+class LeaderLock(Base):
+    __tablename__ = "leader_locks"
+
+    name = Column(String, primary_key=True) # e.g. "scheduler"
+    holder = Column(String, nullable=True) # worker_id
+    expires_at = Column(DateTime, nullable=True)
+
+class ScheduledRun(Base):
+    __tablename__ = "scheduled_runs"
+
+    name = Column(String, primary_key=True) # e.g. "daily_settlement"
+    last_run_at = Column(DateTime, nullable=False) # Start of the last period the job completed
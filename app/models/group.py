@@ -1,7 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, BigInteger, Numeric, Table
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Boolean, BigInteger, Numeric, Table, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 from sqlalchemy.sql import func
+from dataclasses import dataclass, fields
+from datetime import datetime
+from decimal import Decimal
 
 # Association Table for Many-to-Many
 group_category_association = Table(
@@ -47,6 +50,7 @@ class GroupConfig(Base):
     # Display Modes
     decimal_mode = Column(Boolean, default=True) # True=Show decimals, False=No decimals
     simple_mode = Column(Boolean, default=False) # True=只显示入款简洁模式
+    reply_debounce = Column(Boolean, default=False) # True=合并回复: one bill reply per burst of transactions
     
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
@@ -54,6 +58,63 @@ class GroupConfig(Base):
     expire_at = Column(DateTime, nullable=True) # Expiration date
     license_key = Column(String, nullable=True) # Bound license key
 
+    __table_args__ = (
+        # Keyset pagination of a bot's group listing (see GroupQueryService);
+        # the unfiltered admin listing walks the primary key
+        Index("ix_group_configs_bot_id_id", "bot_id", "id"),
+    )
+
+@dataclass(frozen=True, slots=True)
+class GroupConfigView:
+    """
+    Read-only snapshot of a GroupConfig row, as returned by
+    LedgerService.get_group_config whether it came from the cache or the DB.
+    Not bound to a session: change settings via LedgerService.update_group_config.
+    Fields mirror the GroupConfig columns (tests/verify_group_config_view.py).
+    """
+
+    id: int | None
+    bot_id: int | None
+    group_id: int
+    group_name: str | None = None
+    is_active: bool = False
+    active_start_time: datetime | None = None
+    fee_percent: Decimal = Decimal("0.00")
+    usd_rate: Decimal = Decimal("0.0000")
+    php_rate: Decimal = Decimal("0.0000")
+    myr_rate: Decimal = Decimal("0.0000")
+    thb_rate: Decimal = Decimal("0.0000")
+    decimal_mode: bool = True
+    simple_mode: bool = False
+    reply_debounce: bool = False
+    updated_at: datetime | None = None
+    expire_at: datetime | None = None
+    license_key: str | None = None
+
+    @classmethod
+    def from_row(cls, row: dict) -> "GroupConfigView":
+        """
+        From a column dict (DB row or cache entry). Rates are coerced to Decimal
+        (None -> 0) and datetime strings from old JSON cache entries parsed;
+        keys that are not fields are ignored.
+        """
+        values = {name: row[name] for name in _VIEW_FIELDS if name in row}
+        for name in _VIEW_DECIMALS:
+            value = values.get(name)
+            if not isinstance(value, Decimal):
+                values[name] = Decimal(str(value)) if value is not None else Decimal(0)
+        for name in _VIEW_DATETIMES:
+            value = values.get(name)
+            if isinstance(value, str):
+                values[name] = datetime.fromisoformat(value) if value != "None" else None
+        return cls(**values)
+
+
+_VIEW_FIELDS = tuple(field.name for field in fields(GroupConfigView))
+_VIEW_DECIMALS = ("fee_percent", "usd_rate", "php_rate", "myr_rate", "thb_rate")
+_VIEW_DATETIMES = ("active_start_time", "updated_at", "expire_at")
+
+
 class LicenseCode(Base):
     __tablename__ = "license_codes"
     
@@ -6,20 +6,23 @@ from loguru import logger
 from telegram.error import Forbidden, BadRequest
 
 from app.models.group import GroupConfig
+from app.core.metrics import metrics
+from app.core.rate_limit import OutboundPriority
 # from app.core.bot_manager import bot_manager  <-- Moved inside method to avoid circular import
 
 class BroadcastService:
     def __init__(self, session: AsyncSession):
         self.session = session
 
-    async def broadcast_to_bot_groups(self, bot_id: int, message: str, sleep_interval: float = 0.05) -> dict:
+    async def broadcast_to_bot_groups(self, bot_id: int, message: str, sleep_interval: float = 0.0) -> dict:
         """
         Broadcast a message to all active groups of a specific bot.
         
         Args:
             bot_id: Database ID of the bot
             message: Message content
-            sleep_interval: Time to sleep between sends to avoid flood limits (default 0.05s = 20 msg/sec)
+            sleep_interval: Extra pause between sends; the bot's outbound governor
+                already paces broadcasts behind interactive replies
             
         Returns:
             Stats dict: {total, success, failed}
@@ -28,7 +31,7 @@ class BroadcastService:
         from app.core.bot_manager import bot_manager
 
         # 1. Get Bot App
-        app = bot_manager.get_app(bot_id)
+        app = await bot_manager.ensure_app(bot_id)
         if not app:
             logger.error(f"Bot {bot_id} is not running.")
             return {"status": "error", "message": "Bot not running"}
@@ -49,9 +52,11 @@ class BroadcastService:
         
         # 3. Iterate and Send
         for chat_id in group_ids:
+            ok = False
             try:
-                await app.bot.send_message(chat_id=chat_id, text=message)
+                await app.bot.send_message(chat_id=chat_id, text=message, rate_limit_args=OutboundPriority.BROADCAST)
                 success += 1
+                ok = True
             except Forbidden:
                 # Bot blocked by user/group
                 logger.warning(f"Bot blocked by {chat_id}. Marking inactive might be good here.")
@@ -64,8 +69,10 @@ class BroadcastService:
                 logger.error(f"Unexpected error broadcasting to {chat_id}: {e}")
                 failed += 1
             
-            # Rate limiting
-            await asyncio.sleep(sleep_interval)
+            metrics.record_broadcast(bot_id, ok)
+            
+            if sleep_interval:
+                await asyncio.sleep(sleep_interval)
             
         logger.info(f"Broadcast finished. Total: {total}, Success: {success}, Failed: {failed}")
         return {
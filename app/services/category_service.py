@@ -0,0 +1,118 @@
+from sqlalchemy import select, delete, insert, literal, and_
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.group import GroupConfig, group_category_association
+
+# Stay below SQLite's bind parameter limit (32766); larger lists are split into
+# chunks inside the same transaction.
+MAX_IDS_PER_STATEMENT = 30000
+
+
+class CategoryService:
+    """
+    Set-based category membership operations.
+
+    Group lists are chat IDs (GroupConfig.group_id). Every operation runs a fixed
+    number of INSERT ... SELECT / DELETE statements regardless of list size; an
+    optional bot_id restricts the operation to that bot's groups.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _insert_ignore(self):
+        dialect = self.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            return sqlite.insert(group_category_association).on_conflict_do_nothing()
+        if dialect == "postgresql":
+            # Imported on use: the PostgreSQL dialect package is slow to import
+            from sqlalchemy.dialects import postgresql
+            return postgresql.insert(group_category_association).on_conflict_do_nothing()
+        return insert(group_category_association).prefix_with("IGNORE")
+
+    @staticmethod
+    def _config_ids(group_ids: list[int], bot_id: int = None):
+        stmt = select(GroupConfig.id).where(GroupConfig.group_id.in_(group_ids))
+        if bot_id is not None:
+            stmt = stmt.where(GroupConfig.bot_id == bot_id)
+        return stmt
+
+    @staticmethod
+    def _chunks(group_ids: list[int]):
+        group_ids = list(dict.fromkeys(group_ids))
+        for i in range(0, len(group_ids), MAX_IDS_PER_STATEMENT):
+            yield group_ids[i:i + MAX_IDS_PER_STATEMENT]
+
+    async def _add(self, cat_id: int, group_ids: list[int], bot_id: int = None) -> int:
+        added = 0
+        for chunk in self._chunks(group_ids):
+            ids = self._config_ids(chunk, bot_id)
+            stmt = self._insert_ignore().from_select(
+                ["group_config_id", "category_id"],
+                select(ids.subquery().c.id, literal(cat_id))
+                .where(literal(True))  # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+            )
+            result = await self.session.execute(stmt)
+            added += max(result.rowcount or 0, 0)
+        return added
+
+    async def _remove(self, cat_id: int, group_ids: list[int], bot_id: int = None) -> int:
+        removed = 0
+        for chunk in self._chunks(group_ids):
+            stmt = delete(group_category_association).where(
+                and_(
+                    group_category_association.c.category_id == cat_id,
+                    group_category_association.c.group_config_id.in_(self._config_ids(chunk, bot_id))
+                )
+            )
+            result = await self.session.execute(stmt)
+            removed += max(result.rowcount or 0, 0)
+        return removed
+
+    async def add_groups(self, cat_id: int, group_ids: list[int], bot_id: int = None) -> int:
+        """Add groups to a category, ignoring ones already in it. Returns rows inserted."""
+        added = await self._add(cat_id, group_ids, bot_id)
+        await self.session.commit()
+        return added
+
+    async def remove_groups(self, cat_id: int, group_ids: list[int], bot_id: int = None) -> int:
+        removed = await self._remove(cat_id, group_ids, bot_id)
+        await self.session.commit()
+        return removed
+
+    async def move_groups(self, src_cat_id: int, dst_cat_id: int, group_ids: list[int], bot_id: int = None) -> dict:
+        """Move groups from one category to another in a single transaction."""
+        if src_cat_id == dst_cat_id:
+            # Adding would be a no-op and the removal would empty the category
+            return {"added": 0, "removed": 0}
+        added = await self._add(dst_cat_id, group_ids, bot_id)
+        removed = await self._remove(src_cat_id, group_ids, bot_id)
+        await self.session.commit()
+        return {"added": added, "removed": removed}
+
+    async def replace_groups(self, cat_id: int, group_ids: list[int], bot_id: int = None) -> dict:
+        """
+        Make the category contain exactly `group_ids` (of `bot_id` when given; other
+        bots' memberships in a shared category are left alone).
+        """
+        conditions = [group_category_association.c.category_id == cat_id]
+        if bot_id is not None:
+            conditions.append(
+                group_category_association.c.group_config_id.in_(
+                    select(GroupConfig.id).where(GroupConfig.bot_id == bot_id)
+                )
+            )
+        keep = list(dict.fromkeys(group_ids))
+        if keep and len(keep) <= MAX_IDS_PER_STATEMENT:
+            conditions.append(group_category_association.c.group_config_id.not_in(self._config_ids(keep, bot_id)))
+        # With too many IDs for a single NOT IN the category is cleared and re-filled
+        result = await self.session.execute(delete(group_category_association).where(and_(*conditions)))
+        removed = max(result.rowcount or 0, 0)
+
+        added = await self._add(cat_id, keep, bot_id)
+        await self.session.commit()
+        if len(keep) > MAX_IDS_PER_STATEMENT:
+            net = added - removed
+            added, removed = max(net, 0), max(-net, 0)
+        return {"added": added, "removed": removed}
@@ -1,10 +1,108 @@
 import json
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from app.core.config import settings
 from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
 from app.models.bot import Bot
 
+# Parsed button configs keyed by bot id: {bot_id: (raw_json, read-only view)}
+# The raw string is kept so a row changed behind our back is re-parsed.
+_button_config_cache: dict[int, tuple[str, Mapping]] = {}
+# BotSettings keyed by bot id: {bot_id: (expires_at (monotonic), settings)}
+_bot_settings_cache: dict[int, tuple[float, "BotSettings"]] = {}
+
+
+@dataclass(frozen=True)
+class BotSettings:
+    """
+    What bot replies need from the Bot row, parsed once per bot: the button
+    config and the bill keyboard, whose per-chat bill link is filled in by
+    `bill_keyboard`. PTB buttons are immutable, so the rows are shared, and
+    button_config is a read-only view of the cached parse.
+    """
+    button_config: Mapping
+    bill_text: str
+    bill_rows: tuple # Static button rows under the bill link
+
+    @classmethod
+    def from_button_config(cls, btn_config: Mapping) -> "BotSettings":
+        biz_text = btn_config.get("biz_text") or "业务对接"
+        biz_url = btn_config.get("biz_url") or "https://t.me/"
+        complaint_text = btn_config.get("complaint_text") or "投诉建议"
+        complaint_url = btn_config.get("complaint_url") or "https://t.me/"
+        support_text = btn_config.get("support_text") or "24小时客服"
+        support_url = btn_config.get("support_url") or "https://t.me/"
+        return cls(
+            button_config=MappingProxyType(dict(btn_config)),
+            bill_text=btn_config.get("bill_text") or "点击跳转完整账单",
+            bill_rows=(
+                (InlineKeyboardButton(biz_text, url=biz_url), InlineKeyboardButton(complaint_text, url=complaint_url)),
+                (InlineKeyboardButton(support_text, url=support_url),),
+            ),
+        )
+
+    def bill_keyboard(self, chat_id: int) -> InlineKeyboardMarkup:
+        bill = InlineKeyboardButton(self.bill_text, url=f"http://{settings.DOMAIN}/bill/{chat_id}")
+        return InlineKeyboardMarkup(((bill,), *self.bill_rows))
+
+def parse_button_config(bot: Bot) -> Mapping:
+    """
+    Return the bot's parsed button_config, parsing each distinct value only
+    once. The result is shared between callers, so it is read-only; copy it
+    with dict() before changing or serialising it.
+    """
+    raw = bot.button_config or ""
+    cached = _button_config_cache.get(bot.id)
+    hit = bool(cached) and cached[0] == raw
+    metrics.record_cache("button_config", hit)
+    if hit:
+        return cached[1]
+
+    parsed = {}
+    if raw:
+        try:
+            parsed = json.loads(raw)
+        except Exception:
+            parsed = {}
+    if not isinstance(parsed, dict):
+        parsed = {}
+    view = MappingProxyType(parsed)
+    _button_config_cache[bot.id] = (raw, view)
+    return view
+
+def invalidate_bot_config(bot_id: int):
+    """Local only; admin writes go through shard_coordinator.invalidate_bot_config."""
+    _button_config_cache.pop(bot_id, None)
+    _bot_settings_cache.pop(bot_id, None)
+
+async def get_bot_settings(bot_id: int, session: AsyncSession | None = None) -> BotSettings:
+    """
+    Cached BotSettings: no DB query or JSON parse until the entry is
+    invalidated or BOT_SETTINGS_CACHE_TTL runs out. `session` is only used
+    on a miss.
+    """
+    now = time.monotonic()
+    cached = _bot_settings_cache.get(bot_id)
+    metrics.record_cache("bot_settings", bool(cached) and cached[0] > now)
+    if cached and cached[0] > now:
+        return cached[1]
+
+    if session is not None:
+        bot = await session.get(Bot, bot_id)
+    else:
+        async with AsyncSessionLocal() as active_session:
+            bot = await active_session.get(Bot, bot_id)
+    bot_settings = BotSettings.from_button_config(parse_button_config(bot) if bot else {})
+    _bot_settings_cache[bot_id] = (now + settings.BOT_SETTINGS_CACHE_TTL, bot_settings)
+    return bot_settings
+
 async def get_bot_config(bot_id: int):
     async with AsyncSessionLocal() as session:
         stmt = select(Bot).options(
@@ -27,18 +125,5 @@ async def get_bot_config(bot_id: int):
             }
         }
 
-async def get_bot_button_config(bot_id: int, session: AsyncSession | None = None) -> dict:
-    async def _load_config(active_session: AsyncSession) -> dict:
-        bot = await active_session.get(Bot, bot_id)
-        if not bot or not bot.button_config:
-            return {}
-        try:
-            return json.loads(bot.button_config)
-        except Exception:
-            return {}
-
-    if session is not None:
-        return await _load_config(session)
-
-    async with AsyncSessionLocal() as active_session:
-        return await _load_config(active_session)
+async def get_bot_button_config(bot_id: int, session: AsyncSession | None = None) -> Mapping:
+    return (await get_bot_settings(bot_id, session)).button_config
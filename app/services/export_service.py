@@ -93,7 +93,7 @@ async def generate_group_ledger(session: AsyncSession, group_id: int, query_date
             LedgerRecord.created_at >= start_time,
             LedgerRecord.created_at < end_time
         )
-    ).order_by(LedgerRecord.created_at)
+    ).order_by(LedgerRecord.created_at, LedgerRecord.id)
     
     result = await session.execute(stmt)
     transactions = result.scalars().all()
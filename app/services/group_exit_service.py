@@ -0,0 +1,82 @@
+import asyncio
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from telegram.error import Forbidden, BadRequest
+
+from app.core.config import settings
+from app.core.cache import cache_service
+from app.core.rate_limit import OutboundPriority
+from app.models.group import GroupConfig, Operator, group_category_association
+from app.services.stats_service import stats_service
+
+
+class GroupExitService:
+    """
+    Bulk "leave and forget" for a bot's groups.
+
+    leave_chat runs concurrently (bounded by GROUP_EXIT_CONCURRENCY, and queued
+    behind the bot's interactive traffic by its outbound governor); the group configs, their operators and category
+    memberships are then removed with one DELETE per table. Ledger records are kept.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def load_groups(self, bot_id: int, group_ids: list[int]) -> list:
+        stmt = select(GroupConfig.id, GroupConfig.group_id, GroupConfig.is_active).where(
+            GroupConfig.bot_id == bot_id, GroupConfig.group_id.in_(group_ids)
+        )
+        return list((await self.session.execute(stmt)).all())
+
+    async def exit_groups(self, bot_id: int, groups: list, job: dict = None) -> list[dict]:
+        """
+        `groups` are rows from `load_groups`. Returns one result per group:
+        {"group_id", "left", "error"}; configs are removed even when leaving fails
+        (the bot may already have been kicked).
+        """
+        # Avoid circular import
+        from app.core.bot_manager import bot_manager
+
+        app = await bot_manager.ensure_app(bot_id)
+        results = {row.group_id: {"group_id": str(row.group_id), "left": False, "error": None} for row in groups}
+
+        if app:
+            semaphore = asyncio.Semaphore(max(1, settings.GROUP_EXIT_CONCURRENCY))
+
+            async def leave(chat_id: int):
+                async with semaphore:
+                    try:
+                        await app.bot.leave_chat(chat_id=chat_id, rate_limit_args=OutboundPriority.BROADCAST)
+                        results[chat_id]["left"] = True
+                    except (Forbidden, BadRequest) as e:
+                        # Already kicked / chat gone: nothing left to leave
+                        results[chat_id]["left"] = True
+                        results[chat_id]["error"] = str(e)
+                    except Exception as e:
+                        logger.warning(f"leave_chat failed for {chat_id}: {e}")
+                        results[chat_id]["error"] = str(e)
+                    if job is not None:
+                        job["done"] += 1
+
+            await asyncio.gather(*(leave(row.group_id) for row in groups))
+        else:
+            for result in results.values():
+                result["error"] = "Bot is not running"
+
+        config_ids = [row.id for row in groups]
+        chat_ids = [row.group_id for row in groups]
+        await self.session.execute(
+            delete(group_category_association).where(group_category_association.c.group_config_id.in_(config_ids))
+        )
+        await self.session.execute(
+            delete(Operator).where(Operator.bot_id == bot_id, Operator.group_id.in_(chat_ids))
+        )
+        await self.session.execute(delete(GroupConfig).where(GroupConfig.id.in_(config_ids)))
+        await self.session.commit()
+
+        await cache_service.invalidate_group_configs(bot_id, chat_ids)
+        stats_service.adjust_active_groups(-sum(1 for row in groups if row.is_active))
+
+        logger.info(f"Bot {bot_id} exited {len(groups)} groups")
+        return list(results.values())
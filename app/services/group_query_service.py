@@ -0,0 +1,139 @@
+import base64
+from datetime import datetime
+from sqlalchemy import select, func, and_, or_, String, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.group import GroupConfig, GroupCategory, group_category_association
+
+
+class GroupQueryService:
+    """
+    Shared group listing for the admin and customer UIs.
+
+    Pages are fetched with keyset pagination on id DESC (newest groups first),
+    so the cost of a page does not depend on how deep the operator has
+    scrolled. The key is immutable, so edits made while paging cannot skip or
+    repeat rows, and an integer compares the same on every backend.
+    """
+
+    DEFAULT_LIMIT = 50
+    MAX_LIMIT = 500
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    # --- Cursor helpers ---
+
+    @staticmethod
+    def encode_cursor(config_id: int) -> str:
+        return base64.urlsafe_b64encode(str(config_id).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decode_cursor(cursor: str | None) -> int | None:
+        if not cursor:
+            return None
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            # Cursors issued before the id-only keyset were "updated_at|id"
+            return int(base64.urlsafe_b64decode(padded.encode()).decode().rsplit("|", 1)[-1])
+        except Exception:
+            return None
+
+    # --- Filters ---
+
+    def _conditions(
+        self,
+        bot_id: int = None,
+        active: bool = None,
+        license_status: str = None,
+        category_id: int = None,
+        q: str = None,
+    ) -> list:
+        conditions = []
+        if bot_id is not None:
+            conditions.append(GroupConfig.bot_id == bot_id)
+        if active is not None:
+            conditions.append(GroupConfig.is_active == active)
+
+        now = datetime.now()
+        if license_status == "licensed":
+            conditions.append(GroupConfig.expire_at > now)
+        elif license_status == "expired":
+            conditions.append(GroupConfig.expire_at <= now)
+        elif license_status == "unlicensed":
+            conditions.append(GroupConfig.expire_at.is_(None))
+
+        if category_id:
+            conditions.append(
+                GroupConfig.id.in_(
+                    select(group_category_association.c.group_config_id).where(
+                        group_category_association.c.category_id == category_id
+                    )
+                )
+            )
+
+        q = (q or "").strip()
+        if q:
+            search = [GroupConfig.group_name.ilike(f"%{q}%")]
+            if q.lstrip("-").isdigit():
+                search.append(GroupConfig.group_id == int(q))
+            else:
+                search.append(cast(GroupConfig.group_id, String).like(f"%{q}%"))
+            conditions.append(or_(*search))
+        return conditions
+
+    # --- Queries ---
+
+    async def list_groups(self, cursor: str = None, limit: int = None, **filters) -> dict:
+        """
+        Returns {"items": [GroupConfig, ...], "next_cursor": str | None}.
+        Filters: bot_id, active, license_status ("licensed"/"expired"/"unlicensed"), category_id, q.
+        """
+        limit = min(max(limit or self.DEFAULT_LIMIT, 1), self.MAX_LIMIT)
+        conditions = self._conditions(**filters)
+
+        after = self.decode_cursor(cursor)
+        if after is not None:
+            conditions.append(GroupConfig.id < after)
+
+        stmt = (
+            select(GroupConfig)
+            .where(*conditions)
+            .order_by(GroupConfig.id.desc())
+            .limit(limit + 1)
+        )
+        result = await self.session.execute(stmt)
+        items = list(result.scalars().all())
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = self.encode_cursor(items[-1].id)
+        return {"items": items, "next_cursor": next_cursor}
+
+    async def count_groups(self, **filters) -> int:
+        stmt = select(func.count(GroupConfig.id)).where(*self._conditions(**filters))
+        return await self.session.scalar(stmt) or 0
+
+    async def category_counts(self, bot_id: int = None) -> list[dict]:
+        """
+        All categories visible to the bot (its own + global ones) with the number of
+        the bot's groups in each, in a single grouped query. With bot_id=None every
+        category is returned with its total group count.
+        """
+        join_on = GroupConfig.id == group_category_association.c.group_config_id
+        if bot_id is not None:
+            join_on = and_(join_on, GroupConfig.bot_id == bot_id)
+
+        stmt = (
+            select(GroupCategory.id, GroupCategory.name, func.count(GroupConfig.id).label("count"))
+            .outerjoin(group_category_association, group_category_association.c.category_id == GroupCategory.id)
+            .outerjoin(GroupConfig, join_on)
+            .group_by(GroupCategory.id, GroupCategory.name)
+            .order_by(GroupCategory.id)
+        )
+        if bot_id is not None:
+            stmt = stmt.where(or_(GroupCategory.bot_id == bot_id, GroupCategory.bot_id.is_(None)))
+
+        result = await self.session.execute(stmt)
+        return [{"id": row.id, "name": row.name, "count": row.count} for row in result.all()]
@@ -1,10 +1,11 @@
-from sqlalchemy import select, update, delete, and_, func
+from sqlalchemy import select, update, delete, insert, and_, func
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.group import GroupConfig, Operator, LedgerRecord
+from app.models.group import GroupConfig, GroupConfigView, Operator, LedgerRecord
 from app.models.bot import BotAdminUser
 from datetime import datetime, time, timedelta
 from app.core.cache import cache_service
 from app.core.utils import get_now
+from app.services.stats_service import stats_service
 from decimal import Decimal
 from typing import Union
 
@@ -18,7 +19,7 @@ class LedgerService:
             return None
         return username.strip().lower()
 
-    async def get_group_config(self, group_id: int, bot_id: int, group_name: str = None) -> GroupConfig:
+    async def get_group_config(self, group_id: int, bot_id: int, group_name: str = None) -> GroupConfigView:
         # 1. Try Cache
         cached_data = await cache_service.get_group_config(group_id, bot_id)
         if cached_data:
@@ -33,21 +34,7 @@ class LedgerService:
                 cached_data['group_name'] = group_name
                 await cache_service.set_group_config(group_id, bot_id, cached_data)
 
-            # Reconstruct GroupConfig object from dict
-            # Be careful: This is a detached object and cannot be used for updates directly without merging
-            # However, for read-only access it's perfect.
-            # We must convert string decimals back if JSON didn't do it (our custom loader does)
-            
-            # Since cached_data comes from json.loads(..., parse_float=Decimal), numeric fields are already Decimal/float
-            # But SQLAlchemy expects models.
-            
-            # To avoid complexity with detached instances, we only use cache for specific read-heavy fields
-            # or return a Pydantic model. But the signature says -> GroupConfig.
-            
-            # For now, let's just return the object manually constructed.
-            # Warning: This object is NOT attached to the session.
-            config = GroupConfig(**cached_data)
-            return config
+            return GroupConfigView.from_row(cached_data)
         
         stmt = select(GroupConfig).where(
             and_(GroupConfig.group_id == group_id, GroupConfig.bot_id == bot_id)
@@ -63,6 +50,8 @@ class LedgerService:
             # Update group name if changed
             config.group_name = group_name
             await self.session.commit()
+            # updated_at is set by the DB on update; reload it rather than lazy-load below
+            await self.session.refresh(config)
             await cache_service.invalidate_group_config(group_id, bot_id)
         
         # Update Cache
@@ -70,7 +59,7 @@ class LedgerService:
         config_dict = {c.name: getattr(config, c.name) for c in config.__table__.columns}
         await cache_service.set_group_config(group_id, bot_id, config_dict)
         
-        return config
+        return GroupConfigView.from_row(config_dict)
 
     async def is_group_active(self, group_id: int, bot_id: int) -> bool:
         # Optimized: Check Cache First
@@ -86,24 +75,55 @@ class LedgerService:
         stmt = update(GroupConfig).where(
             and_(GroupConfig.group_id == group_id, GroupConfig.bot_id == bot_id)
         ).values(**kwargs)
-        await self.session.execute(stmt)
+        flipped = 0
+        if "is_active" in kwargs:
+            # As in start_recording: update the row only if is_active actually
+            # changes first, so the rowcount is the stats counter's delta.
+            active = bool(kwargs["is_active"])
+            result = await self.session.execute(stmt.where(
+                GroupConfig.is_active.isnot(True) if active else GroupConfig.is_active == True
+            ))
+            flipped = result.rowcount or 0
+        if not flipped:
+            await self.session.execute(stmt)
         await self.session.commit()
+        if flipped:
+            stats_service.adjust_active_groups(flipped if active else -flipped)
         await cache_service.invalidate_group_config(group_id, bot_id)
 
     async def start_recording(self, group_id: int, bot_id: int):
+        now = get_now().replace(tzinfo=None)
+        # Conditional update first so the rowcount tells the stats counter
+        # whether the group actually switched to active.
         stmt = update(GroupConfig).where(
-            and_(GroupConfig.group_id == group_id, GroupConfig.bot_id == bot_id)
-        ).values(is_active=True, active_start_time=get_now().replace(tzinfo=None))
-        await self.session.execute(stmt)
+            and_(
+                GroupConfig.group_id == group_id,
+                GroupConfig.bot_id == bot_id,
+                GroupConfig.is_active.isnot(True)
+            )
+        ).values(is_active=True, active_start_time=now)
+        result = await self.session.execute(stmt)
+        activated = result.rowcount or 0
+        if not activated:
+            stmt = update(GroupConfig).where(
+                and_(GroupConfig.group_id == group_id, GroupConfig.bot_id == bot_id)
+            ).values(active_start_time=now)
+            await self.session.execute(stmt)
         await self.session.commit()
+        stats_service.adjust_active_groups(activated)
         await cache_service.invalidate_group_config(group_id, bot_id)
 
     async def stop_recording(self, group_id: int, bot_id: int):
         stmt = update(GroupConfig).where(
-            and_(GroupConfig.group_id == group_id, GroupConfig.bot_id == bot_id)
+            and_(
+                GroupConfig.group_id == group_id,
+                GroupConfig.bot_id == bot_id,
+                GroupConfig.is_active == True
+            )
         ).values(is_active=False)
-        await self.session.execute(stmt)
+        result = await self.session.execute(stmt)
         await self.session.commit()
+        stats_service.adjust_active_groups(-(result.rowcount or 0))
         await cache_service.invalidate_group_config(group_id, bot_id)
         
     async def add_operator(self, group_id: int, user_id: int, username: str, bot_id: int):
@@ -244,7 +264,7 @@ class LedgerService:
         if bot_id:
             stmt = stmt.where(LedgerRecord.bot_id == bot_id)
             
-        stmt = stmt.order_by(LedgerRecord.created_at.desc())
+        stmt = stmt.order_by(LedgerRecord.created_at.desc(), LedgerRecord.id.desc())
         
         result = await self.session.execute(stmt)
         return result.scalars().all()
@@ -260,41 +280,59 @@ class LedgerService:
         original_text: str,
         usd_rate_snapshot: Union[Decimal, float, str, None] = None,
     ):
-        # 1. Convert to Decimal for storage
-        if isinstance(amount, Decimal):
-            amount_decimal = amount
-        else:
-            amount_decimal = Decimal(str(amount))
-        
-        # 2. Get Config for Snapshot
+        await self.record_transactions(
+            bot_id, group_id, [(type_, amount, original_text, usd_rate_snapshot)], operator_id, operator_name
+        )
+
+    async def record_transactions(
+        self,
+        bot_id: int,
+        group_id: int,
+        entries: list[tuple],
+        operator_id: int,
+        operator_name: str,
+    ):
+        """
+        Record (type_, amount, original_text, usd_rate_snapshot) entries with one
+        multi-row INSERT and one commit. All entries share the config snapshot
+        and created_at.
+        """
+        # Get Config for Snapshot
         config = await self.get_group_config(group_id, bot_id)
-        
-        # 3. Calculate Fee Snapshot
-        # fee_percent is now Numeric/Decimal
-        fee_applied = Decimal(0)
-        if type_ == "deposit" and config.fee_percent > 0:
-            fee_applied = amount_decimal * (config.fee_percent / Decimal(100))
-            
-        if usd_rate_snapshot is None:
-            rate_snapshot = config.usd_rate
-        else:
-            rate_snapshot = Decimal(str(usd_rate_snapshot))
+        created_at = get_now().replace(tzinfo=None)
 
-        record = LedgerRecord(
-            bot_id=bot_id,
-            group_id=group_id,
-            type=type_,
-            amount=amount_decimal,
-            operator_id=operator_id,
-            operator_name=operator_name,
-            original_text=original_text,
-            fee_applied=fee_applied,
-            usd_rate_snapshot=rate_snapshot,
-            created_at=get_now().replace(tzinfo=None)
-        )
-        self.session.add(record)
+        rows = []
+        for type_, amount, original_text, usd_rate_snapshot in entries:
+            # Convert to Decimal for storage
+            amount_decimal = amount if isinstance(amount, Decimal) else Decimal(str(amount))
+
+            # Calculate Fee Snapshot (fee_percent is Numeric/Decimal)
+            fee_applied = Decimal(0)
+            if type_ == "deposit" and config.fee_percent > 0:
+                fee_applied = amount_decimal * (config.fee_percent / Decimal(100))
+
+            if usd_rate_snapshot is None:
+                rate_snapshot = config.usd_rate
+            else:
+                rate_snapshot = Decimal(str(usd_rate_snapshot))
+
+            rows.append({
+                "bot_id": bot_id,
+                "group_id": group_id,
+                "type": type_,
+                "amount": amount_decimal,
+                "operator_id": operator_id,
+                "operator_name": operator_name,
+                "original_text": original_text,
+                "fee_applied": fee_applied,
+                "usd_rate_snapshot": rate_snapshot,
+                "created_at": created_at,
+            })
+        await self.session.execute(insert(LedgerRecord), rows)
         await self.session.commit()
-        
+        for row in rows:
+            stats_service.record_ledger(bot_id, row["type"], row["amount"])
+
     async def get_daily_summary(self, group_id: int, bot_id: int) -> dict:
         # 4AM Logic
         now = get_now()
@@ -366,7 +404,7 @@ class LedgerService:
         if daily_only:
             stmt = stmt.where(LedgerRecord.created_at >= start_time)
             
-        stmt = stmt.order_by(LedgerRecord.created_at.desc()).limit(limit)
+        stmt = stmt.order_by(LedgerRecord.created_at.desc(), LedgerRecord.id.desc()).limit(limit)
         
         result = await self.session.execute(stmt)
         return result.scalars().all()
@@ -381,12 +419,21 @@ class LedgerService:
         start_time = datetime.combine(start_date, time(4, 0))
         if now.tzinfo: start_time = now.tzinfo.localize(start_time)
 
-        stmt = delete(LedgerRecord).where(
-            and_(
-                LedgerRecord.group_id == group_id,
-                LedgerRecord.bot_id == bot_id,
-                LedgerRecord.created_at >= start_time
-            )
+        conditions = and_(
+            LedgerRecord.group_id == group_id,
+            LedgerRecord.bot_id == bot_id,
+            LedgerRecord.created_at >= start_time
         )
+        # Capture today's deposit totals before deleting so the dashboard
+        # counters can be decremented without a full recount.
+        removed = (await self.session.execute(
+            select(func.sum(LedgerRecord.amount), func.count(LedgerRecord.id)).where(
+                and_(conditions, LedgerRecord.type == "deposit")
+            )
+        )).one()
+
+        stmt = delete(LedgerRecord).where(conditions)
         await self.session.execute(stmt)
         await self.session.commit()
+        if removed[1]:
+            stats_service.remove_deposits(bot_id, Decimal(str(removed[0] or 0)), removed[1])
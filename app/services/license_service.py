@@ -97,51 +97,33 @@ class LicenseService:
             except:
                 return False
 
-        # 1. Check Group License
-        cached = await cache_service.get_group_config(group_id, bot_id)
-        if cached:
-            if is_valid_config(cached):
-                return True
-        else:
-            # Cache Miss: Fetch from DB and Cache
-            stmt = select(GroupConfig).where(
-                GroupConfig.group_id == group_id, GroupConfig.bot_id == bot_id
-            )
-            result = await self.session.execute(stmt)
-            config = result.scalars().first()
-            if config:
-                if config.is_active and not config.expire_at:
-                    config_dict = {c.name: getattr(config, c.name) for c in config.__table__.columns}
-                    await cache_service.set_group_config(group_id, bot_id, config_dict)
-                    return True
-                if config.expire_at and config.expire_at > datetime.now():
-                    # Cache it for future
-                    config_dict = {c.name: getattr(config, c.name) for c in config.__table__.columns}
-                    await cache_service.set_group_config(group_id, bot_id, config_dict)
-                    return True
-                else:
-                     # Even if expired, cache it so we don't hit DB again immediately
-                     config_dict = {c.name: getattr(config, c.name) for c in config.__table__.columns}
-                     await cache_service.set_group_config(group_id, bot_id, config_dict)
+        # Group and user configs come from one MGET; misses from one IN query
+        ids = [group_id] if not user_id or user_id == group_id else [group_id, user_id]
+        configs = await cache_service.get_group_configs(bot_id, ids)
+        if is_valid_config(configs.get(group_id)):
+            return True
+
+        missing = [config_id for config_id in ids if config_id not in configs]
+        if missing:
+            # Concurrent misses for the same ids (an expired hot group) share one load
+            flight_key = f"group_config:{bot_id}:{','.join(map(str, missing))}"
+            configs.update(await cache_service.single_flight(flight_key, lambda: self._load_configs(bot_id, missing)))
 
-        # 2. Check User License (if provided)
-        if user_id:
-            # Try Cache first
-            cached_user = await cache_service.get_group_config(user_id, bot_id)
-            if cached_user:
-                if is_valid_config(cached_user):
-                    return True
-            else:
-                 stmt_user = select(GroupConfig).where(
-                    GroupConfig.group_id == user_id, GroupConfig.bot_id == bot_id
-                )
-                 result_user = await self.session.execute(stmt_user)
-                 user_config = result_user.scalars().first()
-                 if user_config:
-                     config_dict = {c.name: getattr(user_config, c.name) for c in user_config.__table__.columns}
-                     await cache_service.set_group_config(user_id, bot_id, config_dict)
-                     
-                     if user_config.expire_at and user_config.expire_at > datetime.now():
-                         return True
-                 
-        return False
+        return any(is_valid_config(configs.get(config_id)) for config_id in ids)
+
+    async def _load_configs(self, bot_id: int, group_ids: list[int]) -> dict[int, dict]:
+        """Configs for group_ids from the DB ({} for ids without one), written back to the cache."""
+        stmt = select(GroupConfig).where(
+            GroupConfig.bot_id == bot_id, GroupConfig.group_id.in_(group_ids)
+        )
+        result = await self.session.execute(stmt)
+        loaded = {
+            config.group_id: {c.name: getattr(config, c.name) for c in config.__table__.columns}
+            for config in result.scalars()
+        }
+        # Cached even if expired, so we don't hit DB again immediately; ids
+        # without a config are cached as missing for a shorter time
+        absent = [group_id for group_id in group_ids if group_id not in loaded]
+        await cache_service.set_group_configs(bot_id, loaded)
+        await cache_service.set_missing_group_configs(bot_id, absent)
+        return {**loaded, **{group_id: {} for group_id in absent}}
@@ -0,0 +1,143 @@
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+from app.models.bot import Bot
+from app.models.group import GroupConfig, LedgerRecord, TrialRequest
+from app.core.utils import get_business_day_start
+
+
+class PlatformStatsService:
+    """
+    Platform-wide dashboard counters kept in memory.
+
+    Writers (ledger, trials, bot management) apply deltas as they commit, and
+    `reconcile()` periodically recomputes everything from the DB to correct any
+    drift. `is_active` changes go through LedgerService (start_recording,
+    stop_recording, update_group_config), which the daily settlement also uses;
+    deleting a bot drops its groups and trials too and is only reconciled.
+    The admin dashboard only reads `snapshot()`, which is O(1) regardless of
+    ledger volume.
+    """
+
+    def __init__(self):
+        self.bot_count = 0
+        self.active_group_count = 0
+        self.pending_trials = 0
+        self.today_volume = Decimal(0)
+        self.today_deposit_count = 0
+        self.bot_volume: dict[int, Decimal] = {}
+        self.bot_names: dict[int, str] = {}
+        self.reconciled_at: datetime | None = None
+        self._day_start: datetime | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.reconciled_at is not None
+
+    def _roll_day(self):
+        # Today's counters restart at 04:00; no deposit of the new business day
+        # can have been counted before the first access that notices the switch.
+        day_start = get_business_day_start()
+        if self._day_start != day_start:
+            self._day_start = day_start
+            self.today_volume = Decimal(0)
+            self.today_deposit_count = 0
+            self.bot_volume = {}
+
+    # --- Write-side hooks ---
+
+    def record_ledger(self, bot_id: int, type_: str, amount: Decimal, count: int = 1):
+        if type_ != "deposit":
+            return
+        self._roll_day()
+        self.today_volume += amount
+        self.today_deposit_count += count
+        self.bot_volume[bot_id] = self.bot_volume.get(bot_id, Decimal(0)) + amount
+
+    def remove_deposits(self, bot_id: int, amount: Decimal, count: int):
+        self.record_ledger(bot_id, "deposit", -amount, -count)
+        if not self.bot_volume.get(bot_id):
+            self.bot_volume.pop(bot_id, None)
+
+    def adjust_active_groups(self, delta: int):
+        self.active_group_count = max(0, self.active_group_count + delta)
+
+    def adjust_pending_trials(self, delta: int):
+        self.pending_trials = max(0, self.pending_trials + delta)
+
+    def bot_added(self, bot_id: int, name: str = None):
+        self.bot_count += 1
+        self.bot_names[bot_id] = name or f"Bot #{bot_id}"
+
+    # --- Read side ---
+
+    async def reconcile(self, session: AsyncSession):
+        """Recompute all counters from the DB (periodic job / first access)."""
+        day_start = get_business_day_start()
+
+        bot_rows = (await session.execute(select(Bot.id, Bot.name))).all()
+        group_count = await session.scalar(
+            select(func.count(GroupConfig.id)).where(GroupConfig.is_active == True)
+        )
+        pending_trials = await session.scalar(
+            select(func.count(TrialRequest.id)).where(TrialRequest.status == "pending")
+        )
+        volume_rows = (await session.execute(
+            select(
+                LedgerRecord.bot_id,
+                func.sum(LedgerRecord.amount).label("total"),
+                func.count(LedgerRecord.id).label("count")
+            ).where(
+                and_(LedgerRecord.type == "deposit", LedgerRecord.created_at >= day_start)
+            ).group_by(LedgerRecord.bot_id)
+        )).all()
+
+        bot_volume = {
+            row.bot_id: Decimal(str(row.total)) if row.total is not None else Decimal(0)
+            for row in volume_rows
+        }
+        today_volume = sum(bot_volume.values(), Decimal(0))
+
+        if self.ready and self._day_start == day_start and self.today_volume != today_volume:
+            logger.info(f"Stats drift corrected: today_volume {self.today_volume} -> {today_volume}")
+
+        self.bot_count = len(bot_rows)
+        self.bot_names = {row.id: row.name or f"Bot #{row.id}" for row in bot_rows}
+        self.active_group_count = group_count or 0
+        self.pending_trials = pending_trials or 0
+        self.bot_volume = bot_volume
+        self.today_volume = today_volume
+        self.today_deposit_count = sum(row.count for row in volume_rows)
+        self._day_start = day_start
+        self.reconciled_at = datetime.now()
+
+    async def get_snapshot(self, session: AsyncSession, top_n: int = 10) -> dict:
+        if not self.ready:
+            await self.reconcile(session)
+        return self.snapshot(top_n)
+
+    def snapshot(self, top_n: int = 10) -> dict:
+        self._roll_day()
+        top_bots = sorted(self.bot_volume.items(), key=lambda item: item[1], reverse=True)[:top_n]
+        return {
+            "bot_count": self.bot_count,
+            "group_count": self.active_group_count,
+            "pending_trials": self.pending_trials,
+            "today_volume": self.today_volume,
+            "today_deposit_count": self.today_deposit_count,
+            "bot_volume": [
+                {
+                    "bot_id": bot_id,
+                    "bot_name": self.bot_names.get(bot_id, f"Bot #{bot_id}"),
+                    "volume": volume
+                }
+                for bot_id, volume in top_bots
+            ],
+            "reconciled_at": self.reconciled_at,
+        }
+
+
+stats_service = PlatformStatsService()
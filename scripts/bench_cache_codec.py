@@ -0,0 +1,77 @@
+"""
+Cached GroupConfig entries: the binary codec (app/core/cache_codec.py) against
+the JSON encoding it replaced (Decimals as floats, datetimes as strings).
+Reports median encode and decode time per entry, bytes per entry, and whether
+the entry round-trips exactly.
+
+Usage: python scripts/bench_cache_codec.py [--rounds N]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("SENTRY_DSN", "")
+
+from bench_ledger import measure, fmt  # noqa: E402
+
+DATETIME_FIELDS = ['created_at', 'updated_at', 'active_start_time', 'expire_at']
+
+
+class LegacyEncoder(json.JSONEncoder):
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return float(obj)
+        return super().default(obj)
+
+
+def legacy_dump(config: dict) -> bytes:
+    serializable = {k: str(v) if k in DATETIME_FIELDS and v else v for k, v in config.items()}
+    return json.dumps(serializable, cls=LegacyEncoder).encode()
+
+
+def legacy_load(data: bytes) -> dict:
+    return json.loads(data, parse_float=Decimal)
+
+
+def sample_config(table) -> dict:
+    """A realistic row with every column set."""
+    values = {
+        "id": 48213, "bot_id": 17, "group_id": -1001987654321, "group_name": "USDT 交易群 #12",
+        "is_active": True, "active_start_time": datetime(2026, 3, 1, 8, 30, 15, 123456),
+        "fee_percent": Decimal("1.50"), "usd_rate": Decimal("7.2345"), "php_rate": Decimal("0.1234"),
+        "myr_rate": Decimal("1.5432"), "thb_rate": Decimal("0.2001"), "decimal_mode": True, "simple_mode": False,
+        "created_at": datetime(2025, 11, 2, 14, 0, 1, 500000), "updated_at": datetime(2026, 3, 1, 8, 30, 15, 654321),
+        "expire_at": datetime(2026, 12, 31, 23, 59, 59), "license_key": "HY-ABCD-EFGH-JKLM",
+    }
+    return {column.name: values.get(column.name) for column in table.columns}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.core.cache import group_config_codec
+    from app.models.group import GroupConfig
+
+    config = sample_config(GroupConfig.__table__)
+    print(f"{'codec':<10}{'encode':>11}{'decode':>11}{'bytes':>8}  exact")
+    for name, dump, load in (
+        ("json", legacy_dump, legacy_load),
+        ("binary", group_config_codec.encode, group_config_codec.decode),
+    ):
+        data = dump(config)
+        encode = statistics.median(measure(lambda: dump(config), args.rounds))
+        decode = statistics.median(measure(lambda: load(data), args.rounds))
+        print(f"{name:<10}{fmt(encode):>11}{fmt(decode):>11}{len(data):>8}  {load(data) == config}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cold-start time of the web app: `import app.main` plus the lifespan startup
+(scheduler, schema check, stats priming) up to the point it serves requests.
+
+Every run is a fresh interpreter against a temporary SQLite DB stamped at the
+Alembic head, with no bots. Prints the median per phase; with --max-seconds the
+exit code is 1 when the median total exceeds it, so CI can gate on it.
+--profile adds a per-package / per-module import breakdown (python -X importtime).
+
+Usage: python scripts/bench_cold_start.py [--runs N] [--max-seconds S] [--profile]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+
+async def child():
+    started = time.perf_counter()
+    import app.main
+    imported = time.perf_counter()
+    async with app.main.app.router.lifespan_context(app.main.app):
+        ready = time.perf_counter()
+    from app.core.startup_profile import startup_profile
+    print(json.dumps({
+        "import": round((imported - started) * 1000, 1),
+        "startup": round((ready - imported) * 1000, 1),
+        "phases": startup_profile.report(),
+    }))
+
+
+def import_breakdown(env: dict, top: int = 12):
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True, cwd=ROOT,
+    )
+    by_package, app_modules = defaultdict(int), {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line[12:]:
+            continue
+        self_us, _, name = (part.strip() for part in line[12:].split("|"))
+        if not self_us.isdigit():
+            continue
+        by_package[name.split(".")[0]] += int(self_us)
+        if name.startswith("app."):
+            app_modules[name] = int(self_us)
+    print("\nImport time by package (self, ms):")
+    for name, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<28}{us / 1000:>8.1f}")
+    print("Slowest app modules (self, ms):")
+    for name, us in sorted(app_modules.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {name:<28}{us / 1000:>8.1f}")
+
+
+def main():
+    if os.environ.get("BENCH_COLD_START_CHILD"):
+        asyncio.run(child())
+        return
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None)
+    parser.add_argument("--profile", action="store_true")
+    args = parser.parse_args()
+
+    from app.core.database import alembic_head
+
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "bench.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{db_path}",
+        "REDIS_URL": "",
+        "SENTRY_DSN": "",
+        "TG_MODE": "polling",
+        "SHARDING_ENABLED": "false",
+        "BENCH_COLD_START_CHILD": "1",
+    }
+
+    def run_child() -> dict:
+        out = subprocess.run([sys.executable, os.path.abspath(__file__)], env=env, capture_output=True, text=True, cwd=ROOT)
+        if out.returncode != 0:
+            sys.exit(f"Cold start failed:\n{out.stderr[-2000:]}")
+        return json.loads(out.stdout.strip().splitlines()[-1])
+
+    # First boot creates the schema; stamp it so later boots see a migrated DB
+    run_child()
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)")
+        conn.execute("DELETE FROM alembic_version")
+        conn.execute("INSERT INTO alembic_version VALUES (?)", (alembic_head(),))
+
+    results = [run_child() for _ in range(args.runs)]
+    phases = defaultdict(list)
+    for result in results:
+        for name, ms in result["phases"].items():
+            phases[name].append(ms)
+    totals = [result["import"] + result["startup"] for result in results]
+
+    print(f"Cold start, median of {args.runs} runs (ms):")
+    print(f"  {'import app.main':<28}{statistics.median(r['import'] for r in results):>8.1f}")
+    for name, values in phases.items():
+        if name != "import app.main":
+            print(f"    {name:<26}{statistics.median(values):>8.1f}")
+    print(f"  {'lifespan startup':<28}{statistics.median(r['startup'] for r in results):>8.1f}")
+    print(f"  {'total':<28}{statistics.median(totals):>8.1f}  (min {min(totals):.1f})")
+
+    if args.profile:
+        import_breakdown(env)
+
+    if args.max_seconds is not None and statistics.median(totals) > args.max_seconds * 1000:
+        print(f"FAIL: median cold start above {args.max_seconds}s")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
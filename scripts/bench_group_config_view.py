@@ -0,0 +1,58 @@
+"""
+GroupConfigView (frozen, slotted dataclass) against the detached GroupConfig
+ORM instance that LedgerService.get_group_config used to return: cost of
+building one from a cached row dict, and of reading the fields the
+transaction reply uses.
+
+Usage: python scripts/bench_group_config_view.py [--rounds N]
+"""
+import argparse
+import os
+import statistics
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("SENTRY_DSN", "")
+
+from bench_ledger import measure, fmt  # noqa: E402
+
+ROW = {
+    "id": 48213, "bot_id": 17, "group_id": -1001987654321, "group_name": "USDT 交易群 #12",
+    "is_active": True, "active_start_time": datetime(2026, 3, 1, 8, 30, 15),
+    "fee_percent": Decimal("1.50"), "usd_rate": Decimal("7.2345"), "php_rate": Decimal("0.0000"),
+    "myr_rate": Decimal("0.0000"), "thb_rate": Decimal("0.0000"), "decimal_mode": True, "simple_mode": False,
+    "updated_at": datetime(2026, 3, 1, 8, 30, 15), "expire_at": datetime(2026, 12, 31, 23, 59, 59),
+    "license_key": "HY-ABCD-EFGH-JKLM",
+}
+
+
+def read_fields(config):
+    return (config.usd_rate, config.fee_percent, config.decimal_mode, config.simple_mode,
+            config.is_active, config.expire_at, config.fee_percent, config.decimal_mode)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    from app.models.bot import Bot  # noqa: F401 (registers the bots table for the mapper)
+    from app.models.group import GroupConfig, GroupConfigView
+
+    orm, view = GroupConfig(**ROW), GroupConfigView.from_row(ROW)
+    print(f"{'':<22}{'construct':>11}{'8 reads':>11}")
+    for name, build, instance in (
+        ("GroupConfig (ORM)", lambda: GroupConfig(**ROW), orm),
+        ("GroupConfigView", lambda: GroupConfigView.from_row(ROW), view),
+    ):
+        construct = statistics.median(measure(build, args.rounds))
+        reads = statistics.median(measure(lambda: read_fields(instance), args.rounds))
+        print(f"{name:<22}{fmt(construct):>11}{fmt(reads):>11}")
+
+
+if __name__ == "__main__":
+    main()
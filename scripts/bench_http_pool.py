@@ -0,0 +1,163 @@
+"""
+Sockets and memory per 100 bots: per-bot PTB pools vs the shared Telegram HTTP pool.
+
+Starts a stub Bot API server in a subprocess, builds N bots through
+bot_manager._build_app (cached bot info, no network besides the stub) and fires a
+burst of concurrent calls from every bot. Each mode runs in a fresh interpreter so
+RSS numbers are comparable.
+
+Usage: python scripts/bench_http_pool.py [N_BOTS] [CALLS_PER_BOT]
+"""
+import asyncio
+import json
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+MODES = {
+    "per-bot": {"TG_HTTP_SHARED_POOL": "0"},
+    "shared 1x256": {"TG_HTTP_SHARED_POOL": "1", "TG_HTTP_POOL_SHARDS": "1", "TG_HTTP_MAX_CONNECTIONS": "256", "TG_HTTP_MAX_KEEPALIVE": "256"},
+    "shared 8x32": {"TG_HTTP_SHARED_POOL": "1", "TG_HTTP_POOL_SHARDS": "8", "TG_HTTP_MAX_CONNECTIONS": "32", "TG_HTTP_MAX_KEEPALIVE": "32"},
+    "shared 16x8": {"TG_HTTP_SHARED_POOL": "1"},  # Defaults
+    "shared 4x8": {"TG_HTTP_SHARED_POOL": "1", "TG_HTTP_POOL_SHARDS": "4"},
+    "shared 16x8 http2": {"TG_HTTP_SHARED_POOL": "1", "TG_HTTP2": "1"},
+}
+
+async def stub_app(scope, receive, send):
+    """Answers every Bot API method with a small integer result after 10ms."""
+    if scope["type"] != "http":
+        return
+    while (await receive()).get("more_body"):
+        pass
+    await asyncio.sleep(0.01)
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": b'{"ok":true,"result":5}'})
+
+
+def socket_count() -> int:
+    count = 0
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            if os.readlink(f"/proc/self/fd/{fd}").startswith("socket:"):
+                count += 1
+        except OSError:
+            pass
+    return count
+
+
+async def run_mode(n_bots: int, calls: int) -> dict:
+    from loguru import logger
+    from telegram import User
+    from app.core.bot_manager import bot_manager
+    from app.core.telegram_http import telegram_http
+
+    logger.remove()
+    base_sockets = socket_count()
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # Resident cost of the bots themselves (tracing is off during the burst, it skews timing)
+    tracemalloc.start()
+    base_heap, _ = tracemalloc.get_traced_memory()
+    apps = []
+    for i in range(1, n_bots + 1):
+        info = User(id=100000 + i, first_name=f"Bench {i}", is_bot=True, username=f"bench{i}_bot")
+        app = bot_manager._build_app(f"{100000 + i}:AAbenchmarkTokenForHttpPool{i:06d}", i, info)
+        await app.initialize()
+        apps.append(app)
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak = 0
+    sampling = True
+
+    async def sample():
+        nonlocal peak
+        while sampling:
+            peak = max(peak, socket_count() - base_sockets)
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(app.bot.get_chat_member_count(chat_id=-1000 - n) for app in apps for n in range(calls)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    sampling = False
+    await sampler
+
+    idle_sockets = socket_count() - base_sockets
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    for app in apps:
+        await app.shutdown()
+    await telegram_http.aclose()
+
+    return {
+        "errors": sum(1 for r in results if isinstance(r, Exception)),
+        "seconds": round(elapsed, 2),
+        "peak_sockets": peak,
+        "idle_sockets": idle_sockets,
+        "heap_kb_per_bot": round((heap - base_heap) / n_bots / 1024, 1),
+        "rss_mb": round((rss - base_rss) / 1024, 1),
+    }
+
+
+def main():
+    n_bots = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    calls = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    if os.environ.get("BENCH_HTTP_MODE"):
+        print(json.dumps(asyncio.run(run_mode(n_bots, calls))))
+        return
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import sys; sys.path.insert(0, {os.path.join(ROOT, 'scripts')!r}); import uvicorn, bench_http_pool as b; "
+         f"uvicorn.run(b.stub_app, host='127.0.0.1', port={port}, log_level='error', backlog=4096, http='httptools', loop='uvloop')"],
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        print(f"{n_bots} bots x {calls} concurrent calls")
+        print(f"{'mode':<20}{'time s':>8}{'errors':>8}{'peak sock':>11}{'idle sock':>11}{'heap KB/bot':>13}{'RSS MB':>8}")
+        for mode, env in MODES.items():
+            proc_env = {
+                **os.environ, **env,
+                "BENCH_HTTP_MODE": mode,
+                "TG_API_BASE_URL": f"http://127.0.0.1:{port}/bot",
+                "REDIS_URL": "",
+                # The stub is a single Python process; don't count its queueing as failures
+                "TG_HTTP_POOL_TIMEOUT": "60",
+            }
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), str(n_bots), str(calls)],
+                env=proc_env, capture_output=True, text=True, cwd=ROOT,
+            )
+            if out.returncode != 0:
+                print(f"{mode:<20} failed:\n{out.stderr[-2000:]}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{mode:<20}{r['seconds']:>8}{r['errors']:>8}{r['peak_sockets']:>11}{r['idle_sockets']:>11}{r['heap_kb_per_bot']:>13}{r['rss_mb']:>8}")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Cold-start latency and resident memory per bot in lazy webhook mode.
+
+Seeds N bots with cached get_me() info into a throwaway SQLite DB, then activates
+each one the way the webhook route does (bot_manager.ensure_app) and reports
+activation latency percentiles plus memory held per running Application.
+No Telegram traffic is generated: cached info makes activation offline.
+
+Usage: python scripts/bench_lazy_start.py [N_BOTS]
+"""
+import asyncio
+import gc
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_lazy.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["TG_MODE"] = "webhook"
+os.environ["BOT_LAZY_START"] = "1"
+os.environ["REDIS_URL"] = ""
+
+# Add project root to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.core.bot_manager import bot_manager
+from app.models.bot import Bot
+
+
+def rss_mb() -> float:
+    # ru_maxrss is KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def main(n_bots: int):
+    logger.remove()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        session.add_all([
+            Bot(id=i, token=f"{100000 + i}:AAbenchmarkTokenForLazyStart{i:06d}", name=f"bench{i}",
+                tg_user_id=100000 + i, tg_username=f"bench{i}_bot", tg_first_name=f"Bench {i}")
+            for i in range(1, n_bots + 1)
+        ])
+        await session.commit()
+
+    # Warm imports / first-use costs outside the measurement
+    await bot_manager.ensure_app(1)
+    await bot_manager.evict_idle(0)
+
+    # Pass 1: activation latency and RSS (tracemalloc off, it slows allocation)
+    gc.collect()
+    rss_before = rss_mb()
+    latencies = []
+    for i in range(1, n_bots + 1):
+        start = time.perf_counter()
+        app = await bot_manager.ensure_app(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert app is not None
+    rss_after = rss_mb()
+
+    # Hot path: already running
+    start = time.perf_counter()
+    for i in range(1, n_bots + 1):
+        await bot_manager.ensure_app(i)
+    hot_us = (time.perf_counter() - start) * 1e6 / n_bots
+    await bot_manager.evict_idle(0)
+
+    # Pass 2: Python heap held per running bot
+    gc.collect()
+    tracemalloc.start()
+    base_mem, _ = tracemalloc.get_traced_memory()
+    for i in range(1, n_bots + 1):
+        await bot_manager.ensure_app(i)
+    gc.collect()
+    used_mem, _ = tracemalloc.get_traced_memory()
+
+    evicted = await bot_manager.evict_idle(0)
+    gc.collect()
+    after_evict, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    print(f"Bots activated:        {n_bots}")
+    print(f"Cold start p50 / p99:  {statistics.median(latencies):.2f} / {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms")
+    print(f"Cold start max:        {latencies[-1]:.2f} ms")
+    print(f"Warm ensure_app:       {hot_us:.1f} us")
+    print(f"Python heap per bot:   {(used_mem - base_mem) / n_bots / 1024:.1f} KB")
+    print(f"Peak RSS growth:       {rss_after - rss_before:.1f} MB total ({(rss_after - rss_before) * 1024 / n_bots:.0f} KB per bot)")
+    print(f"Heap after evicting {evicted}: {(after_evict - base_mem) / 1024:.1f} KB retained")
+
+    await engine.dispose()
+    os.remove(DB_PATH)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200))
@@ -0,0 +1,234 @@
+"""
+Micro-benchmarks for the ledger hot paths: number/time formatting, rate helpers,
+the calculator, the transaction reply builder, and LedgerService
+record_transaction / get_daily_summary against seeded SQLite DBs.
+
+Each benchmark is calibrated to ~20ms per round and reports the median and min
+time per call over --rounds rounds. Results are compared with
+scripts/bench_ledger_baseline.json; the exit code is 1 when a median is more
+than --threshold (default 25%) slower than its baseline. Baselines only mean
+something on the machine they were recorded on: refresh them with --save.
+
+Usage: python scripts/bench_ledger.py [--rows 10000,100000] [--rounds N]
+                                      [--only NAME] [--threshold 0.25] [--save]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("SENTRY_DSN", "")
+
+BASELINE_PATH = os.path.join(ROOT, "scripts", "bench_ledger_baseline.json")
+ROUND_SECONDS = 0.02
+BENCH_BOT_ID = 1
+BENCH_GROUP_ID = -1001
+GROUPS = 1000
+DAYS = 30
+
+
+def measure(fn, rounds: int) -> list[float]:
+    """Seconds per call for each round; the round size is calibrated to ROUND_SECONDS."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= ROUND_SECONDS or loops >= 1 << 20:
+            break
+        loops *= 2
+    results = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        results.append((time.perf_counter() - started) / loops)
+    return results
+
+
+async def measure_async(fn, rounds: int, loops: int) -> list[float]:
+    await fn()
+    results = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            await fn()
+        results.append((time.perf_counter() - started) / loops)
+    return results
+
+
+def make_record(type_: str, amount: str, rate: str, text: str, minutes_ago: int):
+    return SimpleNamespace(
+        type=type_, amount=Decimal(amount), usd_rate_snapshot=Decimal(rate), original_text=text,
+        created_at=datetime.now() - timedelta(minutes=minutes_ago),
+    )
+
+
+def micro_benchmarks() -> dict:
+    from app.core.utils import format_number, to_timezone
+    from app.bot.handlers.transaction import (
+        extract_manual_usd_rate, get_record_usd_rate, get_payout_usdt_amount, build_transaction_reply,
+    )
+    from app.bot.handlers.calculator import safe_eval
+
+    deposit = make_record("deposit", "12345.6700", "7.2500", "+12345.67", 5)
+    payout_u = make_record("payout", "7250.0000", "7.2500", "下发1000u", 3)
+    rate = Decimal("7.25")
+    naive = datetime.now()
+
+    records = [
+        make_record("deposit", f"{1000 + i * 37}.5000", "7.2500", f"+{1000 + i * 37}.5", 200 - i)
+        if i % 4 else make_record("payout", "500.0000", "7.2500", "下发500", 200 - i)
+        for i in range(50)
+    ]
+    config = SimpleNamespace(usd_rate=Decimal("7.25"), fee_percent=Decimal("5"), decimal_mode=True)
+    deposits = [r for r in records if r.type == "deposit"]
+    payouts = [r for r in records if r.type == "payout"]
+    summary = {
+        "total_deposit": sum((r.amount for r in deposits), Decimal(0)), "count_deposit": len(deposits),
+        "total_payout": sum((r.amount for r in payouts), Decimal(0)), "count_payout": len(payouts),
+    }
+
+    return {
+        "format_number": lambda: format_number(Decimal("1234567.8912")),
+        "to_timezone": lambda: to_timezone(naive),
+        "extract_manual_usd_rate": lambda: extract_manual_usd_rate("+1000/7.25"),
+        "get_record_usd_rate": lambda: get_record_usd_rate(deposit, rate),
+        "get_payout_usdt_amount": lambda: get_payout_usdt_amount(payout_u, rate),
+        "safe_eval": lambda: safe_eval("(1200+350)*3/4-12"),
+        "build_transaction_reply[50 records]": lambda: build_transaction_reply(
+            config, summary, deposits[-5:], payouts[-5:], records,
+        ),
+    }
+
+
+def seed(db_path: str, rows: int):
+    """`rows` ledger rows over GROUPS groups and DAYS days; the bench group gets its share, ~1/DAYS of it today."""
+    from app.core.utils import get_now
+
+    today = get_now().replace(tzinfo=None)
+    rng = random.Random(rows)
+    data = []
+    for i in range(rows):
+        group_id = BENCH_GROUP_ID if i % GROUPS == 0 else -(2000 + i % GROUPS)
+        created_at = today - timedelta(days=rng.randrange(DAYS), seconds=rng.randrange(3600))
+        type_ = "payout" if i % 5 == 0 else "deposit"
+        amount = rng.randrange(100, 100000)
+        data.append((
+            BENCH_BOT_ID, group_id, 1, "bench", type_, amount, "RMB", 0, 7.25,
+            created_at.strftime("%Y-%m-%d %H:%M:%S.%f"), f"+{amount}",
+        ))
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany(
+            "INSERT INTO ledger_records (bot_id, group_id, operator_id, operator_name, type, amount, currency, "
+            "fee_applied, usd_rate_snapshot, created_at, original_text) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            data,
+        )
+        conn.execute(
+            "INSERT INTO group_configs (bot_id, group_id, group_name, is_active, fee_percent, usd_rate, decimal_mode) "
+            "VALUES (?, ?, ?, 1, 5, 7.25, 1)",
+            (BENCH_BOT_ID, BENCH_GROUP_ID, "bench"),
+        )
+
+
+async def db_benchmarks(rows: int, rounds: int) -> dict:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    from app.core.database import Base
+    from app.services.ledger_service import LedgerService
+
+    label = f"{rows // 1000}k" if rows < 1_000_000 else f"{rows // 1_000_000}M"
+    db_path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    seed(db_path, rows)
+
+    results = {}
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        service = LedgerService(session)
+
+        async def record():
+            await service.record_transaction(
+                BENCH_BOT_ID, BENCH_GROUP_ID, "deposit", Decimal("1000"), 1, "bench", "+1000",
+            )
+
+        async def summary():
+            await service.get_daily_summary(BENCH_GROUP_ID, BENCH_BOT_ID)
+
+        results[f"record_transaction[{label}]"] = await measure_async(record, rounds, 20)
+        results[f"get_daily_summary[{label}]"] = await measure_async(summary, rounds, 20)
+    await engine.dispose()
+    return results
+
+
+def fmt(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}us"
+    return f"{seconds * 1e3:.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", default="10000,100000", help="Comma-separated ledger sizes, e.g. 10000,100000,1000000")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--only", default=None, help="Run only benchmarks whose name contains this")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--save", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    results = {}
+    for name, fn in micro_benchmarks().items():
+        if not args.only or args.only in name:
+            results[name] = measure(fn, args.rounds)
+    for rows in (int(r) for r in args.rows.split(",") if r):
+        for name, timings in asyncio.run(db_benchmarks(rows, args.rounds)).items():
+            if not args.only or args.only in name:
+                results[name] = timings
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+
+    regressions = []
+    print(f"{'benchmark':<38}{'median':>11}{'min':>11}{'baseline':>11}{'change':>9}")
+    for name, timings in results.items():
+        median = statistics.median(timings)
+        line = f"{name:<38}{fmt(median):>11}{fmt(min(timings)):>11}"
+        if name in baseline:
+            change = median / baseline[name] - 1
+            line += f"{fmt(baseline[name]):>11}{change:>+9.0%}"
+            if change > args.threshold:
+                regressions.append(name)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        baseline.update({name: statistics.median(timings) for name, timings in results.items()})
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {os.path.relpath(BASELINE_PATH, ROOT)}")
+    elif regressions:
+        print(f"FAIL: {len(regressions)} benchmark(s) more than {args.threshold:.0%} slower than baseline")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
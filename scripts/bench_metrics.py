@@ -0,0 +1,104 @@
+"""
+Overhead of the Prometheus instrumentation (app/core/metrics.py) on the hot
+paths: each instrumented operation is timed with and without its hook and the
+difference per call is reported.
+
+- handler: an async PTB callback, bare vs wrapped by `instrument_handlers`
+- db query: `SELECT 1` on in-memory SQLite, plain engine vs `instrument_engine`
+- redis timer / cache, update, broadcast counters / Bot API recorder: the
+  recorder call alone
+
+Usage: python scripts/bench_metrics.py [--rounds N]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+os.environ.setdefault("REDIS_URL", "")
+os.environ.setdefault("SENTRY_DSN", "")
+
+from bench_ledger import measure, fmt  # noqa: E402
+
+
+async def measure_loop(fn, rounds: int, loops: int) -> list[float]:
+    await fn()
+    results = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            await fn()
+        results.append((time.perf_counter() - started) / loops)
+    return results
+
+
+async def handler_pair(rounds: int) -> tuple[list[float], list[float]]:
+    from app.core.metrics import metrics
+
+    async def callback(update, context):
+        return None
+
+    timed = metrics._timed(callback)
+    bare = await measure_loop(lambda: callback(None, None), rounds, 20000)
+    wrapped = await measure_loop(lambda: timed(None, None), rounds, 20000)
+    return bare, wrapped
+
+
+async def db_pair(rounds: int) -> tuple[list[float], list[float]]:
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from app.core.metrics import metrics
+
+    plain, instrumented = create_async_engine("sqlite+aiosqlite:///:memory:"), create_async_engine("sqlite+aiosqlite:///:memory:")
+    metrics.instrument_engine(instrumented)
+    results = ([], [])
+    async with plain.connect() as plain_conn, instrumented.connect() as instrumented_conn:
+        # Alternate rounds so machine noise hits both sides alike
+        for _ in range(rounds):
+            for conn, timings in ((plain_conn, results[0]), (instrumented_conn, results[1])):
+                timings.extend(await measure_loop(lambda: conn.execute(text("SELECT 1")), 1, 500))
+    await plain.dispose()
+    await instrumented.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    from loguru import logger
+    from app.core.metrics import metrics
+
+    logger.remove()
+    if not metrics.enabled:
+        sys.exit("METRICS_ENABLED is off; nothing to measure")
+
+    def redis_timer():
+        with metrics.redis_timer("get"):
+            pass
+
+    print(f"{'operation':<26}{'bare':>11}{'instrumented':>14}{'overhead':>11}")
+    for name, (bare, wrapped) in (
+        ("handler", asyncio.run(handler_pair(args.rounds))),
+        ("db query", asyncio.run(db_pair(args.rounds))),
+    ):
+        bare_median, wrapped_median = statistics.median(bare), statistics.median(wrapped)
+        print(f"{name:<26}{fmt(bare_median):>11}{fmt(wrapped_median):>14}{fmt(wrapped_median - bare_median):>11}")
+
+    for name, fn in (
+        ("redis timer", redis_timer),
+        ("cache hit/miss", lambda: metrics.record_cache("group_config", True)),
+        ("update counter", lambda: metrics.record_update(1)),
+        ("broadcast counter", lambda: metrics.record_broadcast(1, True)),
+        ("bot api recorder", lambda: metrics.record_telegram("sendMessage", 0.01, 200)),
+    ):
+        print(f"{name:<26}{'':>11}{'':>14}{fmt(statistics.median(measure(fn, args.rounds))):>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,25 @@
 #!/bin/bash
 
 # JishuBot Watchdog Script
-# This script checks if the local web server is responding.
-# If not, it assumes the bot has hung/crashed and restarts the systemd service.
+# This script checks the local /health endpoint.
+# Individual bots are restarted in-process by the health supervisor, so the
+# whole service is only restarted when the server doesn't answer or reports
+# that its health checks stopped running (HTTP 503).
 
-APP_URL="http://127.0.0.1:8000/"
+APP_URL="http://127.0.0.1:8000/health"
 SERVICE_NAME="jishubot.service"
 LOG_FILE="/home/ubuntu/jishubot/watchdog.log"
 
 # Perform curl request, timeout 10s
-HTTP_STATUS=$(curl -o /dev/null -s -w "%{http_code}\n" -m 10 "$APP_URL")
+BODY_FILE=$(mktemp)
+HTTP_STATUS=$(curl -o "$BODY_FILE" -s -w "%{http_code}\n" -m 10 "$APP_URL")
 
 if [ "$HTTP_STATUS" -ne 200 ]; then
-    echo "$(date '+%Y-%m-%d %H:%M:%S') - Watchdog: Bot is unresponsive (HTTP $HTTP_STATUS). Restarting service..." >> "$LOG_FILE"
+    echo "$(date '+%Y-%m-%d %H:%M:%S') - Watchdog: Service is unresponsive (HTTP $HTTP_STATUS). Restarting service..." >> "$LOG_FILE"
     sudo systemctl restart "$SERVICE_NAME"
     echo "$(date '+%Y-%m-%d %H:%M:%S') - Watchdog: Restart command issued." >> "$LOG_FILE"
+elif grep -q '"status":"degraded"' "$BODY_FILE"; then
+    echo "$(date '+%Y-%m-%d %H:%M:%S') - Watchdog: Some bots are unhealthy (being restarted in-process): $(grep -o '"unhealthy_bots":[0-9]*' "$BODY_FILE")" >> "$LOG_FILE"
 fi
+
+rm -f "$BODY_FILE"
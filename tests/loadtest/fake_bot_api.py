@@ -0,0 +1,172 @@
+"""
+Fake Telegram Bot API server for load tests (raw ASGI, run under uvicorn).
+
+- `getUpdates` long-polls a per-token queue filled through `POST /_inject`.
+- `sendMessage` is matched (FIFO per bot and chat) against the injection time of
+  the update it answers; the difference is the reply latency. After `POST
+  /_reset` with `{"coalesced": true}` (debounced bill replies), a
+  `sendMessage` or `editMessageText` answers every pending update of its chat.
+- `getMe`, webhook calls, `getChatMember` and any other method answer with a
+  minimal valid result.
+- `GET /_stats` reports latency percentiles and per-method counts; `POST
+  /_reset` clears them.
+"""
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from urllib.parse import parse_qs
+
+
+class FakeBotAPI:
+    def __init__(self):
+        self.queues: dict[str, deque] = defaultdict(deque)
+        self.waiters: dict[str, asyncio.Event] = defaultdict(asyncio.Event)
+        self.next_update_id: dict[str, int] = defaultdict(lambda: 1)
+        self.message_id = 0
+        self.reset()
+
+    def reset(self, coalesced: bool = False):
+        self.coalesced = coalesced
+        # Statistics only: bots may be parked in getUpdates on the current queues
+        self.pending: dict[tuple[str, int], deque] = defaultdict(deque)
+        self.latencies: list[float] = []
+        self.calls: dict[str, int] = defaultdict(int)
+        self.injected = 0
+        self.unmatched_replies = 0
+
+    # --- Control endpoints ---
+
+    def inject(self, items: list[dict]) -> int:
+        now = time.perf_counter()
+        for item in items:
+            token, update = item["token"], item["update"]
+            update["update_id"] = self.next_update_id[token]
+            self.next_update_id[token] += 1
+            self.queues[token].append(update)
+            self.pending[(token, update["message"]["chat"]["id"])].append(now)
+            self.waiters[token].set()
+        self.injected += len(items)
+        return len(items)
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 1)
+
+        return {
+            "injected": self.injected,
+            "replied": len(latencies),
+            "unanswered": sum(len(q) for q in self.pending.values()),
+            "unmatched_replies": self.unmatched_replies,
+            "p50_ms": percentile(50),
+            "p90_ms": percentile(90),
+            "p99_ms": percentile(99),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+            "calls": dict(self.calls),
+        }
+
+    # --- Bot API methods ---
+
+    async def get_updates(self, token: str, params: dict):
+        queue = self.queues[token]
+        offset = int(params.get("offset") or 0)
+        while queue and queue[0]["update_id"] < offset:
+            queue.popleft()
+        if not queue:
+            event = self.waiters[token]
+            event.clear()
+            try:
+                await asyncio.wait_for(event.wait(), float(params.get("timeout") or 0))
+            except asyncio.TimeoutError:
+                pass
+        limit = int(params.get("limit") or 100)
+        return [queue[i] for i in range(min(limit, len(queue)))]
+
+    def answer(self, token: str, chat_id: int):
+        pending = self.pending.get((token, chat_id))
+        if not pending:
+            self.unmatched_replies += 1
+            return
+        now = time.perf_counter()
+        for _ in range(len(pending) if self.coalesced else 1):
+            self.latencies.append(now - pending.popleft())
+
+    def send_message(self, token: str, params: dict):
+        chat_id = int(params["chat_id"])
+        self.answer(token, chat_id)
+        self.message_id += 1
+        return {
+            "message_id": self.message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "supergroup", "title": f"Group {chat_id}"},
+            "from": self.me(token),
+            "text": params.get("text", ""),
+        }
+
+    @staticmethod
+    def me(token: str) -> dict:
+        bot_id = int(token.split(":")[0])
+        return {"id": bot_id, "is_bot": True, "first_name": f"Load {bot_id}", "username": f"load{bot_id}_bot"}
+
+    async def call(self, token: str, method: str, params: dict):
+        self.calls[method] += 1
+        if method == "getUpdates":
+            return await self.get_updates(token, params)
+        if method == "sendMessage":
+            return self.send_message(token, params)
+        if method == "editMessageText":
+            self.answer(token, int(params["chat_id"]))
+            return True
+        if method == "getMe":
+            return self.me(token)
+        if method == "getChatMember":
+            user_id = int(params.get("user_id", 0))
+            return {"status": "member", "user": {"id": user_id, "is_bot": False, "first_name": "User"}}
+        return True
+
+
+api = FakeBotAPI()
+
+
+def _parse_params(body: bytes, content_type: str) -> dict:
+    if not body:
+        return {}
+    if content_type.startswith("application/json"):
+        return json.loads(body)
+    # PTB sends form fields; non-string values are JSON encoded
+    return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+
+async def app(scope, receive, send):
+    if scope["type"] != "http":
+        return
+    body = b""
+    while True:
+        message = await receive()
+        body += message.get("body", b"")
+        if not message.get("more_body"):
+            break
+    headers = dict(scope["headers"])
+    path = scope["path"]
+
+    if path == "/_inject":
+        result = api.inject(json.loads(body))
+    elif path == "/_stats":
+        result = api.stats()
+    elif path == "/_reset":
+        api.reset(**(json.loads(body) if body else {}))
+        result = True
+    elif path.startswith("/bot"):
+        token, _, method = path[4:].partition("/")
+        params = _parse_params(body, headers.get(b"content-type", b"").decode())
+        result = {"ok": True, "result": await api.call(token, method, params)}
+    else:
+        result = {"ok": False, "error_code": 404, "description": "Not Found"}
+
+    payload = json.dumps(result).encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": payload})
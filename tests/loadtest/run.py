@@ -0,0 +1,240 @@
+"""
+Load test: N bots x M groups x K transactions per second (per group) through the
+real BotManager, setup_handlers and LedgerService, against the fake Bot API in
+fake_bot_api.py (started in a subprocess, bots reach it via TG_API_BASE_URL).
+
+Uses a temporary SQLite DB seeded with licensed, started groups and a bot admin
+who sends "+100" messages. Reports reply latency (update injected -> sendMessage
+received), DB commits and ledger rows per second, and errors (handler errors,
+unanswered updates). Numbers are only comparable between runs on the same
+machine. With --debounce S the groups use debounced bill replies (合并回复,
+quiet window S seconds): compare the sendMessage/editMessageText counts with a
+run without it; latency then includes the window. The outbound governor
+runs with the production OUTBOUND_CHAT_RATE unless --chat-rate is given
+(0 turns the per-chat budget off).
+
+Usage: python tests/loadtest/run.py [--bots N] [--groups M] [--rate K]
+                                    [--duration S] [--supervisor]
+                                    [--debounce S] [--chat-rate R] [--json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(os.path.dirname(HERE))
+sys.path.append(ROOT)
+
+ADMIN_USER_ID = 777000
+FIRST_BOT_ID = 900001
+
+
+def group_chat_id(bot_index: int, group_index: int) -> int:
+    return -(1_000_000_000 + bot_index * 10_000 + group_index)
+
+
+def start_fake_api() -> tuple[subprocess.Popen, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, "-c",
+         f"import sys; sys.path.insert(0, {HERE!r}); import uvicorn, fake_bot_api; "
+         f"uvicorn.run(fake_bot_api.app, host='127.0.0.1', port={port}, log_level='error', backlog=4096)"],
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return server, f"http://127.0.0.1:{port}"
+
+
+async def seed(n_bots: int, n_groups: int, debounce: bool) -> list:
+    from app.core.database import engine, Base, AsyncSessionLocal
+    from app.models.bot import Bot, BotAdminUser
+    from app.models.group import GroupConfig
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        bots = []
+        for b in range(n_bots):
+            bot = Bot(id=b + 1, token=f"{FIRST_BOT_ID + b}:LOADTEST{b:06d}", name=f"Load {b}", status="active")
+            session.add(bot)
+            bots.append(bot)
+            session.add(BotAdminUser(bot_id=b + 1, user_id=ADMIN_USER_ID, username="@loadtester"))
+            for g in range(n_groups):
+                session.add(GroupConfig(
+                    bot_id=b + 1, group_id=group_chat_id(b, g), group_name=f"Load group {g}",
+                    is_active=True, active_start_time=datetime.now(),
+                    expire_at=datetime.now() + timedelta(days=30), reply_debounce=debounce,
+                ))
+        await session.commit()
+    return bots
+
+
+def make_update(bot_index: int, group_index: int, message_id: int) -> dict:
+    chat_id = group_chat_id(bot_index, group_index)
+    return {
+        "token": f"{FIRST_BOT_ID + bot_index}:LOADTEST{bot_index:06d}",
+        "update": {
+            "message": {
+                "message_id": message_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "supergroup", "title": f"Load group {group_index}"},
+                "from": {"id": ADMIN_USER_ID, "is_bot": False, "first_name": "Load", "username": "loadtester"},
+                "text": "+100",
+            }
+        },
+    }
+
+
+async def run(args, base_url: str) -> dict:
+    import httpx
+    from sqlalchemy import event, func, select
+    from loguru import logger
+    from app.core.database import engine, AsyncSessionLocal
+    from app.core.bot_manager import bot_manager
+    from app.core.health import bot_health
+    from app.core.reply_coalescer import reply_coalescer
+    from app.core.telegram_http import telegram_http
+    from app.models.group import LedgerRecord
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    bots = await seed(args.bots, args.groups, args.debounce > 0)
+    await bot_manager.start_all_bots(bots)
+    if len(bot_manager.apps) != args.bots:
+        raise RuntimeError(f"Only {len(bot_manager.apps)}/{args.bots} bots started")
+
+    commits = 0
+
+    def on_commit(conn):
+        nonlocal commits
+        commits += 1
+
+    event.listen(engine.sync_engine, "commit", on_commit)
+
+    total_rate = args.bots * args.groups * args.rate
+    slots = [(b, g) for b in range(args.bots) for g in range(args.groups)]
+    inject_errors = 0
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        await client.post("/_reset", json={"coalesced": args.debounce > 0})
+        commits = 0
+        started = time.perf_counter()
+        sent = 0
+        while (elapsed := time.perf_counter() - started) < args.duration:
+            due = int(elapsed * total_rate) - sent
+            if due > 0:
+                batch = [make_update(*slots[(sent + i) % len(slots)], sent + i + 1) for i in range(due)]
+                try:
+                    await client.post("/_inject", json=batch)
+                except httpx.HTTPError:
+                    inject_errors += due
+                sent += due
+            await asyncio.sleep(0.05)
+        elapsed = time.perf_counter() - started
+
+        # Let in-flight updates finish
+        deadline = time.perf_counter() + args.drain_timeout
+        while True:
+            stats = (await client.get("/_stats")).json()
+            if stats["unanswered"] == 0 or time.perf_counter() > deadline:
+                break
+            await asyncio.sleep(0.2)
+        drained = time.perf_counter() - started
+
+    db_commits = commits
+    async with AsyncSessionLocal() as session:
+        records = await session.scalar(select(func.count(LedgerRecord.id)))
+    handler_errors = sum(health.errors for health in bot_health.bots.values())
+
+    await reply_coalescer.flush_all()
+    for bot_id in list(bot_manager.apps):
+        await bot_manager.stop_bot(bot_id)
+    await telegram_http.aclose()
+    await engine.dispose()
+
+    return {
+        "bots": args.bots,
+        "groups_per_bot": args.groups,
+        "target_tps": total_rate,
+        "duration_s": round(elapsed, 1),
+        "sent": sent,
+        "replied": stats["replied"],
+        "achieved_tps": round(stats["replied"] / drained, 1),
+        "p50_ms": stats["p50_ms"],
+        "p90_ms": stats["p90_ms"],
+        "p99_ms": stats["p99_ms"],
+        "max_ms": stats["max_ms"],
+        "db_commits_per_s": round(db_commits / drained, 1),
+        "ledger_rows_per_s": round(records / drained, 1),
+        "errors": {
+            "handler": handler_errors,
+            "unanswered": stats["unanswered"],
+            "unmatched_replies": stats["unmatched_replies"],
+            "inject": inject_errors,
+        },
+        "bot_api_calls": stats["calls"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bots", type=int, default=5)
+    parser.add_argument("--groups", type=int, default=10, help="Groups per bot")
+    parser.add_argument("--rate", type=float, default=0.5, help="Transactions per second per group")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--drain-timeout", type=float, default=30.0)
+    parser.add_argument("--supervisor", action="store_true", help="Use POLLING_SUPERVISOR instead of one Updater per bot")
+    parser.add_argument("--debounce", type=float, default=0.0, help="Debounced bill replies with this quiet window (seconds)")
+    parser.add_argument("--chat-rate", type=float, default=None, help="OUTBOUND_CHAT_RATE (messages/s per chat, 0 = off; default: the app's default)")
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_fake_api()
+    db_dir = tempfile.mkdtemp()
+    # Settings are read at import time: configure before importing the app
+    os.environ.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{os.path.join(db_dir, 'loadtest.db')}",
+        "REDIS_URL": "",
+        "SENTRY_DSN": "",
+        "TG_MODE": "polling",
+        "TG_API_BASE_URL": f"{base_url}/bot",
+        "POLLING_SUPERVISOR": "true" if args.supervisor else "false",
+        "SHARDING_ENABLED": "false",
+        "REPLY_DEBOUNCE_SECONDS": str(args.debounce),
+    })
+    if args.chat_rate is not None:
+        os.environ["OUTBOUND_CHAT_RATE"] = str(args.chat_rate)
+    try:
+        result = asyncio.run(run(args, base_url))
+    finally:
+        server.terminate()
+        server.wait()
+
+    if args.json:
+        print(json.dumps(result))
+        return
+    errors = result["errors"]
+    print(f"{result['bots']} bots x {result['groups_per_bot']} groups, target {result['target_tps']} tx/s for {result['duration_s']}s")
+    print(f"  replies:        {result['replied']}/{result['sent']} ({result['achieved_tps']} tx/s)")
+    print(f"  reply latency:  p50 {result['p50_ms']} ms, p90 {result['p90_ms']} ms, p99 {result['p99_ms']} ms, max {result['max_ms']} ms")
+    print(f"  database:       {result['db_commits_per_s']} commits/s, {result['ledger_rows_per_s']} ledger rows/s")
+    print(f"  errors:         handler {errors['handler']}, unanswered {errors['unanswered']}, "
+          f"unmatched replies {errors['unmatched_replies']}, inject {errors['inject']}")
+    print(f"  Bot API calls:  {result['bot_api_calls']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import asyncio
+import sys
+import os
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.models.group import LedgerRecord, Base
+from app.models.bot import Bot # Import Bot to register table
+from app.services.ledger_service import LedgerService
+from app.bot.handlers import transaction
+
+
+def make_update(text, replies):
+    async def reply_text(reply, **kwargs):
+        replies.append(reply)
+    return SimpleNamespace(
+        message=SimpleNamespace(text=text, caption=None, reply_text=reply_text),
+        effective_chat=SimpleNamespace(id=-100, title="Group", type="supergroup"),
+        effective_user=SimpleNamespace(id=888, full_name="UserA"),
+    )
+
+
+async def test_batch_transactions():
+    print("--- Testing Batch Transactions ---")
+    if transaction.parse_transaction_line(" 入款1000/7.2 ") != ("deposit", Decimal("1000"), False, Decimal("7.2")) \
+            or transaction.parse_transaction_line("下发100u") != ("payout", Decimal("100"), True, None) \
+            or transaction.parse_transaction_line("你好") is not None:
+        print("❌ parse_transaction_line")
+        return
+    print("✅ Lines parsed with /rate and u suffixes")
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    inserts = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: inserts.append(statement) if statement.startswith("INSERT INTO ledger_records") else None)
+
+    async def allow(update, context, service):
+        return True
+    transaction.AsyncSessionLocal = AsyncSessionLocal
+    transaction.check_operator_permission = allow
+    context = SimpleNamespace(bot_data={"db_id": 1}, bot=None)
+
+    async with AsyncSessionLocal() as session:
+        service = LedgerService(session)
+        await service.get_group_config(-100, 1)
+        await service.start_recording(-100, 1)
+        await service.update_group_config(-100, 1, usd_rate=Decimal("7"))
+
+    replies = []
+    await transaction.handle_transaction(make_update("+1000\n\n入款 2000/7.5\n下发100u\n+abc", replies), context)
+    if inserts or len(replies) != 1 or "第4行: +abc" not in replies[0]:
+        print(f"❌ Invalid line did not reject the batch: {replies} ({len(inserts)} inserts)")
+        return
+    print("✅ A batch with an invalid line records nothing")
+
+    replies = []
+    await transaction.handle_transaction(make_update("+1000\n\n入款 2000/7.5\n下发100u", replies), context)
+    async with AsyncSessionLocal() as session:
+        records = (await session.execute(select(LedgerRecord).order_by(LedgerRecord.id))).scalars().all()
+    got = [(r.type, r.amount, r.usd_rate_snapshot, r.original_text) for r in records]
+    expected = [
+        ("deposit", Decimal("1000"), Decimal("7"), "+1000"),
+        ("deposit", Decimal("2000"), Decimal("7.5"), "入款 2000/7.5"),
+        ("payout", Decimal("700"), Decimal("7"), "下发100u"),
+    ]
+    if got != expected:
+        print(f"❌ Recorded {got}")
+        return
+    if len(inserts) != 1 or len(replies) != 1 or "入款 (2笔)" not in replies[0]:
+        print(f"❌ {len(inserts)} INSERT statements, {len(replies)} replies")
+        return
+    print("✅ 3 lines -> 1 INSERT, 1 commit, 1 bill reply")
+
+    replies = []
+    await transaction.handle_transaction(make_update("+500 客户A\n备注", replies), context)
+    async with AsyncSessionLocal() as session:
+        last = (await session.execute(select(LedgerRecord).order_by(LedgerRecord.id.desc()))).scalars().first()
+    if last.amount != Decimal("500") or last.original_text != "+500 客户A\n备注" or len(replies) != 1:
+        print(f"❌ Single command with a note: {last.amount} {last.original_text!r}")
+        return
+    print("✅ Single command keeps trailing note lines in original_text")
+    print("✅ Batch Transactions Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_batch_transactions())
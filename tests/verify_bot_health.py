@@ -0,0 +1,132 @@
+import asyncio
+import sys
+import os
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from telegram import User
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core import bot_manager as bot_manager_module
+from app.core.bot_manager import bot_manager
+from app.core.health import bot_health
+from app.models.bot import Bot
+from app.models.group import Base
+
+class FakeUpdater:
+    def __init__(self):
+        self.running = False
+
+    async def start_polling(self, error_callback=None):
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+class FakeBot:
+    def __init__(self, token):
+        self.token = token
+        self.bot = User(id=1, first_name="Fake", is_bot=True)
+
+    async def get_me(self):
+        return self.bot
+
+class FakeApp:
+    def __init__(self, token):
+        self.bot = FakeBot(token)
+        self.updater = FakeUpdater()
+        self.running = False
+
+    async def initialize(self):
+        if self.bot.token in broken_tokens:
+            raise RuntimeError("Bot API unreachable")
+
+    async def start(self):
+        self.running = True
+
+    async def stop(self):
+        self.running = False
+
+    async def shutdown(self):
+        pass
+
+broken_tokens = set()
+
+async def test_bot_health():
+    print("--- Testing Bot Health Supervisor ---")
+    settings.TG_MODE = "polling"
+    settings.POLLING_SUPERVISOR = False
+    settings.SHARDING_ENABLED = False
+    settings.BOT_HEALTH_MIN_ERRORS = 20
+    settings.BOT_RESTART_BACKOFF_BASE = 10
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    bot_manager_module.AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with bot_manager_module.AsyncSessionLocal() as session:
+        for bot_id in (1, 2, 3):
+            session.add(Bot(id=bot_id, token=f"{bot_id}:token", status="active"))
+        await session.commit()
+
+    async def no_save(*args):
+        pass
+    bot_manager._save_bot_info = no_save
+    bot_manager._build_app = lambda token, bot_db_id, bot_info=None: FakeApp(token)
+
+    for bot_id in (1, 2, 3):
+        await bot_manager.start_bot(f"{bot_id}:token", bot_id)
+    originals = dict(bot_manager.apps)
+
+    # Bot 1 healthy, bot 2's polling loop died, bot 3's handlers keep failing
+    for bot_id in (1, 2, 3):
+        for _ in range(10):
+            bot_health.record_update(bot_id)
+    originals[2].updater.running = False
+    for _ in range(25):
+        bot_health.record_error(3, ValueError("boom"))
+
+    restarted = await bot_health.check()
+    print(f"First check restarted: {restarted}")
+    if restarted != [2, 3]:
+        print("❌ Wrong bots restarted!")
+        return
+    if bot_manager.apps[1] is not originals[1] or bot_manager.apps[2] is originals[2]:
+        print("❌ Restart was not limited to the unhealthy bots!")
+        return
+
+    # Bot 2 dies again and cannot come back yet: backoff doubles
+    broken_tokens.add("2:token")
+    bot_manager.apps[2].updater.running = False
+    bot_health.bots[2].next_restart_at = 0
+    await bot_health.check()
+    report = {bot["bot_id"]: bot for bot in bot_health.report()["bots"]}
+    print(f"Bot 2 after failed restart: {report[2]['status']}, next restart in {report[2]['next_restart_in']}s")
+    if report[2]["status"] != "down" or not 15 < report[2]["next_restart_in"] <= 20:
+        print("❌ Failed restart not backed off!")
+        return
+    if await bot_health.check():
+        print("❌ Restarted again inside the backoff window!")
+        return
+
+    # Telegram recovers and the backoff elapses
+    broken_tokens.clear()
+    bot_health.bots[2].next_restart_at = 0
+    if await bot_health.check() != [2] or 2 not in bot_manager.apps:
+        print("❌ Bot not restored after backoff!")
+        return
+    await bot_health.check()
+
+    report = bot_health.report()
+    print(f"Report: status={report['status']}, running={report['running_bots']}, "
+          f"restarts={[bot['restarts'] for bot in report['bots']]}")
+    if report["status"] != "ok" or report["running_bots"] != 3:
+        print("❌ Health report wrong!")
+        return
+
+    print("✅ Unhealthy bots restarted individually with backoff!")
+
+if __name__ == "__main__":
+    asyncio.run(test_bot_health())
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import sys
+import os
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.sharding import shard_coordinator
+from app.models.bot import Bot
+from app.models.group import Base
+from app.services import config_service
+from app.services.ledger_service import LedgerService
+from app.bot.handlers.transaction import build_transaction_message
+
+
+def keyboard_rows(markup):
+    return [[(button.text, button.url) for button in row] for row in markup.inline_keyboard]
+
+
+async def test_bot_settings():
+    print("--- Testing Bot Settings Cache ---")
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    config_service.AsyncSessionLocal = AsyncSessionLocal
+    bot_queries = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: bot_queries.append(statement) if "FROM bots" in statement else None)
+
+    async with AsyncSessionLocal() as session:
+        session.add(Bot(id=1, token="t1", button_config=json.dumps({"bill_text": "账单", "support_url": "https://t.me/help"})))
+        await session.commit()
+
+    async with AsyncSessionLocal() as session:
+        service = LedgerService(session)
+        config = await service.get_group_config(-100, 1)
+        bot_queries.clear()
+        markups = [(await build_transaction_message(service, session, chat_id, 1, config))[1] for chat_id in (-100, -200, -100)]
+    rows = [keyboard_rows(markup) for markup in markups]
+    if len(bot_queries) != 1:
+        print(f"❌ {len(bot_queries)} bots queries for 3 replies")
+        return
+    if rows[0][0] != [("账单", f"http://{settings.DOMAIN}/bill/-100")] or rows[1][0][0][1].endswith("/bill/-100") \
+            or rows[0][2] != [("24小时客服", "https://t.me/help")] or rows[0] != rows[2]:
+        print(f"❌ Unexpected keyboards: {rows}")
+        return
+    print("✅ 3 bill replies, 1 bots query; bill link filled per chat, static rows shared")
+
+    if await config_service.get_bot_button_config(1) != {"bill_text": "账单", "support_url": "https://t.me/help"} or len(bot_queries) != 1:
+        print("❌ get_bot_button_config did not use the cache")
+        return
+    print("✅ get_bot_button_config (welcome, start) served from the same cache")
+
+    async with AsyncSessionLocal() as session:
+        bot = await session.get(Bot, 1)
+        bot.button_config = json.dumps({"bill_text": "新账单"})
+        await session.commit()
+    bot_queries.clear()
+    stale = await config_service.get_bot_settings(1)
+    await shard_coordinator.invalidate_bot_config(1)
+    fresh = await config_service.get_bot_settings(1)
+    if stale.bill_text != "账单" or fresh.bill_text != "新账单" or len(bot_queries) != 1:
+        print(f"❌ Invalidation: {stale.bill_text} -> {fresh.bill_text} ({len(bot_queries)} queries)")
+        return
+    print("✅ Admin invalidation reloads the row once")
+
+    settings.BOT_SETTINGS_CACHE_TTL = 0
+    config_service.invalidate_bot_config(1)
+    await config_service.get_bot_settings(1)
+    await config_service.get_bot_settings(1)
+    missing = await config_service.get_bot_settings(404)
+    if len(bot_queries) != 4 or missing.bill_text != "点击跳转完整账单" or missing.button_config != {}:
+        print(f"❌ TTL / unknown bot: {len(bot_queries)} queries, {missing}")
+        return
+    print("✅ Entries expire after BOT_SETTINGS_CACHE_TTL; unknown bots get the defaults")
+    print("✅ Bot Settings Cache Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_bot_settings())
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import sys
+import os
+from datetime import timedelta
+import httpx
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.main import app
+from app.api import admin
+from app.core.config import settings
+from app.core.database import get_db
+from app.core.utils import get_now
+from app.models.bot import Bot
+from app.models.group import GroupConfig, Base
+from app.services import config_service
+
+BOTS = 30
+
+
+async def test_bots_ui():
+    print(f"--- Testing Bots Page ({BOTS} bots) ---")
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    config_service.AsyncSessionLocal = AsyncSessionLocal
+    statements = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+
+    now = get_now()
+    async with AsyncSessionLocal() as session:
+        session.add_all(Bot(id=i, token=f"t{i}", name="seven" if i == 7 else f"bot{i}", button_config=json.dumps({"bill_text": f"bill-{i}"}))
+                        for i in range(1, BOTS + 1))
+        await session.commit()
+        # Bot 1: more licensed groups than the page shows; bot 2: one licensed, one expired
+        await session.execute(insert(GroupConfig), [
+            {"group_id": -i, "bot_id": 1, "group_name": f"G{i}", "expire_at": now + timedelta(days=i)}
+            for i in range(1, admin.AUTHORIZED_ACCOUNTS_PER_BOT + 11)
+        ] + [
+            {"group_id": -1000, "bot_id": 2, "group_name": "licensed", "expire_at": now + timedelta(days=1)},
+            {"group_id": -1001, "bot_id": 2, "group_name": "expired", "expire_at": now - timedelta(days=1)},
+        ])
+        await session.commit()
+
+    async def override_db():
+        async with AsyncSessionLocal() as session:
+            yield session
+    app.dependency_overrides[get_db] = override_db
+    cookies = {admin.COOKIE_NAME: f"auth_{settings.ADMIN_USERNAME}_{settings.SECRET_KEY}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", cookies=cookies) as client:
+        statements.clear()
+        page = (await client.get("/admin/ui/bots")).text
+        if len(statements) != 3:
+            print(f"❌ Page 1 took {len(statements)} statements")
+            return
+        if f"已授权账号 ({admin.AUTHORIZED_ACCOUNTS_PER_BOT + 10})" not in page or "已授权账号 (1)" not in page \
+                or f"仅显示最近到期的 {admin.AUTHORIZED_ACCOUNTS_PER_BOT} 个" not in page or "expired" in page:
+            print("❌ Authorized accounts not capped / filtered per bot")
+            return
+        last_shown = f"G{admin.AUTHORIZED_ACCOUNTS_PER_BOT}</div>"
+        if "G1</div>" not in page or last_shown not in page or f"G{admin.AUTHORIZED_ACCOUNTS_PER_BOT + 1}</div>" in page:
+            print("❌ Capped list does not show the accounts expiring soonest")
+            return
+        if "ID: 24<" not in page or "ID: 25<" in page or "bill-1" not in page:
+            print("❌ Page 1 does not hold bots 1-24")
+            return
+        print("✅ Page 1: count, bots and capped authorized accounts in 3 statements")
+
+        page = (await client.get("/admin/ui/bots", params={"page": 2})).text
+        if "ID: 25<" not in page or f"ID: {BOTS}<" not in page or "ID: 24<" in page:
+            print("❌ Page 2 does not hold the remaining bots")
+            return
+        page = (await client.get("/admin/ui/bots", params={"q": "bot3"})).text
+        if "ID: 3<" not in page or "ID: 30<" not in page or "ID: 1<" in page:
+            print("❌ Name search")
+            return
+        page = (await client.get("/admin/ui/bots", params={"q": "7"})).text # Bot 7 is named "seven"
+        if "ID: 7<" not in page or "ID: 17<" not in page or "ID: 1<" in page:
+            print("❌ Id search")
+            return
+        print("✅ Paging and name / id search")
+
+        # The cached parse is shared, so it must not be writable by callers
+        shared = await config_service.get_bot_button_config(1)
+        try:
+            shared["bill_text"] = "changed"
+            print("❌ Cached button config is writable")
+            return
+        except TypeError:
+            pass
+        print("✅ Cached button config is read-only")
+
+        statements.clear()
+        response = await client.post("/admin/bot/1/buttons", json={"bill_text": "bill-new"})
+        fresh = await config_service.get_bot_settings(1)
+        page = (await client.get("/admin/ui/bots")).text
+        if response.status_code != 200 or fresh.bill_text != "bill-new" or "bill-new" not in page or "bill-2" not in page:
+            print(f"❌ Button config save: {response.status_code} {fresh.bill_text}")
+            return
+        print("✅ Saving buttons reloads the bot's cached settings")
+    app.dependency_overrides.clear()
+    print("✅ Bots Page Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_bots_ui())
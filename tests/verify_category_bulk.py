@@ -0,0 +1,95 @@
+import asyncio
+import sys
+import os
+from sqlalchemy import event, select, func, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.models.bot import Bot
+from app.models.group import GroupConfig, GroupCategory, Base, group_category_association
+from app.services.category_service import CategoryService
+
+GROUPS = 10000
+
+async def test_bulk_category_ops():
+    print(f"--- Testing Set-based Category Ops ({GROUPS} groups) ---")
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statements(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with AsyncSessionLocal() as session:
+        session.add_all([Bot(id=1, token="t1"), Bot(id=2, token="t2")])
+        session.add_all([GroupCategory(id=1, name="A", bot_id=1), GroupCategory(id=2, name="B", bot_id=1)])
+        await session.commit()
+        await session.execute(insert(GroupConfig), [
+            {"group_id": -1000000 - i, "bot_id": 1} for i in range(GROUPS)
+        ] + [{"group_id": -5000000, "bot_id": 2}])
+        await session.commit()
+
+        async def members(cat_id):
+            return await session.scalar(
+                select(func.count()).select_from(group_category_association)
+                .where(group_category_association.c.category_id == cat_id)
+            )
+
+        service = CategoryService(session)
+        chat_ids = [-1000000 - i for i in range(GROUPS)]
+        half = chat_ids[:GROUPS // 2]
+
+        checks = []
+
+        # Add: one INSERT ... SELECT, duplicates and foreign groups ignored
+        statements.clear()
+        added = await service.add_groups(1, half, bot_id=1)
+        checks.append(("add", added == GROUPS // 2, len(statements)))
+
+        statements.clear()
+        added = await service.add_groups(1, chat_ids + [-5000000], bot_id=1)
+        checks.append(("add (overlapping)", added == GROUPS - GROUPS // 2 and await members(1) == GROUPS, len(statements)))
+
+        # Move half to B
+        statements.clear()
+        moved = await service.move_groups(1, 2, half, bot_id=1)
+        checks.append(("move", moved == {"added": GROUPS // 2, "removed": GROUPS // 2}, len(statements)))
+
+        # Moving into the same category keeps its members
+        statements.clear()
+        moved = await service.move_groups(2, 2, half, bot_id=1)
+        checks.append(("move (same category)", moved == {"added": 0, "removed": 0} and await members(2) == GROUPS // 2, len(statements)))
+
+        # Replace A with the first 100
+        statements.clear()
+        result = await service.replace_groups(1, chat_ids[:100], bot_id=1)
+        ok = result == {"added": 100, "removed": GROUPS - GROUPS // 2} and await members(1) == 100
+        checks.append(("replace", ok, len(statements)))
+
+        # Remove everything from B
+        statements.clear()
+        removed = await service.remove_groups(2, chat_ids, bot_id=1)
+        checks.append(("remove", removed == GROUPS // 2 and await members(2) == 0, len(statements)))
+
+        failed = False
+        for name, ok, count in checks:
+            # Round trips must not grow with the list: at most a handful of statements + COMMIT
+            if not ok or count > 4:
+                print(f"❌ {name}: ok={ok}, statements={count}")
+                failed = True
+            else:
+                print(f"✅ {name}: {count} statements")
+
+        if not failed:
+            print("✅ Category bulk ops are set-based!")
+
+if __name__ == "__main__":
+    asyncio.run(test_bulk_category_ops())
@@ -0,0 +1,91 @@
+import asyncio
+import sys
+import os
+import tempfile
+from datetime import timedelta
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core import scheduler, sharding
+from app.core.sharding import ShardCoordinator
+from app.core.utils import get_business_day_start
+from app.models.bot import Bot # Import Bot to register table
+from app.models.cluster import LeaderLock, ScheduledRun
+from app.models.group import GroupConfig, Base
+
+
+async def active_groups(AsyncSessionLocal) -> set[int]:
+    async with AsyncSessionLocal() as session:
+        return set((await session.execute(select(GroupConfig.group_id).where(GroupConfig.is_active == True))).scalars())
+
+
+async def test_daily_settlement():
+    print("--- Testing Daily Settlement Catch-up ---")
+    path = os.path.join(tempfile.mkdtemp(), "settlement.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    sharding.AsyncSessionLocal = scheduler.AsyncSessionLocal = AsyncSessionLocal
+
+    day_start = get_business_day_start().replace(tzinfo=None)
+    async with AsyncSessionLocal() as session:
+        session.add_all([
+            GroupConfig(group_id=-100, bot_id=1, is_active=True, active_start_time=day_start - timedelta(hours=5)),
+            GroupConfig(group_id=-200, bot_id=1, is_active=True, active_start_time=day_start - timedelta(minutes=1)),
+            GroupConfig(group_id=-300, bot_id=1, is_active=True, active_start_time=day_start), # /start after the tick
+        ])
+        await session.commit()
+
+    settings.SHARDING_ENABLED = True
+    settings.WORKER_ID = "leader"
+    leader = ShardCoordinator()
+    settings.WORKER_ID = "survivor"
+    survivor = ShardCoordinator()
+    if not await leader.acquire_leadership():
+        print("❌ First worker did not take the lease")
+        return
+
+    # The leader dies just before 04:00: its lease is still valid at the tick
+    scheduler.shard_coordinator = survivor
+    await scheduler.daily_settlement_job()
+    if await active_groups(AsyncSessionLocal) != {-100, -200, -300}:
+        print("❌ A worker without the lease settled")
+        return
+    print("✅ 04:00 tick on a worker without the lease does nothing")
+
+    # The dead leader's lease runs out; the next catch-up tick settles the day
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(LeaderLock).values(expires_at=day_start - timedelta(days=1)))
+        await session.commit()
+    await scheduler.daily_settlement_job()
+    if await active_groups(AsyncSessionLocal) != {-300}:
+        print(f"❌ Catch-up left {await active_groups(AsyncSessionLocal)} active")
+        return
+    async with AsyncSessionLocal() as session:
+        recorded = await session.get(ScheduledRun, scheduler.SETTLEMENT_RUN)
+    if not recorded or recorded.last_run_at != day_start:
+        print("❌ Settled business day not recorded")
+        return
+    print("✅ Next lease holder catches up the missed settlement; groups started after 04:00 keep running")
+
+    # Later ticks the same business day leave newly started groups alone
+    async with AsyncSessionLocal() as session:
+        await session.execute(update(GroupConfig).where(GroupConfig.group_id == -100).values(is_active=True, active_start_time=None))
+        await session.commit()
+    await scheduler.daily_settlement_job()
+    if await active_groups(AsyncSessionLocal) != {-100, -300}:
+        print("❌ Settlement ran twice for the same business day")
+        return
+    print("✅ Settlement runs once per business day")
+
+    await engine.dispose()
+    print("✅ Daily Settlement Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_daily_settlement())
@@ -0,0 +1,73 @@
+import asyncio
+import dataclasses
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.models.group import GroupConfig, GroupConfigView, Base
+from app.models.bot import Bot # Import Bot to register table
+from app.core.cache import cache_service
+from app.services.ledger_service import LedgerService
+from tests.verify_license_cache import CountingRedis
+
+
+async def test_group_config_view():
+    print("--- Testing GroupConfigView ---")
+    fields = [field.name for field in dataclasses.fields(GroupConfigView)]
+    columns = [column.name for column in GroupConfig.__table__.columns]
+    if sorted(fields) != sorted(columns):
+        print(f"❌ GroupConfigView fields out of sync with GroupConfig: {set(fields) ^ set(columns)}")
+        return
+    print("✅ Fields mirror the GroupConfig columns")
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with AsyncSessionLocal() as session:
+        service = LedgerService(session)
+        await service.get_group_config(-100, 1)
+        await service.start_recording(-100, 1)
+        await service.update_group_config(-100, 1, usd_rate=Decimal("7.2345"))
+        config = await service.get_group_config(-100, 1, group_name="Group")
+        if not isinstance(config, GroupConfigView) or config.usd_rate != Decimal("7.2345") or not config.is_active:
+            print(f"❌ DB path returned {config!r}")
+            return
+        try:
+            config.usd_rate = Decimal(1)
+            print("❌ View is mutable")
+            return
+        except dataclasses.FrozenInstanceError:
+            pass
+        if hasattr(config, "__dict__"):
+            print("❌ View has a __dict__ (slots not used)")
+            return
+        print("✅ DB path returns a frozen, slotted view with Decimal rates")
+
+        cache_service.redis, cache_service.enabled = CountingRedis(), True
+        first = await service.get_group_config(-100, 1)
+        cached = await service.get_group_config(-100, 1)
+        if cached != first or cache_service.redis.round_trips != 3:
+            print(f"❌ Cache hit returned {cached!r} ({cache_service.redis.round_trips} round trips)")
+            return
+        print("✅ Cache hit returns an equal view without touching the DB")
+
+    # Cache path, including an entry written by the old JSON encoding
+    legacy = {"id": 1, "bot_id": 1, "group_id": -200, "usd_rate": 7.1, "fee_percent": 0, "is_active": True,
+              "expire_at": "2030-01-01 00:00:00", "updated_at": "None", "no_longer_a_column": 1}
+    view = GroupConfigView.from_row(legacy)
+    if view.usd_rate != Decimal("7.1") or view.fee_percent != Decimal(0) or view.expire_at != datetime(2030, 1, 1) or view.updated_at is not None:
+        print(f"❌ Legacy cache row not normalised: {view!r}")
+        return
+    print("✅ Cached rows normalised once: Decimals, datetimes, unknown keys dropped")
+    print("✅ GroupConfigView Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_group_config_view())
@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import os
+import time
+from types import SimpleNamespace
+from sqlalchemy import select, func, insert
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from telegram.error import Forbidden
+from app.core.config import settings
+from app.core.bot_manager import bot_manager
+from app.models.bot import Bot
+from app.models.group import GroupConfig, GroupCategory, Operator, Base, group_category_association
+from app.services.group_exit_service import GroupExitService
+
+GROUPS = 200
+LEAVE_LATENCY = 0.05
+
+class FakeBot:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def leave_chat(self, chat_id, **kwargs):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(LEAVE_LATENCY)
+        self.in_flight -= 1
+        if chat_id % 10 == 0:
+            raise Forbidden("bot was kicked from the group chat")
+
+async def test_bulk_exit():
+    print(f"--- Testing Bulk Group Exit ({GROUPS} groups) ---")
+    settings.BOT_API_RATE_LIMIT = 1000
+    settings.GROUP_EXIT_CONCURRENCY = 20
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    fake_bot = FakeBot()
+    bot_manager.apps[1] = SimpleNamespace(bot=fake_bot)
+
+    async with AsyncSessionLocal() as session:
+        session.add(Bot(id=1, token="t1"))
+        session.add(GroupCategory(id=1, name="A", bot_id=1))
+        await session.commit()
+        await session.execute(insert(GroupConfig), [{"group_id": -i, "bot_id": 1} for i in range(1, GROUPS + 1)])
+        await session.execute(insert(Operator), [{"group_id": -i, "bot_id": 1, "user_id": i} for i in range(1, GROUPS + 1)])
+        config_ids = (await session.execute(select(GroupConfig.id))).scalars().all()
+        await session.execute(insert(group_category_association), [
+            {"group_config_id": cid, "category_id": 1} for cid in config_ids
+        ])
+        # A group that stays
+        session.add(GroupConfig(group_id=-999999, bot_id=1))
+        await session.commit()
+
+        service = GroupExitService(session)
+        groups = await service.load_groups(1, [-i for i in range(1, GROUPS + 1)])
+
+        start = time.perf_counter()
+        results = await service.exit_groups(1, groups)
+        elapsed = time.perf_counter() - start
+        print(f"Exited {len(results)} groups in {elapsed:.2f}s (max in flight: {fake_bot.max_in_flight})")
+
+        remaining_configs = await session.scalar(select(func.count(GroupConfig.id)))
+        remaining_ops = await session.scalar(select(func.count(Operator.id)))
+        remaining_links = await session.scalar(select(func.count()).select_from(group_category_association))
+
+        if len(results) != GROUPS or not all(r["left"] for r in results):
+            print("❌ Unexpected per-group results!")
+            return
+        if remaining_configs != 1 or remaining_ops != 0 or remaining_links != 0:
+            print(f"❌ Rows left behind: configs={remaining_configs}, operators={remaining_ops}, links={remaining_links}")
+            return
+        if fake_bot.max_in_flight < 2 or elapsed > GROUPS * LEAVE_LATENCY / 2:
+            print("❌ leave_chat calls were not concurrent!")
+            return
+
+        print("✅ Bulk exit is concurrent and set-based!")
+
+if __name__ == "__main__":
+    asyncio.run(test_bulk_exit())
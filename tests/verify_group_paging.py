@@ -0,0 +1,79 @@
+import asyncio
+import base64
+import sys
+import os
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.models.bot import Bot # Import Bot to register table
+from app.models.group import GroupConfig, Base
+from app.services.group_query_service import GroupQueryService
+
+GROUPS = 120
+
+
+async def walk(service, limit, edit=None, **filters) -> list[int]:
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = await service.list_groups(cursor=cursor, limit=limit, **filters)
+        seen.extend(group.id for group in page["items"])
+        pages += 1
+        if edit and pages == 1:
+            await edit()
+        cursor = page["next_cursor"]
+        if not cursor or pages > GROUPS:
+            return seen
+
+
+async def test_group_paging():
+    print(f"--- Testing Group Listing Pagination ({GROUPS} groups) ---")
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with AsyncSessionLocal() as session:
+        # updated_at comes from the server default, as stored in production
+        await session.execute(insert(GroupConfig), [
+            {"group_id": -i, "bot_id": 1 + i % 2, "group_name": f"G{i}"} for i in range(1, GROUPS + 1)
+        ])
+        await session.commit()
+        service = GroupQueryService(session)
+        all_ids = set((await session.execute(select(GroupConfig.id))).scalars())
+
+        seen = await walk(service, 50)
+        if len(seen) != GROUPS or set(seen) != all_ids or seen != sorted(seen, reverse=True):
+            print(f"❌ Admin listing: {len(seen)} rows, {len(set(seen))} unique")
+            return
+        print("✅ Admin listing: every group exactly once, newest first")
+
+        bot_ids = set((await session.execute(select(GroupConfig.id).where(GroupConfig.bot_id == 1))).scalars())
+        seen = await walk(service, 7, bot_id=1)
+        if len(seen) != len(bot_ids) or set(seen) != bot_ids:
+            print(f"❌ Per-bot listing: {len(seen)} rows, {len(set(seen))} unique of {len(bot_ids)}")
+            return
+        print("✅ Per-bot listing: every group exactly once")
+
+        async def edit_oldest():
+            await session.execute(update(GroupConfig).where(GroupConfig.id == min(all_ids)).values(group_name="edited"))
+            await session.commit()
+        seen = await walk(service, 50, edit=edit_oldest)
+        if len(seen) != GROUPS or set(seen) != all_ids:
+            print(f"❌ Edit during the walk: {len(seen)} rows, {len(set(seen))} unique")
+            return
+        print("✅ Editing a group mid-walk neither skips nor repeats rows")
+
+        legacy = base64.urlsafe_b64encode(b"2026-10-19T10:00:00|61").decode().rstrip("=")
+        page = await service.list_groups(cursor=legacy, limit=200)
+        if [group.id for group in page["items"]] != list(range(60, 0, -1)):
+            print("❌ Cursor from the previous format not honoured")
+            return
+        print("✅ Cursors issued before the change still page from their id")
+    print("✅ Group Listing Pagination Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_group_paging())
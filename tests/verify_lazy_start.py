@@ -0,0 +1,61 @@
+import asyncio
+import sys
+import os
+import tempfile
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "verify_lazy.db")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{DB_PATH}"
+os.environ["TG_MODE"] = "webhook"
+os.environ["BOT_LAZY_START"] = "1"
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.database import engine, Base, AsyncSessionLocal
+from app.core.bot_manager import bot_manager
+from app.models.bot import Bot
+
+async def test_lazy_activation():
+    print("--- Testing Lazy Bot Activation ---")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        session.add(Bot(id=1, token="111:AAlazyTokenForVerification000001", tg_user_id=111, tg_username="lazy_bot", tg_first_name="Lazy"))
+        session.add(Bot(id=2, token="222:AAlazyTokenForVerification000002", status="disabled", tg_user_id=222))
+        await session.commit()
+
+    if bot_manager.apps:
+        print("❌ Apps started before first update!")
+        return
+
+    # Concurrent first updates must share a single activation
+    apps = await asyncio.gather(*(bot_manager.ensure_app(1) for _ in range(10)))
+    if apps[0] is None or any(app is not apps[0] for app in apps):
+        print("❌ Concurrent activation built more than one Application!")
+        return
+    if apps[0].bot.username != "lazy_bot" or apps[0].bot_data.get("db_id") != 1:
+        print("❌ Cached bot info was not used!")
+        return
+    print(f"✅ Activated from cached info: @{apps[0].bot.username}")
+
+    if await bot_manager.ensure_app(2) is not None or await bot_manager.ensure_app(3) is not None:
+        print("❌ Disabled/unknown bot was activated!")
+        return
+
+    if await bot_manager.evict_idle(3600) != 0 or await bot_manager.evict_idle(0) != 1 or bot_manager.apps:
+        print("❌ Idle eviction misbehaved!")
+        return
+
+    again = await bot_manager.ensure_app(1)
+    if again is None or again is apps[0]:
+        print("❌ Evicted bot did not re-activate!")
+        return
+    await bot_manager.evict_idle(0)
+
+    print("✅ Lazy activation and idle eviction work!")
+    await engine.dispose()
+    os.remove(DB_PATH)
+
+if __name__ == "__main__":
+    asyncio.run(test_lazy_activation())
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import sys
+import os
+from datetime import datetime, timedelta
+from decimal import Decimal
+from prometheus_client import REGISTRY
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.models.group import GroupConfig, Base
+from app.models.bot import Bot # Import Bot to register table
+from app.core.config import settings
+from app.core.cache import cache_service, group_config_codec
+from app.services.license_service import LicenseService
+
+
+class CountingRedis:
+    """In-memory stand-in for redis.asyncio that counts network round trips."""
+
+    def __init__(self):
+        self.data = {}
+        self.round_trips = 0
+
+    async def get(self, key):
+        self.round_trips += 1
+        return self.data.get(key)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.data.get(key) for key in keys]
+
+    async def setex(self, key, ttl, value):
+        self.round_trips += 1
+        self.data[key] = value
+
+    async def delete(self, *keys):
+        self.round_trips += 1
+        for key in keys:
+            self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return CountingPipeline(self)
+
+
+class CountingPipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def setex(self, key, ttl, value):
+        self.commands.append((key, value))
+
+    async def execute(self):
+        self.redis.round_trips += 1
+        for key, value in self.commands:
+            self.redis.data[key] = value
+
+
+async def test_license_cache():
+    print("--- Testing Batched License Lookups ---")
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    queries = []
+    event.listen(engine.sync_engine, "before_cursor_execute", lambda conn, cursor, statement, *args: queries.append(statement))
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    redis = CountingRedis()
+    cache_service.redis, cache_service.enabled = redis, True
+
+    bot_id, group_id, user_id = 1, -3003, 2002
+    async with AsyncSessionLocal() as session:
+        session.add_all([
+            GroupConfig(group_id=group_id, bot_id=bot_id, expire_at=datetime.now() - timedelta(days=1), is_active=True),
+            GroupConfig(group_id=user_id, bot_id=bot_id, expire_at=datetime.now() + timedelta(days=30), is_active=True),
+        ])
+        await session.commit()
+        service = LicenseService(session)
+
+        queries.clear()
+        if not await service.check_license(group_id, bot_id, user_id=user_id):
+            print("❌ User license not honoured on a cold cache")
+            return
+        if redis.round_trips != 2 or len(queries) != 1:
+            print(f"❌ Cold check: expected MGET + pipelined SETEX and one IN query, got {redis.round_trips} round trips, {len(queries)} queries")
+            return
+        print("✅ Cold cache: one MGET, one IN query, one pipelined write")
+
+        redis.round_trips = 0
+        queries.clear()
+        warm = await service.check_license(group_id, bot_id, user_id=user_id)
+        if not warm or redis.round_trips != 1 or queries:
+            print(f"❌ Warm check: expected one MGET and no SQL, got {redis.round_trips} round trips, {len(queries)} queries")
+            return
+        print("✅ Warm cache: group and user config in one round trip, no SQL")
+
+        if await service.check_license(group_id, bot_id) or await service.check_license(-4004, bot_id, user_id=5005):
+            print("❌ Expired or unknown groups reported as licensed")
+            return
+        print("✅ Expired and unknown groups still rejected")
+
+        # Negative caching: an unknown group is looked up once, then served from cache
+        queries.clear()
+        for _ in range(5):
+            await service.check_license(-6006, bot_id)
+        ttl_ok = all(settings.CACHE_NEGATIVE_TTL <= cache_service._jittered(settings.CACHE_NEGATIVE_TTL) <= settings.CACHE_NEGATIVE_TTL * (1 + settings.CACHE_TTL_JITTER) for _ in range(100))
+        if len(queries) != 1 or not ttl_ok:
+            print(f"❌ Unknown group: expected one query for five checks, got {len(queries)} (TTL jitter ok: {ttl_ok})")
+            return
+        print("✅ Missing configs cached (short, jittered TTL): five checks, one query")
+
+        # Single flight: an expired hot entry under concurrent messages
+        await cache_service.invalidate_group_config(group_id, bot_id)
+        queries.clear()
+        before = REGISTRY.get_sample_value("cache_stampedes_avoided_total", {"cache": "group_config"}) or 0.0
+        results = await asyncio.gather(*(service.check_license(group_id, bot_id) for _ in range(20)))
+        avoided = (REGISTRY.get_sample_value("cache_stampedes_avoided_total", {"cache": "group_config"}) or 0.0) - before
+        if any(results) or len(queries) != 1 or avoided != 19:
+            print(f"❌ Stampede: expected one query and 19 joined loads, got {len(queries)} queries, {avoided} joined")
+            return
+        print(f"✅ 20 concurrent misses, one query ({avoided:.0f} stampedes avoided)")
+
+    async def failing_loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    outcomes = await asyncio.gather(*(cache_service.single_flight("k", failing_loader) for _ in range(3)), return_exceptions=True)
+    if not all(isinstance(outcome, RuntimeError) for outcome in outcomes) or cache_service._inflight:
+        print(f"❌ Loader failure not shared or flight left behind: {outcomes}")
+        return
+    print("✅ Loader errors reach every waiter and the flight is cleared")
+
+    await cache_service.invalidate_group_configs(bot_id, [group_id, user_id])
+    if cache_service._group_config_key(group_id, bot_id) in redis.data:
+        print("❌ Invalidation left keys behind")
+        return
+    await cache_service.set_many({"a": {"x": 1}, "b": {"y": 2}}, ttl=10)
+    if await cache_service.get_many(["a", "missing", "b"]) != [{"x": 1}, None, {"y": 2}]:
+        print("❌ get_many/set_many round trip wrong")
+        return
+    print("✅ Generic get_many/set_many keep key order and report misses")
+    print("✅ License Cache Verified!")
+
+async def test_codec():
+    print("--- Testing Binary Cache Codec ---")
+    redis = CountingRedis()
+    cache_service.redis, cache_service.enabled = redis, True
+    config = {column.name: None for column in GroupConfig.__table__.columns}
+    config.update(
+        id=7, bot_id=1, group_id=-1001234567890, group_name="交易群", is_active=True,
+        usd_rate=Decimal("7.2345"), fee_percent=Decimal("0.50"),
+        expire_at=datetime(2026, 12, 31, 23, 59, 59, 123456), updated_at=datetime(2026, 1, 1, 8, 30),
+    )
+    await cache_service.set_group_config(-1001234567890, 1, config)
+    cached = await cache_service.get_group_config(-1001234567890, 1)
+    if cached != config or not isinstance(cached["expire_at"], datetime) or str(cached["usd_rate"]) != "7.2345":
+        print(f"❌ Binary entry did not round-trip exactly: {cached}")
+        return False
+    print(f"✅ Decimals and datetimes round-trip exactly ({len(redis.data['group_config:1:-1001234567890'])} bytes)")
+
+    # Entries written by the JSON encoding are still read until they expire
+    redis.data["group_config:1:-5"] = json.dumps({"group_id": -5, "is_active": True, "usd_rate": 7.1, "expire_at": "2030-01-01 00:00:00"}).encode()
+    legacy = await cache_service.get_group_config(-5, 1)
+    if not legacy or legacy["usd_rate"] != Decimal("7.1") or not await LicenseService(None).check_license(-5, 1):
+        print(f"❌ Legacy JSON entry not tolerated: {legacy}")
+        return False
+    # Entries from another schema version are misses, not errors
+    stale = bytearray(group_config_codec.encode(config))
+    stale[2:6] = b"\x00\x00\x00\x00" # Schema fingerprint
+    redis.data["group_config:1:-6"] = bytes(stale)
+    if await cache_service.get_group_config(-6, 1) is not None:
+        print("❌ Entry with a stale schema fingerprint was decoded")
+        return False
+    print("✅ Legacy JSON entries read, stale binary entries treated as misses")
+    return True
+
+
+async def main():
+    await test_license_cache()
+    if await test_codec():
+        print("✅ Cache Codec Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,113 @@
+import asyncio
+import io
+import json
+import logging
+import sys
+import os
+from types import SimpleNamespace
+from telegram import Update, User
+from telegram.ext import Application, MessageHandler, filters
+from loguru import logger
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.bot_manager import BotApplication, CachedInfoBot
+from app.core.log import LevelFilter, parse_levels, sampled_logger, setup_logging
+
+
+def record(name: str, level: str) -> dict:
+    return {"name": name, "level": SimpleNamespace(no=logger.level(level).no)}
+
+
+def update_json(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": text,
+            "chat": {"id": chat_id, "type": "supergroup", "title": "Group"},
+            "from": {"id": 42, "is_bot": False, "first_name": "User"},
+        },
+    }
+
+
+async def test_level_filter():
+    print("--- Testing Per-Logger Levels ---")
+    overrides = parse_levels("app.bot=WARNING, app.bot.handlers.otc=DEBUG, httpx=error, bogus=LOUD")
+    if set(overrides) != {"app.bot", "app.bot.handlers.otc", "httpx"}:
+        print(f"❌ parse_levels returned {overrides}")
+        return False
+    level_filter = LevelFilter(logger.level("INFO").no, overrides)
+    cases = [
+        (record("app.bot.handlers.transaction", "INFO"), False),
+        (record("app.bot.handlers.transaction", "WARNING"), True),
+        (record("app.bot.handlers.otc", "DEBUG"), True),
+        (record("app.botany", "INFO"), True),
+        (record("httpx._client", "WARNING"), False),
+        (record("app.core.polling", "INFO"), True),
+    ]
+    for rec, expected in cases:
+        if level_filter(rec) != expected:
+            print(f"❌ {rec['name']} at {rec['level'].no}: expected {expected}")
+            return False
+    print("✅ Longest module prefix decides the level; invalid entries ignored")
+    return True
+
+
+async def test_json_sink():
+    print("--- Testing JSON Sink ---")
+    buffer = io.StringIO()
+    settings.LOG_JSON = True
+    settings.LOG_ENQUEUE = True
+    settings.LOG_LEVEL = "INFO"
+    settings.LOG_LEVELS = "httpx=WARNING"
+    setup_logging(buffer)
+
+    async def reply(update, context):
+        logger.info("handled {}", update.message.text)
+
+    bot = CachedInfoBot(token="1:TEST", bot_info=User(id=1, is_bot=True, first_name="Test", username="test_bot"))
+    app = Application.builder().bot(bot).application_class(BotApplication).build()
+    app.add_handler(MessageHandler(filters.TEXT, reply))
+    app.bot_data["db_id"] = 7
+    await app.initialize()
+    await app.process_update(Update.de_json(update_json(5, -100, "+100 {not a field}"), app.bot))
+
+    logging.getLogger("httpx").info("dropped at the source")
+    logging.getLogger("telegram.ext").warning("routed from stdlib")
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        logger.exception("failed")
+
+    settings.LOG_SAMPLE_RATE = 0.0
+    for _ in range(100):
+        sampled_logger.info("per-message line")
+    await logger.complete()
+
+    lines = [json.loads(line) for line in buffer.getvalue().splitlines()]
+    messages = [line["message"] for line in lines]
+    handled = next((line for line in lines if line["message"].startswith("handled")), None)
+    if handled is None or (handled.get("bot_id"), handled.get("chat_id"), handled.get("update_id")) != (7, -100, 5):
+        print(f"❌ Handler line missing update context: {handled}")
+        return False
+    print(f"✅ JSON lines carry bot_id/chat_id/update_id: {handled['message']}")
+    if "routed from stdlib" not in messages or "dropped at the source" in messages:
+        print(f"❌ stdlib routing/levels wrong: {messages}")
+        return False
+    print("✅ stdlib logging routed through the sink with its per-logger level")
+    failed = next(line for line in lines if line["message"] == "failed")
+    if "RuntimeError: boom" not in failed.get("exception", "") or "per-message line" in messages:
+        print("❌ Exception missing or sampled line not dropped")
+        return False
+    print("✅ Exceptions serialized; sampled lines dropped at LOG_SAMPLE_RATE=0")
+    return True
+
+
+async def main():
+    if await test_level_filter() and await test_json_sink():
+        print("✅ Logging Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+import httpx
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.main import app
+from app.core.config import settings
+from app.core.metrics import metrics, statement_tag
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def test_metrics():
+    print("--- Testing Metrics ---")
+    if not metrics.enabled:
+        print("❌ METRICS_ENABLED is off")
+        return
+
+    tags = {
+        'SELECT ledger_records.type, sum(ledger_records.amount) FROM ledger_records WHERE ...': "select ledger_records",
+        'INSERT INTO "group_configs" (bot_id) VALUES (?)': "insert group_configs",
+        "UPDATE bots SET status=? WHERE bots.id = ?": "update bots",
+        "DELETE FROM operators WHERE ...": "delete operators",
+        "PRAGMA journal_mode=WAL": "pragma",
+    }
+    for statement, expected in tags.items():
+        if statement_tag(statement) != expected:
+            print(f"❌ statement_tag({statement!r}) = {statement_tag(statement)!r}, expected {expected!r}")
+            return
+    print("✅ SQL statements get low-cardinality tags")
+
+    # Handlers
+    async def sample_handler(update, context):
+        return "done"
+
+    fake_app = SimpleNamespace(handlers={0: [SimpleNamespace(callback=sample_handler)]})
+    metrics.instrument_handlers(fake_app)
+    before = sample("bot_handler_seconds_count", handler="sample_handler")
+    result = await fake_app.handlers[0][0].callback(None, None)
+    if result != "done" or sample("bot_handler_seconds_count", handler="sample_handler") != before + 1:
+        print("❌ Handler wrapper did not record its call")
+        return
+    print("✅ Handler latency recorded per handler name")
+
+    # DB
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    metrics.instrument_engine(engine)
+    before = sample("db_query_seconds_count", statement="select")
+    async with engine.connect() as conn:
+        for _ in range(3):
+            await conn.execute(text("SELECT 1"))
+        try:
+            await conn.execute(text("SELECT * FROM missing_table"))
+        except Exception:
+            pass
+        leftovers = [key for key, value in (await conn.get_raw_connection()).info.items() if key.startswith("metrics") and value]
+        await conn.execute(text("SELECT 2"))
+    await engine.dispose()
+    if sample("db_query_seconds_count", statement="select") != before + 4:
+        print("❌ DB statements not timed")
+        return
+    if leftovers:
+        print(f"❌ Failed statement left timing state on the connection: {leftovers}")
+        return
+    print("✅ DB query latency recorded per statement tag; failed statements leave no state")
+
+    # Bot API, Redis, cache, broadcast
+    metrics.record_telegram("sendMessage", 0.05, 200)
+    metrics.record_telegram("sendMessage", 0.05, 429)
+    metrics.record_telegram("getUpdates", 1.0, "TimedOut")
+    with metrics.redis_timer("get"):
+        pass
+    metrics.record_cache("group_config", True)
+    metrics.record_cache("group_config", False)
+    metrics.record_broadcast(7, False)
+    checks = {
+        ("telegram_api_seconds_count", (("method", "sendMessage"),)): 2,
+        ("telegram_api_errors_total", (("method", "sendMessage"), ("code", "429"))): 1,
+        ("telegram_api_errors_total", (("method", "getUpdates"), ("code", "TimedOut"))): 1,
+        ("redis_command_seconds_count", (("command", "get"),)): 1,
+        ("cache_requests_total", (("cache", "group_config"), ("result", "hit"))): 1,
+        ("cache_requests_total", (("cache", "group_config"), ("result", "miss"))): 1,
+        ("broadcast_messages_total", (("bot_id", "7"), ("result", "failed"))): 1,
+    }
+    for (name, labels), expected in checks.items():
+        if sample(name, **dict(labels)) < expected:
+            print(f"❌ {name}{dict(labels)} not recorded")
+            return
+    print("✅ Bot API, Redis, cache and broadcast metrics recorded")
+
+    # Endpoint
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        unconfigured = await client.get("/metrics")
+        if unconfigured.status_code != 404 or "db_query_seconds" in unconfigured.text:
+            print(f"❌ /metrics served without METRICS_TOKEN ({unconfigured.status_code})")
+            return
+        settings.METRICS_TOKEN = "scrape-secret"
+        try:
+            denied = await client.get("/metrics")
+            response = await client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+        finally:
+            settings.METRICS_TOKEN = ""
+        if denied.status_code != 401:
+            print(f"❌ METRICS_TOKEN not enforced ({denied.status_code})")
+            return
+        if response.status_code != 200 or "update_queue_depth" not in response.text or "db_query_seconds" not in response.text:
+            print(f"❌ /metrics returned {response.status_code}")
+            return
+    print("✅ /metrics is only served with METRICS_TOKEN and serves the registry")
+
+    print("✅ Metrics Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_metrics())
@@ -0,0 +1,124 @@
+import asyncio
+import sys
+import os
+import time
+from prometheus_client import REGISTRY
+from telegram import User
+from telegram.error import RetryAfter
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.bot_manager import bot_manager
+from app.core.rate_limit import OutboundGovernor, OutboundPriority
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+async def send(governor, chat_id, priority=None, done=None, callback=None, endpoint="sendMessage"):
+    async def call():
+        if done is not None:
+            done.append(priority)
+        return True
+    data = {} if chat_id is None else {"chat_id": chat_id}
+    return await governor.process_request(callback or call, (), {}, endpoint, data, priority)
+
+
+async def test_outbound_governor():
+    print("--- Testing Outbound Governor ---")
+    settings.BOT_API_RATE_LIMIT = 20
+    settings.OUTBOUND_CHAT_RATE = 0
+
+    # Priorities: a broadcast already queued does not delay interactive replies
+    governor, done = OutboundGovernor(1), []
+    waits_before = sample("telegram_outbound_wait_seconds_count", priority="interactive")
+    broadcast = [asyncio.create_task(send(governor, -i, OutboundPriority.BROADCAST, done)) for i in range(1, 41)]
+    await asyncio.sleep(0.05)
+    replies = [asyncio.create_task(send(governor, -1000 - i, None, done)) for i in range(3)]
+    await asyncio.gather(*broadcast, *replies)
+    position = max(i for i, priority in enumerate(done) if priority is None)
+    if position > 24:
+        print(f"❌ Interactive replies served at position {position} of {len(done)}")
+        return
+    if sample("telegram_outbound_wait_seconds_count", priority="interactive") != waits_before + 3:
+        print("❌ Queue wait not recorded per priority")
+        return
+    print(f"✅ Interactive replies overtake a queued broadcast (last one served {position + 1}th of {len(done)})")
+
+    # Per-chat bucket: one chat is paced, other chats are not
+    settings.BOT_API_RATE_LIMIT, settings.OUTBOUND_CHAT_RATE, settings.OUTBOUND_CHAT_BURST = 1000, 10, 2
+    governor = OutboundGovernor(1)
+    start = time.monotonic()
+    await asyncio.gather(*(send(governor, -i) for i in range(1, 5)))
+    spread = time.monotonic() - start
+    await asyncio.gather(*(send(governor, -100) for _ in range(4)))
+    same_chat = time.monotonic() - start - spread
+    if spread > 0.05 or same_chat < 0.15:
+        print(f"❌ Per-chat pacing: 4 chats {spread:.3f}s, one chat {same_chat:.3f}s")
+        return
+    print(f"✅ Per-chat bucket paces one chat ({same_chat:.2f}s for 4 sends), not the bot")
+
+    # Only posting to a chat is paced per chat: permission checks and leaving are not
+    start = time.monotonic()
+    await asyncio.gather(*(send(governor, -400, endpoint=endpoint) for endpoint in ("getChatMember",) * 6 + ("leaveChat",)))
+    others = time.monotonic() - start
+    await asyncio.gather(send(governor, -400), send(governor, -400, endpoint="editMessageText"), send(governor, -400))
+    if others > 0.05 or time.monotonic() - start - others < 0.05:
+        print(f"❌ getChatMember/leaveChat paced per chat ({others:.3f}s)")
+        return
+    print("✅ getChatMember/leaveChat skip the per-chat bucket; send/edit share it")
+
+    # RetryAfter: the bot pauses, the call is retried, calls without a chat pass through
+    attempts = []
+
+    async def flood_once():
+        attempts.append(time.monotonic())
+        if len(attempts) == 1:
+            raise RetryAfter(1)
+        return "sent"
+
+    retried_before = sample("telegram_retry_after_total", bot_id="1")
+    start = time.monotonic()
+    flooded = asyncio.create_task(send(governor, -200, callback=flood_once))
+    await asyncio.sleep(0.05)
+    other = asyncio.create_task(send(governor, -201))
+    passthrough = await asyncio.wait_for(send(governor, None), 0.1)
+    result = await flooded
+    await other
+    other_waited = time.monotonic() - start
+    if result != "sent" or len(attempts) != 2 or attempts[1] - attempts[0] < 0.95 or other_waited < 0.95 or not passthrough:
+        print(f"❌ RetryAfter handling: result={result}, attempts={len(attempts)}, other waited {other_waited:.2f}s")
+        return
+    if sample("telegram_retry_after_total", bot_id="1") != retried_before + 1:
+        print("❌ RetryAfter not counted")
+        return
+    print("✅ RetryAfter pauses the whole bot and the call is retried; getUpdates-style calls pass through")
+
+    settings.OUTBOUND_MAX_RETRIES = 0
+
+    async def flood():
+        raise RetryAfter(0)
+    try:
+        await send(governor, -300, callback=flood)
+        print("❌ RetryAfter swallowed after the last retry")
+        return
+    except RetryAfter:
+        pass
+    await governor.shutdown()
+    print("✅ RetryAfter reaches the caller once retries are exhausted")
+
+    # Both ways of building a bot Application install a governor
+    token = "123456:ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghi"
+    info = User(id=123456, first_name="Bot", is_bot=True, username="sample_bot")
+    for app in (bot_manager._build_app(token, 7), bot_manager._build_app(token, 7, bot_info=info)):
+        if not isinstance(app.bot.rate_limiter, OutboundGovernor) or app.bot.rate_limiter.bot_db_id != 7:
+            print(f"❌ {type(app.bot).__name__} built without an OutboundGovernor")
+            return
+    print("✅ Bot Applications are built with their own governor")
+    print("✅ Outbound Governor Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_outbound_governor())
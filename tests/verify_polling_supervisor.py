@@ -0,0 +1,97 @@
+import asyncio
+import sys
+import os
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from telegram import Update
+from app.core.config import settings
+from app.core.polling import PollingSupervisor
+
+IDLE_BOTS = 50
+BUSY_UPDATES = 300
+
+class FakeBot:
+    """getUpdates backed by a list; empty polls wait out the long-poll timeout."""
+
+    def __init__(self, supervisor, updates=0):
+        self.supervisor = supervisor
+        self.queue = [Update(update_id=i) for i in range(1, updates + 1)]
+        self.polls = 0
+        self.max_inflight = 0
+        self.timeouts = []
+
+    async def delete_webhook(self):
+        return True
+
+    async def get_updates(self, offset=None, timeout=0, limit=100, allowed_updates=None):
+        self.polls += 1
+        self.timeouts.append(timeout)
+        self.max_inflight = max(self.max_inflight, self.supervisor.inflight)
+        if offset is not None:
+            self.queue = [u for u in self.queue if u.update_id >= offset]
+        batch = self.queue[:min(limit, 7)]
+        if not batch:
+            await asyncio.sleep(min(timeout, 0.05))
+        return batch
+
+class FakeApp:
+    def __init__(self, bot):
+        self.bot = bot
+        self.seen = []
+
+    async def process_update(self, update):
+        await asyncio.sleep(0)
+        self.seen.append(update.update_id)
+
+async def test_polling_supervisor():
+    print("--- Testing Polling Supervisor ---")
+    settings.POLL_MAX_INFLIGHT = 8
+    settings.POLL_IDLE_BACKOFF_MAX = 0.5
+    settings.POLL_DISPATCH_WORKERS = 4
+
+    supervisor = PollingSupervisor()
+    busy = FakeApp(FakeBot(supervisor, BUSY_UPDATES))
+    await supervisor.register(1, busy)
+    idle = []
+    for bot_id in range(2, IDLE_BOTS + 2):
+        app = FakeApp(FakeBot(supervisor))
+        idle.append(app)
+        await supervisor.register(bot_id, app)
+
+    for _ in range(200):
+        await asyncio.sleep(0.02)
+        if len(busy.seen) >= BUSY_UPDATES:
+            break
+    await asyncio.sleep(1.0)
+
+    stats = supervisor.stats()
+    busy_stats = next(b for b in stats["bots"] if b["bot_id"] == 1)
+    print(f"Busy bot: {busy_stats}")
+    idle_polls = [app.bot.polls for app in idle]
+    print(f"Idle bots polls: min {min(idle_polls)}, max {max(idle_polls)}; busy bot polls: {busy.bot.polls}")
+
+    max_inflight = max(app.bot.max_inflight for app in [busy] + idle)
+    await supervisor.stop()
+
+    if busy.seen != list(range(1, BUSY_UPDATES + 1)):
+        print("❌ Updates lost, duplicated or out of order!")
+        return
+    if max_inflight > settings.POLL_MAX_INFLIGHT:
+        print(f"❌ In-flight cap exceeded: {max_inflight}")
+        return
+    if busy.bot.polls <= max(idle_polls):
+        print("❌ Busy bot was not polled more tightly than idle bots!")
+        return
+    if busy_stats["backlog"] != 0 or busy_stats["processed"] != BUSY_UPDATES:
+        print("❌ Backlog stats wrong!")
+        return
+    if max(app.bot.timeouts[-1] for app in idle) <= settings.POLL_MIN_TIMEOUT:
+        print("❌ Idle bots did not get longer long-poll timeouts!")
+        return
+
+    print("✅ Supervisor polls adaptively and dispatches in order!")
+
+if __name__ == "__main__":
+    asyncio.run(test_polling_supervisor())
@@ -0,0 +1,80 @@
+import asyncio
+import sys
+import os
+from types import SimpleNamespace
+from telegram.error import BadRequest
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.reply_coalescer import ReplyCoalescer
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+        self.edit_error = None
+        self.message_id = 0
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.message_id += 1
+        self.sent.append((chat_id, text))
+        return SimpleNamespace(message_id=self.message_id)
+
+    async def edit_message_text(self, text, chat_id=None, message_id=None, **kwargs):
+        if self.edit_error:
+            raise self.edit_error
+        self.edited.append((chat_id, message_id, text))
+        return True
+
+
+def renderer(text):
+    async def render():
+        return text, None
+    return render
+
+
+async def burst(coalescer, bot, count, label):
+    for i in range(count):
+        coalescer.schedule(bot, 1, -100, renderer(f"{label} {i + 1}"))
+        await asyncio.sleep(0)
+    await asyncio.sleep(settings.REPLY_DEBOUNCE_SECONDS * 4)
+
+
+async def test_reply_coalescing():
+    print("--- Testing Debounced Bill Replies ---")
+    settings.REPLY_DEBOUNCE_SECONDS = 0.05
+    coalescer, bot = ReplyCoalescer(), FakeBot()
+
+    await burst(coalescer, bot, 10, "bill")
+    if bot.sent != [(-100, "bill 10")] or coalescer.coalesced != 9:
+        print(f"❌ Burst of 10 sent {bot.sent} (coalesced {coalescer.coalesced})")
+        return
+    print("✅ Burst of 10 transactions -> one reply with the latest bill")
+
+    await burst(coalescer, bot, 3, "again")
+    if len(bot.sent) != 1 or bot.edited != [(-100, 1, "again 3")]:
+        print(f"❌ Second burst: sent {bot.sent}, edited {bot.edited}")
+        return
+    print("✅ Burst within REPLY_EDIT_SECONDS edits the previous bill")
+
+    bot.edit_error = BadRequest("Message to edit not found")
+    await burst(coalescer, bot, 2, "deleted")
+    if bot.sent[-1] != (-100, "deleted 2") or len(bot.sent) != 2:
+        print(f"❌ Failed edit not replaced by a new message: {bot.sent}")
+        return
+    print("✅ Failed edit falls back to a new message")
+
+    settings.REPLY_DEBOUNCE_SECONDS = 60
+    coalescer.schedule(bot, 2, -200, renderer("shutdown"))
+    await asyncio.wait_for(coalescer.flush_all(), 1)
+    if bot.sent[-1] != (-200, "shutdown") or coalescer._tasks:
+        print(f"❌ flush_all did not send the pending reply: {bot.sent}")
+        return
+    print("✅ flush_all sends pending replies without waiting for quiet")
+    print("✅ Debounced Bill Replies Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_reply_coalescing())
@@ -0,0 +1,147 @@
+import asyncio
+import sys
+import os
+import tempfile
+from collections import Counter
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core import sharding
+from app.core.sharding import HashRing, ShardCoordinator
+from app.models.cluster import WorkerNode, LeaderLock
+from app.models.group import Base
+
+BOTS = 3000
+
+def test_ring():
+    print(f"--- Testing Hash Ring ({BOTS} bots) ---")
+    ring = HashRing(["w1", "w2", "w3"], settings.SHARD_VNODES)
+    owners = {bot_id: ring.owner(bot_id) for bot_id in range(1, BOTS + 1)}
+    counts = Counter(owners.values())
+    print(f"Distribution over 3 workers: {dict(counts)}")
+    if min(counts.values()) < BOTS / 3 * 0.7 or max(counts.values()) > BOTS / 3 * 1.3:
+        print("❌ Bots are unevenly distributed!")
+        return False
+
+    grown = HashRing(["w1", "w2", "w3", "w4"], settings.SHARD_VNODES)
+    moved = [bot_id for bot_id in owners if grown.owner(bot_id) != owners[bot_id]]
+    print(f"Adding a 4th worker moved {len(moved)} bots")
+    if any(grown.owner(bot_id) != "w4" for bot_id in moved):
+        print("❌ Bots moved between existing workers!")
+        return False
+    if len(moved) > BOTS / 4 * 1.4:
+        print("❌ Too many bots moved!")
+        return False
+
+    print("✅ Ring is balanced and stable!")
+    return True
+
+async def test_leader_lease():
+    print("--- Testing Leader Lease ---")
+    path = os.path.join(tempfile.mkdtemp(), "cluster.db")
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=[WorkerNode.__table__, LeaderLock.__table__])
+    sharding.AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    settings.SHARDING_ENABLED = True
+    settings.WORKER_ID = "a"
+    a = ShardCoordinator()
+    settings.WORKER_ID = "b"
+    b = ShardCoordinator()
+    # No bots in this DB: keep rebalancing out of the picture
+    a.rebalance = b.rebalance = lambda: asyncio.sleep(0)
+
+    await a.heartbeat()
+    await b.heartbeat()
+    await a.heartbeat()
+    results = [await a.acquire_leadership(), await b.acquire_leadership()]
+    print(f"Leadership after both heartbeats: a={results[0]}, b={results[1]}; members {sorted(b.members)}")
+    if results != [True, False]:
+        print("❌ Leader lease is not exclusive!")
+        return False
+    if sorted(b.members) != ["a", "b"] or a.ring.owner(42) != b.ring.owner(42):
+        print("❌ Workers disagree on membership!")
+        return False
+
+    await a.stop()
+    if not await b.acquire_leadership():
+        print("❌ Lease was not released on stop!")
+        return False
+    await b.heartbeat()
+    if sorted(b.members) != ["b"] or not b.owns(42):
+        print("❌ Stopped worker still owns bots!")
+        return False
+
+    await engine.dispose()
+    print("✅ Exactly one leader; ownership moves when a worker leaves!")
+    return True
+
+async def test_unreachable_owner():
+    print("--- Testing Forwarding To An Unreachable Owner ---")
+    settings.SHARDING_ENABLED = True
+    settings.WORKER_ID = "a"
+    coordinator = ShardCoordinator()
+    coordinator.ring = HashRing(["down"])
+    coordinator.members = {"down": "http://127.0.0.1:9"} # Nothing listens on the discard port
+    coordinator._client = httpx.AsyncClient(timeout=httpx.Timeout(1.0))
+    try:
+        results = [await coordinator.start_bot(42), await coordinator.reload_bot(42), await coordinator.stop_bot(42)]
+    except httpx.HTTPError as e:
+        print(f"❌ Forwarded admin call raised {type(e).__name__}")
+        return False
+    finally:
+        await coordinator._client.aclose()
+    if results != [False, False, False]:
+        print(f"❌ Unreachable owner reported {results}")
+        return False
+    print("✅ start/reload/stop report failure instead of raising, so callers can roll back")
+    return True
+
+async def test_job_polls():
+    print("--- Testing Job Polls Across Workers ---")
+    from app.main import app
+    from app.core.jobs import job_registry
+
+    settings.SHARDING_ENABLED = True
+    settings.WORKER_ID = "b"
+    sharding.shard_coordinator.worker_id = "b" # Jobs are created on worker b...
+    release = asyncio.Event()
+
+    async def run(job):
+        job["done"] = 3
+        await release.wait()
+        return {"removed": 5}
+    job = job_registry.submit("group_exit", 7, 5, run)
+    await asyncio.sleep(0)
+
+    settings.WORKER_ID = "a"
+    a = ShardCoordinator() # ...and polled on worker a, which reaches b over HTTP
+    a.members = {"a": "http://a", "b": "http://b"}
+    a._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    try:
+        running = await a.fetch_job(job["id"])
+        release.set()
+        await asyncio.sleep(0.01)
+        finished = await a.fetch_job(job["id"])
+        a.members.pop("b")
+        gone = await a.fetch_job(job["id"])
+    finally:
+        await a._client.aclose()
+    if not job["id"].endswith(".b") or not running or running["status"] != "running" or running["done"] != 3 or running["owner"] != 7:
+        print(f"❌ Running job as seen from another worker: {running}")
+        return False
+    if finished["status"] != "done" or finished["result"] != {"removed": 5} or gone is not None:
+        print(f"❌ Finished job / departed worker: {finished}, {gone}")
+        return False
+    print("✅ Job status polls reaching another worker are answered by the creating worker")
+    return True
+
+if __name__ == "__main__":
+    if test_ring() and asyncio.run(test_leader_lease()) and asyncio.run(test_unreachable_owner()):
+        asyncio.run(test_job_polls())
@@ -0,0 +1,52 @@
+import asyncio
+import sys
+import os
+import tempfile
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+import app.main
+from app.core import database
+from app.core.database import alembic_head, ensure_schema
+
+LAZY_MODULES = ["openpyxl", "sentry_sdk", "alembic", "sqlalchemy.dialects.postgresql"]
+
+async def test_startup():
+    print("--- Testing Startup ---")
+    loaded = [name for name in LAZY_MODULES if name in sys.modules]
+    if loaded:
+        print(f"❌ Heavy modules imported at startup: {loaded}")
+        return
+    print("✅ Rarely used heavy modules are not imported at startup")
+
+    head = alembic_head()
+    print(f"Alembic head: {head}")
+    if not head:
+        print("❌ Could not determine the Alembic head!")
+        return
+
+    path = os.path.join(tempfile.mkdtemp(), "startup.db")
+    database.engine = create_async_engine(f"sqlite+aiosqlite:///{path}", echo=False)
+    if not await ensure_schema():
+        print("❌ Fresh DB did not get create_all!")
+        return
+    async with database.engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE alembic_version (version_num VARCHAR(32) NOT NULL PRIMARY KEY)"))
+        await conn.execute(text("INSERT INTO alembic_version VALUES (:head)"), {"head": head})
+    if await ensure_schema():
+        print("❌ create_all ran on a DB already at the head!")
+        return
+    async with database.engine.begin() as conn:
+        await conn.execute(text("UPDATE alembic_version SET version_num = 'older'"))
+    if not await ensure_schema():
+        print("❌ create_all skipped on an outdated DB!")
+        return
+    await database.engine.dispose()
+
+    print("✅ create_all runs only when the DB is not at the Alembic head!")
+
+if __name__ == "__main__":
+    asyncio.run(test_startup())
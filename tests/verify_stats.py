@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import os
+from datetime import timedelta
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.models.bot import Bot
+from app.models.group import GroupConfig, Base
+from app.core import scheduler
+from app.core.utils import get_business_day_start
+from app.services.ledger_service import LedgerService
+from app.services.stats_service import stats_service
+
+async def test_incremental_stats():
+    print("--- Testing Incremental Dashboard Stats ---")
+
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with AsyncSessionLocal() as session:
+        session.add_all([Bot(id=1, token="t1", name="A"), Bot(id=2, token="t2", name="B")])
+        session.add_all([GroupConfig(group_id=-100, bot_id=1), GroupConfig(group_id=-200, bot_id=2),
+                         GroupConfig(group_id=-300, bot_id=1), GroupConfig(group_id=-400, bot_id=2)])
+        await session.commit()
+
+        await stats_service.reconcile(session)
+        service = LedgerService(session)
+
+        # Writes update the counters incrementally
+        await service.start_recording(-100, 1)
+        await service.start_recording(-100, 1)  # Already active: no double count
+        await service.start_recording(-200, 2)
+        await service.record_transaction(1, -100, "deposit", 1000, 1, "A", "+1000")
+        await service.record_transaction(2, -200, "deposit", 250.5, 1, "B", "+250.5")
+        await service.record_transaction(2, -200, "payout", 100, 1, "B", "下发100")
+        await service.stop_recording(-200, 2)
+        await service.delete_today_records(-200, 2)
+        # is_active set through the generic config update
+        await service.update_group_config(-300, 1, is_active=True, usd_rate=7)
+        await service.update_group_config(-300, 1, is_active=True)  # Already active
+        await service.update_group_config(-400, 2, is_active=False)  # Already inactive
+
+        incremental = stats_service.snapshot()
+        print(f"Incremental: {incremental}")
+
+        # A full recount must agree with the incremental view
+        await stats_service.reconcile(session)
+        recounted = stats_service.snapshot()
+        print(f"Recounted:   {recounted}")
+
+        keys = ["bot_count", "group_count", "pending_trials", "today_volume", "today_deposit_count"]
+        mismatched = [k for k in keys if incremental[k] != recounted[k]]
+        if mismatched:
+            print(f"❌ Stats mismatch on: {mismatched}")
+            return
+
+        if recounted["group_count"] != 2 or recounted["today_volume"] != 1000:
+            print("❌ Unexpected stats values!")
+            return
+
+        print("✅ Incremental stats match DB recount!")
+
+    # The 04:00 settlement stops every group started before the business day
+    async with AsyncSessionLocal() as session:
+        yesterday = get_business_day_start().replace(tzinfo=None) - timedelta(hours=1)
+        await session.execute(update(GroupConfig).values(active_start_time=yesterday))
+        await session.commit()
+    scheduler.AsyncSessionLocal = AsyncSessionLocal
+    await scheduler.daily_settlement_job()
+    if stats_service.snapshot()["group_count"] != 0:
+        print(f"❌ Daily settlement left group_count at {stats_service.snapshot()['group_count']}")
+        return
+    async with AsyncSessionLocal() as session:
+        await stats_service.reconcile(session)
+    if stats_service.snapshot()["group_count"] != 0:
+        print("❌ Daily settlement did not stop the groups")
+        return
+    print("✅ Daily settlement keeps the active group counter in step")
+
+if __name__ == "__main__":
+    asyncio.run(test_incremental_stats())
@@ -0,0 +1,156 @@
+import asyncio
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+import sentry_sdk
+from sentry_sdk.transport import Transport
+from telegram import Update, User
+from telegram.ext import Application, MessageHandler, filters
+from loguru import logger
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.bot_manager import BotApplication, CachedInfoBot, bot_manager
+from app.core.profiling import request_profiler
+from app.core.tracing import tracing
+
+
+class CaptureTransport(Transport):
+    def __init__(self, options=None):
+        super().__init__(options)
+        self.transactions = []
+
+    def capture_envelope(self, envelope):
+        for item in envelope.items:
+            if item.type == "transaction":
+                self.transactions.append(item.payload.json)
+
+
+def transaction_event(status="ok", ms=10, span_status=None) -> dict:
+    started = datetime(2026, 1, 1)
+    return {
+        "contexts": {"trace": {"status": status}},
+        "start_timestamp": started.isoformat() + "Z",
+        "timestamp": (started + timedelta(milliseconds=ms)).isoformat() + "Z",
+        "spans": [{"status": span_status}] if span_status else [],
+    }
+
+
+def update_json(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": text,
+            "chat": {"id": chat_id, "type": "supergroup", "title": "Group"},
+            "from": {"id": 42, "is_bot": False, "first_name": "User"},
+        },
+    }
+
+
+async def test_policy():
+    print("--- Testing Sampling Policy ---")
+    policy = tracing.policy
+    policy.update(record_rate=1.0, keep_rate=0.0, slow_ms=500)
+    cases = [
+        (transaction_event(status="internal_error"), "error"),
+        (transaction_event(span_status="deadline_exceeded"), "error"),
+        (transaction_event(ms=800), "slow"),
+        (transaction_event(ms=20), "dropped"),
+    ]
+    for event, expected in cases:
+        if policy.classify(event) != expected:
+            print(f"❌ Expected {expected}, got {policy.classify(event)}")
+            return False
+    policy.update(keep_rate=1.0)
+    if policy.classify(transaction_event(ms=20)) != "sampled":
+        print("❌ keep_rate=1 should keep every transaction")
+        return False
+    print("✅ Errors and slow transactions always kept, the rest sampled")
+
+    if policy.traces_sampler({"asgi_scope": {"path": "/health"}}) != 0.0 or policy.traces_sampler({"parent_sampled": True}) != 1.0:
+        print("❌ traces_sampler ignores probe paths or parent decisions")
+        return False
+    try:
+        policy.update(keep_rate=1.5)
+        print("❌ Invalid rate accepted")
+        return False
+    except ValueError:
+        pass
+    print("✅ Sampler skips probes, follows parents and validates runtime changes")
+    return True
+
+
+async def test_bot_updates():
+    print("--- Testing Bot Update Transactions ---")
+    transport = CaptureTransport()
+    sentry_sdk.init(
+        dsn="https://key@sentry.invalid/1",
+        transport=transport,
+        traces_sampler=tracing.policy.traces_sampler,
+        before_send_transaction=tracing.policy.before_send_transaction,
+    )
+    tracing.enabled = True
+    tracing.policy.update(record_rate=1.0, keep_rate=0.0, slow_ms=50)
+
+    async def fails(update, context):
+        raise RuntimeError("boom")
+
+    async def slow(update, context):
+        await asyncio.sleep(0.08)
+
+    async def fast(update, context):
+        return None
+
+    bot = CachedInfoBot(token="1:TEST", bot_info=User(id=1, is_bot=True, first_name="Test", username="test_bot"))
+    app = Application.builder().bot(bot).application_class(BotApplication).build()
+    app.add_handler(MessageHandler(filters.Regex("^fail$"), fails))
+    app.add_handler(MessageHandler(filters.Regex("^slow$"), slow))
+    app.add_handler(MessageHandler(filters.Regex("^fast$"), fast))
+    app.add_error_handler(bot_manager._on_error)
+    app.bot_data["db_id"] = 1
+    await app.initialize()
+
+    before = dict(tracing.policy.counts)
+    for i, text in enumerate(["fail", "slow", "fast", "fast"]):
+        await app.process_update(Update.de_json(update_json(i + 1, -100, text), app.bot))
+    sentry_sdk.flush()
+    counts = {name: tracing.policy.counts[name] - before[name] for name in before}
+    print(f"Policy decisions: {counts}; sent {len(transport.transactions)}")
+    if counts != {"error": 1, "slow": 1, "sampled": 0, "dropped": 2} or len(transport.transactions) != 2:
+        print("❌ Expected the failing and the slow update to be sent, the fast ones dropped")
+        return False
+    if {t["tags"].get("bot_id") for t in transport.transactions} != {"1"}:
+        print("❌ Transactions not tagged with bot_id")
+        return False
+    print("✅ Failing and slow updates traced, fast ones dropped")
+
+    print("--- Testing Per-Update Profiling ---")
+    tracing.enabled = False
+    settings.PROFILE_DUMP_DIR = tempfile.mkdtemp()
+    request_profiler.arm(bot_id=None, group_id=-200, count=1, minutes=5)
+    for i, chat_id in enumerate([-100, -200, -200]):
+        await app.process_update(Update.de_json(update_json(10 + i, chat_id, "fast"), app.bot))
+    dumps = [dump["name"] for dump in request_profiler.dumps()]
+    if len(dumps) != 2 or not all("chat-200" in name for name in dumps):
+        print(f"❌ Expected one .prof/.txt pair for chat -200, got {dumps}")
+        return False
+    if request_profiler.snapshot()["targets"]:
+        print("❌ Target still armed after its count was used up")
+        return False
+    if request_profiler.dump_path("../secrets.prof") is not None or request_profiler.dump_path(dumps[0]) is None:
+        print("❌ dump_path validation wrong")
+        return False
+    print(f"✅ Only the armed group's next update was profiled: {dumps}")
+    return True
+
+
+async def main():
+    logger.disable("app")
+    if await test_policy() and await test_bot_updates():
+        print("✅ Tracing and Profiling Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import os
+import httpx
+
+# Add app to path
+sys.path.append(os.getcwd())
+
+from app.main import app
+from app.core.config import settings
+from app.core.bot_manager import bot_manager
+from app.core.sharding import shard_coordinator, HashRing, FORWARDED_HEADER, INTERNAL_SECRET_HEADER
+
+BOT_ID = 7
+
+
+async def test_webhook_forwarding():
+    print("--- Testing Webhook Forwarding ---")
+    shard_coordinator.enabled = True
+    shard_coordinator.ring = HashRing(["other-worker"]) # Some other worker owns every bot
+    secret_token = f"secret_{BOT_ID}_{settings.SECRET_KEY}"[:32].replace("-", "")
+    headers = {"x-telegram-bot-api-secret-token": secret_token}
+    owner_replies = []
+
+    async def forward(bot_id, path, body, headers):
+        reply = owner_replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    local = []
+
+    async def ensure_app(bot_id):
+        local.append(bot_id)
+        return None
+
+    shard_coordinator.forward = forward
+    bot_manager.ensure_app = ensure_app
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def post(extra=None):
+            return await client.post(f"/telegram/webhook/{BOT_ID}", json={"update_id": 1}, headers={**headers, **(extra or {})})
+
+        owner_replies.append(httpx.Response(200, json={"status": "ok"}))
+        response = await post()
+        if response.status_code != 200 or response.json() != {"status": "ok"}:
+            print(f"❌ Forwarded update: {response.status_code} {response.text}")
+            return
+        print("✅ Owner's answer is relayed")
+
+        owner_replies.append(httpx.ConnectError("connection refused"))
+        response = await post()
+        if response.status_code != 503:
+            print(f"❌ Unreachable owner answered {response.status_code}")
+            return
+        owner_replies.append(httpx.Response(500, text="Internal Server Error"))
+        response = await post()
+        if response.status_code != 502:
+            print(f"❌ Owner 500 with a non-JSON body answered {response.status_code}")
+            return
+        print("✅ Unreachable or failing owner -> controlled 503/502, so Telegram retries")
+
+        response = await post({FORWARDED_HEADER: "attacker"})
+        if response.status_code != 401 or owner_replies or local:
+            print(f"❌ Forwarded header without the internal secret answered {response.status_code}")
+            return
+        response = await post({FORWARDED_HEADER: "other-worker", INTERNAL_SECRET_HEADER: shard_coordinator.internal_secret})
+        if local != [BOT_ID] or response.status_code != 404: # Handled here (no app in this test)
+            print(f"❌ Genuine forwarded update answered {response.status_code}")
+            return
+        print("✅ Forwarded header is only honoured with the internal secret")
+    print("✅ Webhook Forwarding Verified!")
+
+if __name__ == "__main__":
+    asyncio.run(test_webhook_forwarding())